@@ -1,44 +1,199 @@
 """
 Ayarlar yöneticisi - Uygulama konfigürasyonunu yönetir
 """
+import atexit
+import hashlib
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Callable, List, Tuple, Iterable
+
+Path_ = Tuple[str, ...]
+
+_MISSING = object()
 
 
 class Settings:
-    """Uygulama ayarları sınıfı"""
+    """
+    Uygulama ayarları sınıfı
+    
+    set() dosyaya hemen yazmaz: Değişiklikler arka plan thread'inde
+    save_delay kadar sessizlik beklendikten sonra tek seferde yazılır.
+    batch() içindeki değişiklikler blok bitince birlikte kaydedilir.
+    Dosya önce geçici dosyaya yazılıp yerine taşınır (Yarım dosya kalmaz).
     
-    def __init__(self):
+    Türler settings_default.json'dan gelir: Varsayılanı sayı olan ayara
+    metin yazılamaz (Dosyadaki hatalı değer varsayılana döner). subscribe()
+    ile bir anahtar (veya bölüm) değiştiğinde sadece ilgili bileşen
+    güncellenir.
+    """
+    
+    def __init__(self, save_delay: float = 0.5):
         self.config_dir = Path(__file__).parent
         self.settings_file = self.config_dir / "settings.json"
         self.default_file = self.config_dir / "settings_default.json"
         self.settings: Dict[str, Any] = {}
+        self.save_delay = save_delay  # Saniye
+        self.max_save_delay = save_delay * 10  # Değişiklik sürse de en geç bu kadar beklenir
+        
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # Aynı anda tek yazma
+        self._wakeup = threading.Condition(self._lock)
+        self._dirty = False
+        self._batch_depth = 0
+        self._writer: Optional[threading.Thread] = None
+        
+        self.defaults: Dict[str, Any] = {}
+        self._paths: Dict[str, Path_] = {}  # "a.b" -> ("a", "b") (Bir kez bölünür)
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._pending: set = set()  # batch() sırasında değişen yollar
+        self._signature: Optional[str] = None  # Son okunan/yazılan dosya içeriğinin özeti
         self.load()
+        atexit.register(self.flush)
     
     def load(self) -> None:
         """Ayarları yükle"""
         # Varsayılan ayarları yükle
         with open(self.default_file, 'r', encoding='utf-8') as f:
-            self.settings = json.load(f)
+            defaults = json.load(f)
+        loaded = json.loads(json.dumps(defaults))
         
         # Kullanıcı ayarları varsa üzerine yaz
+        signature = None
         if self.settings_file.exists():
             try:
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    user_settings = json.load(f)
-                    self._merge_settings(self.settings, user_settings)
+                raw = self.settings_file.read_bytes()
+                signature = hashlib.sha1(raw).hexdigest()
+                user_settings = json.loads(raw.decode('utf-8'))
+                self._merge_settings(loaded, user_settings)
             except Exception as e:
                 print(f"Ayarlar yüklenirken hata: {e}")
+        self._validate_tree(defaults, loaded, ())
+        
+        with self._lock:
+            previous = self.settings
+            self.defaults = defaults
+            self.settings = loaded
+            self._signature = signature
+            self._dirty = False  # Bekleyen (eski) değişiklikler dosyanın üzerine yazılmaz
+        
+        # Yeniden yüklemede sadece değişen anahtarların aboneleri çağrılır
+        if previous:
+            self._notify(_diff(previous, loaded, ()))
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Dosya dışarıdan değiştiyse yeniden yükle (Değişen ayarların aboneleri çağrılır)
+        
+        Kendi yazdığımız içerik ve yarım/bozuk JSON (Editör kaydı sürerken)
+        yok sayılır; geçerli ayarlar korunur.
+        
+        Returns:
+            Yeniden yüklendiyse True
+        """
+        try:
+            raw = self.settings_file.read_bytes()
+        except OSError:
+            return False  # Dosya yerine taşınıyor olabilir
+        if hashlib.sha1(raw).hexdigest() == self._signature:
+            return False
+        try:
+            json.loads(raw.decode('utf-8'))
+        except ValueError as e:
+            print(f"[AYAR] {self.settings_file.name} okunamadı, değişiklik bekleniyor: {e}")
+            return False
+        with self._lock:
+            if self._dirty:
+                print("[AYAR] Dosya dışarıdan değişti, kaydedilmemiş değişiklikler atlandı")
+        self.load()
+        return True
     
     def save(self) -> None:
-        """Ayarları kaydet"""
+        """Ayarları hemen kaydet (Çağıran thread'de)"""
+        with self._write_lock:
+            with self._lock:
+                self._dirty = False
+                content = json.dumps(self.settings, indent=2, ensure_ascii=False)
+            data = content.encode('utf-8')
+            try:
+                # Özet dosya yerine geçmeden önce: İzleyici kendi yazdığımızı yeniden yüklemez
+                self._signature = hashlib.sha1(data).hexdigest()
+                tmp_path = self.settings_file.with_name(self.settings_file.name + ".tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.settings_file)
+            except Exception as e:
+                print(f"Ayarlar kaydedilirken hata: {e}")
+    
+    def flush(self) -> None:
+        """Bekleyen değişiklik varsa hemen yaz (Kapanışta)"""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self.save()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Toplu güncelleme: Blok içindeki set() çağrıları tek yazmada kaydedilir
+        
+        Kullanım:
+            with settings.batch():
+                settings.set('a.b', 1)
+                settings.set('a.c', 2)
+        """
+        with self._lock:
+            self._batch_depth += 1
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Ayarlar kaydedilirken hata: {e}")
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                changed = ()
+                if self._batch_depth == 0:
+                    if self._dirty:
+                        self._schedule_save()
+                    changed, self._pending = self._pending, set()
+            self._notify(changed)
+    
+    def _schedule_save(self) -> None:
+        """Yazıcı thread'ini uyandır (self._lock altında çağrılır)"""
+        self._dirty = True
+        if self._batch_depth:
+            return
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        self._wakeup.notify()
+    
+    def _write_loop(self) -> None:
+        """Değişiklikler durulunca yaz (Her yeni değişiklik bekleme süresini uzatır)"""
+        with self._lock:
+            while True:
+                while not self._dirty or self._batch_depth:
+                    self._wakeup.wait()
+                # Sessizlik süresi: Bu arada gelen değişiklik beklemeyi yeniden başlatır
+                deadline = time.monotonic() + self.max_save_delay
+                while time.monotonic() < deadline and self._wakeup.wait(self.save_delay):
+                    pass
+                if not self._dirty or self._batch_depth:
+                    continue
+                self._lock.release()
+                try:
+                    self.save()
+                finally:
+                    self._lock.acquire()
+    
+    def _path(self, key: str) -> Path_:
+        path = self._paths.get(key)
+        if path is None:
+            path = self._paths[key] = tuple(key.split('.'))
+        return path
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -51,10 +206,9 @@ class Settings:
         Returns:
             Ayar değeri
         """
-        keys = key.split('.')
         value = self.settings
         
-        for k in keys:
+        for k in self._path(key):
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
@@ -62,24 +216,109 @@ class Settings:
         
         return value
     
+    def accessor(self, key: str, default: Any = None) -> Callable[[], Any]:
+        """Sık okunan ayar için hazır okuyucu (Anahtar her çağrıda çözülmez)"""
+        path = self._path(key)
+        
+        def read() -> Any:
+            value = self.settings
+            for k in path:
+                if isinstance(value, dict) and k in value:
+                    value = value[k]
+                else:
+                    return default
+            return value
+        return read
+    
     def set(self, key: str, value: Any) -> None:
         """
         Ayar değerini güncelle
         
         Args:
             key: Nokta ile ayrılmış ayar anahtarı (örn: "radio.port")
-            value: Yeni değer
+            value: Yeni değer (Türü varsayılanla uyuşmazsa yok sayılır)
         """
-        keys = key.split('.')
-        target = self.settings
+        path = self._path(key)
+        ok, value = self._check(path, value)
+        if not ok:
+            print(f"[AYAR] {key} için geçersiz değer yok sayıldı: {value!r}")
+            return
         
-        for k in keys[:-1]:
-            if k not in target:
-                target[k] = {}
-            target = target[k]
+        with self._lock:
+            target = self.settings
+            
+            for k in path[:-1]:
+                if k not in target:
+                    target[k] = {}
+                target = target[k]
+            
+            current = target.get(path[-1], _MISSING)
+            if current == value and not isinstance(value, (dict, list)):
+                return  # Değişmedi: Yazmaya gerek yok (Sözlük/liste yerinde değişmiş olabilir)
+            target[path[-1]] = value
+            self._schedule_save()
+            if self._batch_depth:
+                self._pending.add(path)
+                return
+        self._notify((path,))
+    
+    # --- Değişiklik bildirimi ---
+    
+    def subscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        """
+        Anahtar değişince callback(yeni değer) çağrılır
         
-        target[keys[-1]] = value
-        self.save()
+        Bölüm anahtarı ("weather") altındaki herhangi bir değişiklikte
+        tetiklenir. batch() içindeki değişiklikler blok bitince bir kez
+        bildirilir. Çağrı set()/load() yapan thread'de yapılır.
+        """
+        self._subscribers.setdefault(key, []).append(callback)
+    
+    def unsubscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        callbacks = self._subscribers.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+    
+    def _notify(self, changed: Iterable[Path_]) -> None:
+        changed = list(changed)
+        if not changed:
+            return
+        for key, callbacks in list(self._subscribers.items()):
+            path = self._path(key)
+            if not any(p[:len(path)] == path or path[:len(p)] == p for p in changed):
+                continue
+            value = self.get(key)
+            for callback in list(callbacks):
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"[AYAR] {key} değişikliği uygulanamadı: {e}")
+    
+    # --- Tür denetimi ---
+    
+    def _check(self, path: Path_, value: Any) -> Tuple[bool, Any]:
+        """Değeri varsayılanın türüne göre denetle (Gerekirse int <-> float çevir)"""
+        default = self.defaults
+        for k in path:
+            if not isinstance(default, dict) or k not in default:
+                return True, value  # Şemada yok: Serbest
+            default = default[k]
+        return _coerce(default, value)
+    
+    def _validate_tree(self, defaults: Dict, values: Dict, prefix: Path_) -> None:
+        """Dosyadan gelen hatalı türleri varsayılana döndür"""
+        for key, default in defaults.items():
+            if key not in values:
+                continue
+            if isinstance(default, dict) and isinstance(values[key], dict):
+                self._validate_tree(default, values[key], prefix + (key,))
+                continue
+            ok, value = _coerce(default, values[key])
+            if ok:
+                values[key] = value
+            else:
+                print(f"[AYAR] {'.'.join(prefix + (key,))} geçersiz ({values[key]!r}), varsayılan kullanılıyor")
+                values[key] = json.loads(json.dumps(default))
     
     def _merge_settings(self, base: Dict, updates: Dict) -> None:
         """İki ayar sözlüğünü birleştir"""
@@ -90,5 +329,46 @@ class Settings:
                 base[key] = value
 
 
+def _coerce(default: Any, value: Any) -> Tuple[bool, Any]:
+    """(Geçerli mi, değer): Varsayılanı None olan ayar her türü kabul eder"""
+    if default is None or value is None and not isinstance(default, (bool, int, float)):
+        return True, value
+    if isinstance(default, bool):
+        return isinstance(value, bool), value
+    if isinstance(default, int):
+        if isinstance(value, bool):
+            return False, value
+        if isinstance(value, int):
+            return True, value
+        if isinstance(value, float) and value.is_integer():
+            return True, int(value)
+        return False, value
+    if isinstance(default, float):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return True, float(value)
+        return False, value
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            return False, value
+        # Bilinen alt anahtarlar da denetlenir; hatalı olanlar varsayılana döner
+        value = dict(value)
+        for key, sub_default in default.items():
+            if key in value:
+                ok, sub_value = _coerce(sub_default, value[key])
+                value[key] = sub_value if ok else sub_default
+        return True, value
+    return isinstance(value, type(default)), value
+
+
+def _diff(old: Any, new: Any, prefix: Path_) -> List[Path_]:
+    """İki ayar ağacı arasında değişen yollar"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = []
+        for key in old.keys() | new.keys():
+            changed.extend(_diff(old.get(key, _MISSING), new.get(key, _MISSING), prefix + (key,)))
+        return changed
+    return [] if old == new else [prefix]
+
+
 # Global settings instance
 settings = Settings()
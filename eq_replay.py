@@ -0,0 +1,260 @@
+"""
+Deprem akışı kayıt / oynatma / gecikme ölçümü
+
+Kullanım:
+    python eq_replay.py record kayit.jsonl --duration 3600   Canlı API'yi kaydet
+    python eq_replay.py generate senaryo.jsonl                Yapay artçı senaryosu üret
+    python eq_replay.py serve senaryo.jsonl --port 8088       Kaydı yerel API ve EMSC akışı olarak sun
+    python eq_replay.py bench [senaryo.jsonl]                 Uçtan uca bildirim gecikmesi
+    python eq_replay.py check                                 Tekrar/artçı ayrımı kontrolü
+
+bench, EarthquakeService'i yerel sunucuya yönlendirir ve her deprem için
+yayın -> earthquake_detected -> NotificationManager.send_earthquake_notification
+sürelerini ölçer. Varsayılan olarak seslendirme yapılmaz (--speak ile açılır).
+--stream ile servis sunucunun EMSC akışına (SSE) da abone olur.
+"""
+import argparse
+import statistics
+import sys
+import time
+from services.earthquake_replay import (load_feed, save_feed, record_feed, generate_scenario,
+                                        first_publish_times, ReplayServer)
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+def _summary(name, values):
+    if not values:
+        return f"{name:<28} -"
+    ms = [v * 1000 for v in values]
+    return (f"{name:<28} n={len(ms):<4} min={min(ms):8.1f}  ort={statistics.mean(ms):8.1f}  "
+            f"p50={_percentile(ms, 50):8.1f}  p95={_percentile(ms, 95):8.1f}  max={max(ms):8.1f} ms")
+
+
+def _expected_events(service, entries, published, min_magnitude):
+    """
+    Okunması gereken fiziksel depremler
+
+    Kurum kayıtları servisle aynı kuralla birleştirilir. Bir olayın hiçbir
+    kaydı ilk sorguda (t <= 0, öğrenilir) görünmemişse ve herhangi bir
+    sürümü eşiği geçiyorsa okunmalıdır.
+
+    Returns:
+        (Beklenen olaylar {numara: kayıt}, ID -> olay numarası)
+    """
+    from services.earthquake_service import merge_earthquakes
+
+    latest, peak = {}, {}
+    for entry in entries:
+        for raw in entry['payload'].get('result') or []:
+            record = service._parse_earthquake(raw, entry['provider'])
+            latest[record.id] = record
+            peak[record.id] = max(peak.get(record.id, 0.0), record.magnitude)
+
+    expected, event_of = {}, {}
+    for n, event in enumerate(merge_earthquakes(list(latest.values()))):
+        ids = event.ids or (event.id,)
+        for eq_id in ids:
+            event_of[eq_id] = n
+        if (min(published.get(i, 0.0) for i in ids) > 0
+                and max(peak[i] for i in ids) >= min_magnitude):
+            expected[n] = event
+    return expected, event_of
+
+
+def bench(args) -> int:
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    app = QCoreApplication(sys.argv[:1])
+
+    from services.earthquake_service import EarthquakeService
+    from services.notification_manager import NotificationManager
+
+    entries = load_feed(args.feed) if args.feed else generate_scenario(seed=args.seed)
+    published = first_publish_times(entries)
+    duration = args.duration or (entries[-1]['t'] / args.speed + 10 if entries else 10)
+
+    server = ReplayServer(entries, port=args.port, speed=args.speed)
+
+    service = EarthquakeService(min_magnitude=args.min_magnitude)
+    for name in list(service.providers):
+        service.providers[name] = server.url(name if name in ("Kandilli", "AFAD") else "")
+    service.set_provider(args.provider)
+    service.sources = [(name, service.providers[name]) for name, _ in service.sources]
+    service.check_interval = args.interval  # Ayar alt sınırı (10 sn) burada uygulanmaz
+    if args.stream:
+        service.set_stream(True, server.stream_url)
+
+    manager = NotificationManager()
+    if not args.speak:
+        # Seslendirme ölçüme katılmaz: Anons başladı -> hemen bitti
+        manager._speak_thread = lambda message: manager._speech_done.emit()
+
+    detected = {}
+    announced = []
+    pending = []
+
+    def on_detected(eq):
+        detected[eq['id']] = time.time()
+        pending.append(eq)
+
+    def on_started(message):
+        eq = pending.pop(0) if pending else None
+        announced.append((time.time(), eq, message))
+
+    # Ölçüm bağlantısı önce, ardından Station ile aynı anons bağlantısı
+    service.earthquake_detected.connect(on_detected)
+    service.earthquake_detected.connect(manager.send_earthquake_notification)
+    manager.notification_started.connect(on_started)
+
+    server.start()
+    print(f"Oynatma: {server.base_url}  kayıt={len(entries)} satır  hız={args.speed}x  "
+          f"sorgu={args.interval} sn  süre={duration:.0f} sn")
+    service.start_monitoring()
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    app.exec()
+    service.close()
+    server.stop()
+
+    # Sonuç
+    started = server.started_at
+    expected, event_of = _expected_events(service, entries, published, args.min_magnitude)
+    publish_to_detect, detect_to_announce, total = [], [], []
+    duplicates = 0
+    heard = set()
+    for announced_at, eq, message in announced:
+        if eq is None:
+            continue
+        # Akış kaydının ID'si "EMSC:<kurum ID'si>"
+        ids = [i.split(':', 1)[-1] for i in eq.get('ids') or (eq['id'],)]
+        events = {event_of[i] for i in ids if i in event_of}
+        if events & heard:
+            duplicates += 1  # Aynı deprem ikinci kez okundu (Kurumlar arası tekrar)
+        heard |= events
+        first = min((published[i] for i in ids if i in published), default=None)
+        if first is None:
+            continue
+        publish_at = started + first / args.speed
+        publish_to_detect.append(detected[eq['id']] - publish_at)
+        detect_to_announce.append(announced_at - detected[eq['id']])
+        total.append(announced_at - publish_at)
+        if args.verbose:
+            print(f"  {eq['magnitude']:>4} {eq['location']:<32} {eq['source']:<9} "
+                  f"toplam={(announced_at - publish_at) * 1000:8.1f} ms")
+
+    print(_summary("Yayın -> tespit", publish_to_detect))
+    print(_summary("Tespit -> anons", detect_to_announce))
+    print(_summary("Yayın -> anons (toplam)", total))
+    missed = [expected[n] for n in sorted(expected) if n not in heard]
+    if args.verbose:
+        for eq in missed:
+            print(f"  KAÇIRILDI {eq.magnitude:>4} {eq.location:<32} {'+'.join(eq.ids or (eq.id,))}")
+    print(f"Anons: {len(announced)}  beklenen: {len(expected)}  kaçırılan: {len(missed)}  "
+          f"tekrar anons: {duplicates}  sunucu isteği: {server.requests}")
+    return 1 if missed or duplicates else 0
+
+
+def check(args) -> int:
+    """Kurumlar arası tekrar bastırılır, aynı kurumun artçıları okunur (Ağ gerekmez)"""
+    from services.earthquake_service import EarthquakeService
+    from services.earthquake_records import EarthquakeRecord
+
+    t0 = time.time() - 120
+
+    def record(eq_id, source, dt, mag, lat, lon):
+        return EarthquakeRecord(eq_id, source, mag, "ELBISTAN (KAHRAMANMARAS)", 7.0, "",
+                                t0 + dt, lat, lon, (source,), (eq_id,))
+
+    cases = [
+        # (Adı, kayıt, okunmalı mı)
+        ("Ana şok (Kandilli)", record("K1", "Kandilli", 0, 5.3, 38.08, 37.03), True),
+        ("Aynı deprem (AFAD)", record("A1", "AFAD", 3, 5.4, 38.09, 37.02), False),
+        ("Artçı +24 sn (Kandilli)", record("K2", "Kandilli", 24, 5.0, 38.10, 37.05), True),
+        ("Artçı +38 sn (Kandilli)", record("K3", "Kandilli", 38, 5.7, 38.07, 37.01), True),
+        ("Artçının AFAD kaydı", record("A3", "AFAD", 40, 5.6, 38.07, 37.02), False),
+    ]
+
+    service = EarthquakeService(min_magnitude=0)
+    service.known_earthquakes.loaded = True
+    announced = []
+    service.earthquake_detected.connect(lambda eq: announced.append(eq['id']))
+
+    failures = 0
+    for name, eq, expected in cases:
+        before = len(announced)
+        service._announce_new([eq])
+        got = len(announced) > before
+        failures += got != expected
+        print(f"{'OK ' if got == expected else 'HATA'} {name:<26} beklenen={'oku' if expected else 'atla'}  "
+              f"sonuç={'oku' if got else 'atla'}")
+    print("Tüm kontroller geçti" if not failures else f"{failures} kontrol başarısız")
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Deprem akışı kayıt / oynatma / gecikme ölçümü")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('record', help="Canlı API'yi kaydet")
+    p.add_argument('output')
+    p.add_argument('--duration', type=float, default=3600, help="Saniye")
+    p.add_argument('--interval', type=float, default=10, help="Sorgu aralığı (saniye)")
+
+    p = sub.add_parser('generate', help="Yapay senaryo üret")
+    p.add_argument('output')
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--aftershocks', type=int, default=30)
+    p.add_argument('--duration', type=float, default=60)
+
+    p = sub.add_parser('serve', help="Kaydı yerel API olarak sun")
+    p.add_argument('feed')
+    p.add_argument('--port', type=int, default=8088)
+    p.add_argument('--speed', type=float, default=1.0)
+
+    p = sub.add_parser('bench', help="Uçtan uca bildirim gecikmesi")
+    p.add_argument('feed', nargs='?', help="Kayıt dosyası (Yoksa yapay senaryo)")
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--port', type=int, default=0)
+    p.add_argument('--speed', type=float, default=1.0)
+    p.add_argument('--interval', type=int, default=2, help="Sorgu aralığı (saniye)")
+    p.add_argument('--provider', default="Kandilli + AFAD (Paralel)")
+    p.add_argument('--min-magnitude', type=float, default=3.5)
+    p.add_argument('--duration', type=float, default=0, help="Saniye (0: Kayıt bitene kadar)")
+    p.add_argument('--speak', action='store_true', help="Seslendirmeyi de ölç")
+    p.add_argument('--stream', action='store_true', help="EMSC akışına (SSE) da abone ol")
+    p.add_argument('-v', '--verbose', action='store_true')
+
+    sub.add_parser('check', help="Tekrar/artçı ayrımı kontrolü")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        count = record_feed(args.output, args.duration, args.interval)
+        print(f"{count} yanıt kaydedildi: {args.output}")
+    elif args.command == 'generate':
+        entries = generate_scenario(args.seed, args.aftershocks, args.duration)
+        save_feed(args.output, entries)
+        print(f"{len(entries)} satır yazıldı: {args.output}")
+    elif args.command == 'serve':
+        server = ReplayServer(load_feed(args.feed), port=args.port, speed=args.speed)
+        server.start()
+        print(f"Sunuluyor: {server.base_url}  akış: {server.stream_url}  (Ctrl+C ile durdur)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+    elif args.command == 'bench':
+        return bench(args)
+    elif args.command == 'check':
+        return check(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
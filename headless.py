@@ -0,0 +1,70 @@
+"""
+TB2ASJ - Arayüzsüz (Headless) istasyon modu
+Ekranı olmayan sistemlerde pencere açmadan çalışır.
+
+Başlatma:  python main.py --headless
+Kontrol:   python main.py --ctl status
+"""
+import sys
+import json
+import signal
+from PyQt6.QtCore import QCoreApplication, QTimer
+from config import settings
+from services.control_socket import ControlServer, send_command
+
+
+def main(argv=None):
+    """Arayüzsüz istasyonu başlat"""
+    # Ses/TTS modülleri sadece istasyon açılırken yüklenir (--ctl hızlı kalsın)
+    from services.station import Station
+
+    app = QCoreApplication(argv if argv is not None else sys.argv)
+    app.setApplicationName("TB2ASJ")
+    app.setOrganizationName("TB2ASJ")
+
+    # İstasyon (Widget yok, zamanlayıcılar QCoreApplication döngüsünde çalışır)
+    station = Station()
+    station.start()
+    station.apply_settings()
+
+    # Yerel kontrol soketi
+    control = ControlServer(station, settings.get('headless.control_socket', 'tb2asj-control'))
+    control.start()
+
+    if settings.get('headless.auto_connect', True):
+        if not station.connect_radio():
+            print("[HATA] Ses cihazı başlatılamadı!")
+
+    # Kapanışta her şeyi düzgün durdur
+    def shutdown():
+        print("İstasyon kapatılıyor...")
+        control.stop()
+        station.stop()
+
+    app.aboutToQuit.connect(shutdown)
+
+    # Ctrl+C / systemd stop (Qt döngüsü Python sinyallerini bekletir,
+    # bu yüzden kısa aralıkla Python'a kontrol veriyoruz)
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    signal.signal(signal.SIGTERM, lambda *args: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(500)
+
+    print("TB2ASJ arayüzsüz modda çalışıyor.")
+    return app.exec()
+
+
+def control(command: str) -> int:
+    """Çalışan istasyona tek komut gönder ve yanıtı yazdır"""
+    app = QCoreApplication(sys.argv[:1])
+    app.setApplicationName("TB2ASJ")
+    reply = send_command(command, settings.get('headless.control_socket', 'tb2asj-control'))
+    if reply is None:
+        return 1
+    print(json.dumps(reply, ensure_ascii=False, indent=2))
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
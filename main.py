@@ -1,14 +1,30 @@
 """
 TB2ASJ - Telsiz Yönetim Sistemi
 Ana uygulama giriş noktası
+
+Kullanım:
+    python main.py               Pencereli mod
+    python main.py --headless    Arayüzsüz (ekransız) mod
+    python main.py --ctl status  Çalışan arayüzsüz istasyona komut gönder
 """
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
 
 
 def main():
     """Ana fonksiyon"""
+    args = sys.argv[1:]
+    
+    if '--headless' in args or '--ctl' in args:
+        import headless
+        if '--ctl' in args:
+            command = " ".join(args[args.index('--ctl') + 1:]) or "status"
+            sys.exit(headless.control(command))
+        sys.exit(headless.main([sys.argv[0]]))
+    
+    # Widget modülleri sadece pencereli modda yüklenir
+    from PyQt6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+    
     app = QApplication(sys.argv)
     app.setApplicationName("TB2ASJ")
     app.setOrganizationName("TB2ASJ")
@@ -3,9 +3,48 @@ Ses yöneticisi - Mikrofon ve hoparlör kontrolü (Loopback destekli)
 """
 import sounddevice as sd
 import numpy as np
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
-import queue # EKLENDİ
+from .device_registry import DeviceRegistry, enumerate_audio_devices
+
+
+class TXAudioBuffer:
+    """
+    Önceden ayrılmış blok halkası (Tek yazar: input callback, tek okur: output callback)
+    
+    PTT ön gecikmesi boyunca mikrofon blokları atılmadan burada bekler.
+    Callback'ler içinde bellek ayırmamak için tüm alan baştan ayrılır.
+    """
+    
+    def __init__(self, slots: int, block_size: int, channels: int = 1):
+        self.blocks = np.zeros((slots, block_size, channels), dtype=np.float32)
+        self.slots = slots
+        self.write_pos = 0  # Sadece input callback artırır
+        self.read_pos = 0   # Sadece output callback artırır
+    
+    def reset(self) -> None:
+        self.read_pos = self.write_pos
+    
+    def __len__(self) -> int:
+        return self.write_pos - self.read_pos
+    
+    def write(self, indata: np.ndarray, gain: float) -> bool:
+        """Bloğu kazançla birlikte halkaya yaz (Doluysa False)"""
+        if self.write_pos - self.read_pos >= self.slots:
+            return False
+        block = self.blocks[self.write_pos % self.slots]
+        np.multiply(indata, gain, out=block)
+        np.clip(block, -1.0, 1.0, out=block)
+        self.write_pos += 1
+        return True
+    
+    def read(self, outdata: np.ndarray, gain: float) -> bool:
+        """Sıradaki bloğu çıkışa yaz (Boşsa False)"""
+        if self.write_pos == self.read_pos:
+            return False
+        np.multiply(self.blocks[self.read_pos % self.slots], gain, out=outdata)
+        self.read_pos += 1
+        return True
 
 
 class AudioManager(QObject):
@@ -14,18 +53,27 @@ class AudioManager(QObject):
     # Sinyaller
     level_changed = pyqtSignal(float)
     threshold_exceeded = pyqtSignal()
+    tx_drained = pyqtSignal(float)  # Kuyruk sonu çalındı (stream saati)
+    
+    # TX halkası en fazla bu kadar ön gecikmeyi karşılar (saniye)
+    MAX_TX_DELAY = 2.0
     
-    def __init__(self):
+    def __init__(self, device_registry: Optional[DeviceRegistry] = None):
         super().__init__()
+        self.device_registry = device_registry
         self.is_monitoring = False
-        self.input_device = None
-        self.output_device = None
+        # Cihaz anahtarı ("host API: isim") veya eski ayarlardan kalan indeks
+        self.input_device: Union[int, str, None] = None
+        self.output_device: Union[int, str, None] = None
         self.sample_rate = 44100
         # Blocksize artırıldı ve sabitlendi (performans için)
         self.block_size = 2048 
         self.stream = None
         self.stream_in = None  # AYRI STREAM
         self.stream_out = None # AYRI STREAM
+        # Açık stream'lerin kurulduğu yapılandırma (Giriş, çıkış, hız, blok)
+        self._stream_config: Optional[Tuple] = None
+        self._stream_indices: Optional[Tuple] = None  # Açılan PortAudio indeksleri
         
         # Seviye ayarları
         self.mic_level = 50  # 0-100 (Giriş kazancı)
@@ -35,46 +83,77 @@ class AudioManager(QObject):
         # Loopback kontrolü (Sesi dışarı verme)
         self.loopback_active = False  # PTT basılı mı veya VOX aktif mi?
         
+        # TX sıralaması (Zamanlar stream saatine göre, saniye)
+        # Callback'ler bu alanları okur; GUI thread sadece atama yapar
+        self.tx_buffer: Optional[TXAudioBuffer] = None
+        self._tx_capture = False                      # Mikrofon halkaya yazılıyor mu
+        self._tx_audio_start: Optional[float] = None  # Çıkışın başlayacağı DAC zamanı
+        self._tx_capture_stop: Optional[float] = None # Kaydın biteceği ADC zamanı
+        # Faz zamanları: Callback'ler sadece hazır alanlara atama yapar
+        # (Sözlük tx_timeline'da, GUI thread'inde kurulur)
+        self._t_ptt_on: Optional[float] = None
+        self._t_audio_scheduled: Optional[float] = None
+        self._t_audio_start: Optional[float] = None   # Output callback
+        self._t_release: Optional[float] = None
+        self._t_capture_end: Optional[float] = None   # Input callback
+        self._t_drained: Optional[float] = None       # Output callback
+        
         # Seviye ölçümü için
         self.level_timer = QTimer()
         self.level_timer.timeout.connect(self._check_level)
         self.current_level = 0.0
+        
+        # İlk tarama bitmeden açılan stream'ler varsayılan cihazdadır
+        if self.device_registry:
+            self.device_registry.audio_devices_changed.connect(self._on_devices_changed)
     
     @staticmethod
     def get_audio_devices() -> Tuple[List[dict], List[dict]]:
-        """Mevcut ses cihazlarını listele"""
+        """
+        Mevcut ses cihazlarını listele (Engelleyici)
+        
+        GUI tarafında DeviceRegistry önbelleği tercih edilmelidir.
+        """
         try:
-            devices = sd.query_devices()
-            input_devices = []
-            output_devices = []
-            
-            for i, device in enumerate(devices):
-                device_info = {
-                    'id': i,
-                    'name': device['name'],
-                    'channels': device['max_input_channels'] if device['max_input_channels'] > 0 
-                               else device['max_output_channels']
-                }
-                
-                if device['max_input_channels'] > 0:
-                    input_devices.append(device_info)
-                if device['max_output_channels'] > 0:
-                    output_devices.append(device_info)
-            
-            return input_devices, output_devices
+            return enumerate_audio_devices()
         except Exception as e:
             print(f"Cihaz listeleme hatası: {e}")
             return [], []
     
-    def set_input_device(self, device_id: Optional[int]) -> None:
-        self.input_device = device_id
-        if self.is_monitoring:
-            self.restart_monitoring()
+    def set_input_device(self, device: Union[int, str, None]) -> None:
+        self.configure(device, self.output_device)
     
-    def set_output_device(self, device_id: Optional[int]) -> None:
-        self.output_device = device_id
-        if self.is_monitoring:
-            self.restart_monitoring()
+    def set_output_device(self, device: Union[int, str, None]) -> None:
+        self.configure(self.input_device, device)
+    
+    def configure(self, input_device: Union[int, str, None], output_device: Union[int, str, None],
+                  sample_rate: Optional[int] = None, block_size: Optional[int] = None) -> bool:
+        """
+        İstenen ses yapılandırmasını uygula
+        
+        Açık stream'lerin yapılandırmasıyla karşılaştırılır; cihaz, örnekleme
+        hızı veya blok boyutu gerçekten değiştiyse stream'ler tek seferde
+        yeniden açılır. Yeniden açılış sesi keser ve VOX'u kısa süre sağır
+        bırakır, aynı değerlerle çağrı hiçbir şey yapmaz.
+        
+        Returns:
+            Stream'ler yeniden başlatıldıysa True
+        """
+        self.input_device = input_device
+        self.output_device = output_device
+        if sample_rate is not None:
+            self.sample_rate = int(sample_rate)
+        if block_size is not None:
+            self.block_size = int(block_size)
+        
+        if not self.is_monitoring or self._stream_config == self._requested_config():
+            return False
+        print(f"Ses yapılandırması değişti: {self._stream_config} -> {self._requested_config()}")
+        self.restart_monitoring()
+        return True
+    
+    def _requested_config(self) -> Tuple:
+        return (self.input_device, self.output_device, self.sample_rate, self.block_size)
     
     def set_mic_level(self, level: int) -> None:
         self.mic_level = max(0, min(100, level))
@@ -87,9 +166,101 @@ class AudioManager(QObject):
         self.vox_threshold = max(0, min(100, threshold))
         
     def set_loopback(self, active: bool) -> None:
-        """Sesi dışarı vermeyi (loopback) aç/kapat"""
+        """Sesi dışarı vermeyi (loopback) gecikmesiz aç/kapat"""
         # print(f"Loopback durumu değiştiriliyor: {active}")
-        self.loopback_active = active
+        if active:
+            self.begin_tx(0.0)
+        else:
+            self.abort_tx()
+    
+    @property
+    def tx_timeline(self) -> dict:
+        """Son iletimin fazları (Faz adı -> stream zamanı; GUI thread'i için)"""
+        phases = (
+            ('ptt_on', self._t_ptt_on),
+            ('audio_scheduled', self._t_audio_scheduled),
+            ('audio_start', self._t_audio_start),
+            ('release', self._t_release),
+            ('capture_end', self._t_capture_end),
+            ('drained', self._t_drained),
+        )
+        return {name: t for name, t in phases if t is not None}
+    
+    def stream_time(self) -> Optional[float]:
+        """Çıkış stream saati (saniye); stream yoksa None"""
+        try:
+            return self.stream_out.time if self.stream_out else None
+        except Exception:
+            return None
+    
+    def begin_tx(self, lead_time: float) -> Optional[float]:
+        """
+        İletimi başlat: Mikrofon hemen tamponlanır, çıkış ön gecikme sonrası açılır
+        
+        Args:
+            lead_time: PTT'nin oturması için beklenecek süre (saniye)
+        
+        Returns:
+            PTT fazının stream zamanı (stream yoksa None)
+        """
+        now = self.stream_time()
+        self._t_ptt_on = now
+        self._t_audio_scheduled = self._t_audio_start = None
+        self._t_release = self._t_capture_end = self._t_drained = None
+        self._tx_capture_stop = None
+        if self.tx_buffer:
+            self.tx_buffer.reset()
+        
+        if now is not None:
+            self._tx_audio_start = now + max(0.0, min(lead_time, self.MAX_TX_DELAY))
+            self._t_audio_scheduled = self._tx_audio_start
+        
+        self._tx_capture = True
+        self.loopback_active = True
+        return now
+    
+    def end_tx(self, tail_time: float) -> bool:
+        """
+        İletimi kuyruk süresiyle bitir: Mikrofon tail_time kadar daha alınır,
+        tampondaki ses çalınınca tx_drained sinyali gelir
+        
+        Returns:
+            Sinyal beklenecekse True, stream yoksa False (hemen bitirilmeli)
+        """
+        if not self.loopback_active:
+            return False
+        
+        now_in = self._input_time()
+        if now_in is None or self.stream_out is None:
+            self.abort_tx()
+            return False
+        
+        self._t_release = now_in
+        self._tx_capture_stop = now_in + max(0.0, tail_time)
+        return True
+    
+    def resume_tx(self) -> None:
+        """Kuyruk süresindeki iletimi iptal etmeden sürdür"""
+        if self.loopback_active:
+            self._tx_capture_stop = None
+            self._tx_capture = True
+            self._t_release = None
+            self._t_capture_end = None
+    
+    def abort_tx(self) -> None:
+        """İletimi hemen kes (Tampon atılır)"""
+        self._tx_capture = False
+        self._tx_audio_start = None
+        self._tx_capture_stop = None
+        self.loopback_active = False
+        if self.tx_buffer:
+            self.tx_buffer.reset()
+    
+    def _input_time(self) -> Optional[float]:
+        try:
+            return self.stream_in.time if self.stream_in else None
+        except Exception:
+            return None
     
     def restart_monitoring(self):
         """Monitörü yeniden başlat"""
@@ -104,22 +275,18 @@ class AudioManager(QObject):
         try:
             print(f"Ses sistemi başlatılıyor... Giriş: {self.input_device}, Çıkış: {self.output_device}")
             
-            # Kuyruk (Buffer) - Gecikmeyi tolere etmek için
-            self.audio_queue = queue.Queue(maxsize=50) # Buffer arttırıldı
+            # TX tamponu - Ön gecikme + callback zamanlama farkı için
+            slots = int(np.ceil(self.MAX_TX_DELAY * self.sample_rate / self.block_size)) + 8
+            self.tx_buffer = TXAudioBuffer(slots, self.block_size)
             
-            # Cihaz indekslerini doğrula (None ise 'default' kullanır)
-            # Eğer cihaz seçimi hatalı ise varsayılana dön
-            try:
-                sd.query_devices(self.input_device, 'input')
-            except Exception:
-                print(f"Giriş cihazı {self.input_device} geçersiz, varsayılana dönülüyor.")
-                self.input_device = None
-
-            try:
-                sd.query_devices(self.output_device, 'output')
-            except Exception:
-                print(f"Çıkış cihazı {self.output_device} geçersiz, varsayılana dönülüyor.")
-                self.output_device = None
+            # Cihaz anahtarlarını güncel indekslere çevir (None ise 'default' kullanır)
+            # Eğer cihaz bulunamazsa varsayılana dön
+            input_index = self._resolve_device(self.input_device, 'input')
+            output_index = self._resolve_device(self.output_device, 'output')
+            
+            # Stream açıkken PortAudio yeniden taranmasın
+            if self.device_registry:
+                self.device_registry.set_audio_in_use(True)
 
             # --- INPUT STREAM ---
             def input_callback(indata, frames, time, status):
@@ -131,18 +298,18 @@ class AudioManager(QObject):
                 self.current_level = rms * 100 # Update current_level for _check_level
                 self.level_changed.emit(self.current_level) # Emit level directly from callback
                 
-                # 2. Loopback
-                if self.loopback_active:
-                    try:
+                # 2. Loopback (PTT ön gecikmesi boyunca da tamponlanır)
+                if self._tx_capture:
+                    capture_stop = self._tx_capture_stop
+                    if capture_stop is not None and time.inputBufferAdcTime >= capture_stop:
+                        self._tx_capture = False
+                        self._t_capture_end = time.inputBufferAdcTime
+                    else:
                         mic_gain = (self.mic_level / 50.0) * 3.0 if self.mic_level > 0 else 0
-                        processed = indata.copy() * mic_gain
-                        np.clip(processed, -1.0, 1.0, out=processed)
-                        self.audio_queue.put_nowait(processed)
-                    except queue.Full:
-                        pass 
+                        self.tx_buffer.write(indata, mic_gain)
 
             self.stream_in = sd.InputStream(
-                device=self.input_device,
+                device=input_index,
                 channels=1,
                 samplerate=self.sample_rate,
                 blocksize=self.block_size,
@@ -155,18 +322,27 @@ class AudioManager(QObject):
                 if status:
                     print(f"Output Status: {status}")
                     
-                if self.loopback_active:
-                    try:
-                        data = self.audio_queue.get_nowait()
-                        speaker_gain = (self.speaker_level / 50.0) * 1.5 if self.speaker_level > 0 else 0
-                        outdata[:] = data * speaker_gain
-                    except queue.Empty:
-                        outdata.fill(0)
-                else:
+                audio_start = self._tx_audio_start
+                if audio_start is None or time.outputBufferDacTime < audio_start:
+                    # İletim yok veya PTT henüz oturmadı
                     outdata.fill(0)
+                    return
+                
+                speaker_gain = (self.speaker_level / 50.0) * 1.5 if self.speaker_level > 0 else 0
+                if self.tx_buffer.read(outdata, speaker_gain):
+                    if self._t_audio_start is None:
+                        self._t_audio_start = time.outputBufferDacTime
+                    return
+                
+                outdata.fill(0)
+                # Kayıt bitti ve tampon boşaldı -> Kuyruk tamamlandı
+                if not self._tx_capture and self._tx_capture_stop is not None:
+                    self._tx_audio_start = None
+                    self._t_drained = time.outputBufferDacTime
+                    self.tx_drained.emit(time.outputBufferDacTime)
 
             self.stream_out = sd.OutputStream(
-                device=self.output_device,
+                device=output_index,
                 channels=1,
                 samplerate=self.sample_rate,
                 blocksize=self.block_size,
@@ -179,6 +355,8 @@ class AudioManager(QObject):
             self.stream_out.start()
             
             self.is_monitoring = True # Changed from is_running to is_monitoring for consistency
+            self._stream_config = self._requested_config()
+            self._stream_indices = (input_index, output_index)
             self.level_timer.start(100) # Keep timer for VOX threshold check
             print("Ses sistemi (Dual Stream) aktif.")
             
@@ -190,6 +368,8 @@ class AudioManager(QObject):
         """Ses akışını durdur"""
         self.level_timer.stop()
         self.is_monitoring = False
+        self._stream_config = None
+        self._stream_indices = None
         
         if self.stream_in:
             try:
@@ -206,24 +386,51 @@ class AudioManager(QObject):
             except Exception:
                 pass
             self.stream_out = None
-            
-        # Kuyruğu temizle (opsiyonel ama iyi olur)
-        if hasattr(self, 'audio_queue'):
-            while not self.audio_queue.empty():
-                try:
-                    self.audio_queue.get_nowait()
-                except:
-                    pass
+        
+        if self.device_registry:
+            self.device_registry.set_audio_in_use(False)
+        
+        # Bekleyen kuyruk varsa iletim sahibine bildir (Yoksa PTT açık kalır)
+        was_releasing = self.loopback_active and self._tx_capture_stop is not None
+        self.abort_tx()
+        if was_releasing:
+            self.tx_drained.emit(-1.0)
     
+    def _on_devices_changed(self, input_devices: list, output_devices: list) -> None:
+        """Cihaz listesi geldi/değişti: Seçili cihaz başka indekse çözümleniyorsa bir kez yeniden aç"""
+        if not self.is_monitoring or self._stream_indices is None:
+            return
+        resolved = (self._resolve_device(self.input_device, 'input'),
+                    self._resolve_device(self.output_device, 'output'))
+        if resolved != self._stream_indices:
+            print(f"Ses cihazları çözümlendi: {self._stream_indices} -> {resolved}")
+            self.restart_monitoring()
+    
+    def _resolve_device(self, device: Union[int, str, None], kind: str) -> Optional[int]:
+        """Ayarlardaki cihazı stream için PortAudio indeksine çevir"""
+        if device is None:
+            return None
+        
+        if self.device_registry:
+            return self.device_registry.resolve_audio_device(device, kind)
+        
+        # Registry yoksa doğrudan sorgula
+        try:
+            return sd.query_devices(device, kind)['index']
+        except Exception:
+            print(f"{kind} cihazı {device} geçersiz, varsayılana dönülüyor.")
+            return None
+
     def _check_level(self) -> None:
         """Timer ile periyodik seviye kontrolü"""
         # Sinyal gönder
         self.level_changed.emit(self.current_level)
         
         # VOX eşiği kontrolü
-        # Loopback açıkken (PTT basılıyken) VOX tetiklemeye gerek yok
-        if not self.loopback_active and self.current_level > (self.vox_threshold * 1.2): 
-             self.threshold_exceeded.emit()
+        # İletim sürerken de gönderilir: VOX bekleme süresini uzatır, kuyruk
+        # süresinde yeniden konuşulursa iletimi sürdürür
+        if self.current_level > (self.vox_threshold * 1.2):
+            self.threshold_exceeded.emit()
 
     def play_tone(self, frequency: float = 1000.0, duration: float = 0.5) -> None:
         """Test tonu çal"""
@@ -5,6 +5,7 @@ import serial
 import serial.tools.list_ports
 from typing import Optional, List
 from PyQt6.QtCore import QObject, pyqtSignal
+from .tx_governor import TXGovernor
 
 
 class RadioConnection(QObject):
@@ -15,17 +16,34 @@ class RadioConnection(QObject):
     disconnected = pyqtSignal()
     error = pyqtSignal(str)
     data_received = pyqtSignal(bytes)
+    tx_timeout = pyqtSignal(str)  # İletim TOT nedeniyle zorla kesildi
     
-    def __init__(self):
+    def __init__(self, tx_governor: Optional[TXGovernor] = None):
         super().__init__()
         self.serial_port: Optional[serial.Serial] = None
         self.is_connected = False
         self.connection_type = "COM"  # COM veya AUX
+        
+        # İletim süresi denetimi (TOT / görev döngüsü)
+        self.tx_governor = tx_governor
+        if self.tx_governor:
+            self.tx_governor.tx_timeout.connect(self._on_tx_timeout)
+    
+    def can_transmit(self) -> bool:
+        """İletime izin var mı? (TOT soğuma süresinde ve görev döngüsü sınırında değilse)"""
+        return self.tx_governor is None or self.tx_governor.can_transmit()
+    
+    def _on_tx_timeout(self, reason: str) -> None:
+        """TOT doldu: PTT'yi zorla bırak ve dinleyenlere bildir"""
+        self.ptt_off()
+        self.tx_timeout.emit(reason)
     
     @staticmethod
     def get_available_ports() -> List[str]:
         """
-        Mevcut COM portlarını listele
+        Mevcut COM portlarını listele (Engelleyici)
+        
+        GUI tarafında DeviceRegistry önbelleği tercih edilmelidir.
         
         Returns:
             Port isimlerinin listesi
@@ -135,6 +153,11 @@ class RadioConnection(QObject):
         Returns:
             Başarılı ise True
         """
+        # TOT kilidi ve görev döngüsü (AUX modunda da iletim sayılır, bu yüzden bağlantıdan önce)
+        if self.tx_governor and not self.tx_governor.key_down():
+            self.error.emit(f"İletim kilitli: {self.tx_governor.refusal_reason()}")
+            return False
+        
         # DTR veya RTS pinini kullanarak PTT kontrolü
         if not self.is_connected or not self.serial_port:
             return False
@@ -153,6 +176,9 @@ class RadioConnection(QObject):
         Returns:
             Başarılı ise True
         """
+        if self.tx_governor:
+            self.tx_governor.key_up()
+        
         if not self.is_connected or not self.serial_port:
             return False
         
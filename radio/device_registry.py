@@ -0,0 +1,294 @@
+"""
+Cihaz kayıt servisi - Ses cihazları ve COM portları için önbellekli listeleme
+
+Cihaz listeleri arka plan thread'inde çıkarılır, önbellekte tutulur ve
+periyodik tarama ile takılıp çıkarılan (hot-plug) cihazlar algılanır.
+Ses cihazları açılıştan açılışa değişen indeks yerine "host API + isim"
+anahtarıyla tanımlanır.
+"""
+import threading
+import sounddevice as sd
+import serial.tools.list_ports
+from typing import Optional, List, Dict, Tuple, Union
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+
+def make_device_key(hostapi: str, name: str, ordinal: int = 0) -> str:
+    """
+    Kalıcı cihaz anahtarı oluştur
+
+    Args:
+        hostapi: Host API adı (örn: "Windows WASAPI")
+        name: Cihaz adı
+        ordinal: Aynı isimli birden fazla cihaz varsa sıra numarası
+
+    Returns:
+        "host API: isim" biçiminde anahtar
+    """
+    key = f"{hostapi}: {name}"
+    if ordinal > 0:
+        key += f" #{ordinal + 1}"
+    return key
+
+
+def reinitialize_portaudio() -> bool:
+    """
+    PortAudio'yu yeniden başlat (Yeni takılan cihazlar listeye girsin)
+
+    PortAudio cihaz listesini sadece başlatılırken okur ve sounddevice'ın
+    bunun için açık bir API'si yoktur; modülün iç fonksiyonları kullanılır.
+    Sürümde bulunmazlarsa yeniden tarama yapılmaz (Hot-plug algılanmaz,
+    liste yine okunur).
+
+    Returns:
+        Yeniden başlatıldıysa True
+    """
+    terminate = getattr(sd, '_terminate', None)
+    initialize = getattr(sd, '_initialize', None)
+    if not (callable(terminate) and callable(initialize)):
+        return False
+    terminate()
+    initialize()
+    return True
+
+
+def enumerate_audio_devices(reinitialize: bool = False) -> Tuple[List[dict], List[dict]]:
+    """
+    Ses cihazlarını listele (Engelleyici - GUI thread'inden çağırmayın)
+
+    Args:
+        reinitialize: PortAudio'yu yeniden başlatıp yeni takılan cihazları da gör.
+                      Açık stream varken kullanılmamalıdır.
+
+    Returns:
+        (giriş cihazları, çıkış cihazları)
+    """
+    if reinitialize:
+        reinitialize_portaudio()
+
+    devices = sd.query_devices()
+    hostapis = sd.query_hostapis()
+
+    input_devices = []
+    output_devices = []
+    seen: Dict[str, int] = {}
+
+    for i, device in enumerate(devices):
+        hostapi = hostapis[device['hostapi']]['name']
+        base_key = make_device_key(hostapi, device['name'])
+        ordinal = seen.get(base_key, 0)
+        seen[base_key] = ordinal + 1
+
+        device_info = {
+            'id': i,
+            'key': make_device_key(hostapi, device['name'], ordinal),
+            'name': device['name'],
+            'hostapi': hostapi,
+            'channels': device['max_input_channels'] if device['max_input_channels'] > 0
+                       else device['max_output_channels']
+        }
+
+        if device['max_input_channels'] > 0:
+            input_devices.append(device_info)
+        if device['max_output_channels'] > 0:
+            output_devices.append(device_info)
+
+    return input_devices, output_devices
+
+
+def enumerate_serial_ports() -> List[str]:
+    """COM portlarını listele (Engelleyici - GUI thread'inden çağırmayın)"""
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+class DeviceRegistry(QObject):
+    """Ses ve seri port cihazlarının önbellekli kaydı"""
+
+    # Sinyaller
+    audio_devices_changed = pyqtSignal(list, list)  # giriş, çıkış
+    ports_changed = pyqtSignal(list)
+    # Worker thread -> GUI thread aktarımı için
+    _scan_finished = pyqtSignal(object, object)
+
+    def __init__(self, poll_interval: int = 5):
+        super().__init__()
+        self.input_devices: List[dict] = []
+        self.output_devices: List[dict] = []
+        self.ports: List[str] = []
+        self._ports_signature: Optional[Tuple] = None
+        self._input_signature: Optional[Tuple] = None
+        self._output_signature: Optional[Tuple] = None
+
+        self.poll_interval = poll_interval  # Hot-plug tarama aralığı (saniye)
+        self.audio_loaded = False
+        self.ports_loaded = False
+
+        # Açık ses stream'i varken PortAudio yeniden başlatılamaz
+        self._audio_in_use = False
+        self._audio_lock = threading.Lock()
+
+        self._scan_thread: Optional[threading.Thread] = None
+        self._loaded_event = threading.Event()
+        self._scan_finished.connect(self._on_scan_finished)
+
+        self.poll_timer = QTimer()
+        self.poll_timer.timeout.connect(self.refresh)
+        self._running = False  # start() çağrıldı, stop() henüz çağrılmadı
+
+    def start(self) -> None:
+        """İlk taramayı başlat ve hot-plug izlemesini aç"""
+        self._running = True
+        self.refresh()
+        if self.poll_interval > 0 and not self.poll_timer.isActive():
+            self.poll_timer.start(self.poll_interval * 1000)
+
+    def stop(self) -> None:
+        """Hot-plug izlemesini durdur"""
+        self._running = False
+        self.poll_timer.stop()
+
+    def set_poll_interval(self, seconds: int) -> None:
+        """Tarama aralığını ayarla (0 = sadece manuel yenileme)"""
+        seconds = max(0, seconds)
+        if seconds == self.poll_interval:
+            return  # Süren taramanın zamanlaması bozulmasın
+        self.poll_interval = seconds
+        if self._running:
+            if self.poll_interval > 0:
+                self.poll_timer.start(self.poll_interval * 1000)
+            else:
+                self.poll_timer.stop()
+
+    def set_audio_in_use(self, in_use: bool) -> None:
+        """AudioManager stream açarken/kapatırken bildirir"""
+        with self._audio_lock:
+            self._audio_in_use = in_use
+
+    def refresh(self) -> None:
+        """Arka planda yeniden tara (Önceki tarama sürüyorsa atlanır)"""
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            return
+
+        self._scan_thread = threading.Thread(target=self._scan_worker, daemon=True)
+        self._scan_thread.start()
+
+    def wait_until_loaded(self, timeout: float = 5.0) -> bool:
+        """İlk tarama bitene kadar bekle (Engelleyici - GUI thread'inden çağırmayın)"""
+        if self.audio_loaded and self.ports_loaded:
+            return True
+        if self._scan_thread is None:
+            self.refresh()
+        return self._loaded_event.wait(timeout)
+
+    def _scan_worker(self) -> None:
+        """Worker thread: Cihazları tara"""
+        audio = None
+        ports = None
+
+        if not self.audio_loaded:
+            # İlk tarama PortAudio'yu yeniden başlatmaz; kilit tutulmaz, açılan
+            # stream taramayı beklemez
+            audio = self._enumerate_audio(reinitialize=False)
+        else:
+            with self._audio_lock:
+                # Sonraki taramalar sadece stream kapalıyken
+                if not self._audio_in_use:
+                    audio = self._enumerate_audio(reinitialize=True)
+
+        try:
+            ports = enumerate_serial_ports()
+        except Exception as e:
+            print(f"COM port listeleme hatası: {e}")
+            if not self.ports_loaded:
+                ports = []
+
+        # İlk taramayı bekleyen çözümleyicileri hemen serbest bırak
+        if audio is not None:
+            self.input_devices, self.output_devices = audio
+            self.audio_loaded = True
+        if ports is not None:
+            self.ports = ports
+            self.ports_loaded = True
+        if self.audio_loaded and self.ports_loaded:
+            self._loaded_event.set()
+
+        self._scan_finished.emit(audio, ports)
+
+    def _enumerate_audio(self, reinitialize: bool) -> Optional[Tuple[List[dict], List[dict]]]:
+        try:
+            return enumerate_audio_devices(reinitialize=reinitialize)
+        except Exception as e:
+            print(f"Cihaz listeleme hatası: {e}")
+            return None if self.audio_loaded else ([], [])
+
+    def _on_scan_finished(self, audio, ports) -> None:
+        """GUI thread: Değişiklik varsa sinyal gönder"""
+        if ports is not None and tuple(ports) != self._ports_signature:
+            self._ports_signature = tuple(ports)
+            self.ports_changed.emit(list(ports))
+
+        if audio is not None:
+            input_devices, output_devices = audio
+            input_signature = self._signature(input_devices)
+            output_signature = self._signature(output_devices)
+            if (input_signature != self._input_signature or
+                    output_signature != self._output_signature):
+                self._input_signature = input_signature
+                self._output_signature = output_signature
+                self.audio_devices_changed.emit(list(input_devices), list(output_devices))
+
+    @staticmethod
+    def _signature(devices: List[dict]) -> Tuple:
+        return tuple((d['id'], d['key']) for d in devices)
+
+    def get_audio_devices(self) -> Tuple[List[dict], List[dict]]:
+        """Önbellekteki ses cihazları (Engellemez)"""
+        return list(self.input_devices), list(self.output_devices)
+
+    def get_ports(self) -> List[str]:
+        """Önbellekteki COM portları (Engellemez)"""
+        return list(self.ports)
+
+    def find_device(self, device: Union[int, str, None], kind: str) -> Optional[dict]:
+        """
+        Ayarlarda saklanan cihazı önbellekte bul
+
+        Args:
+            device: Cihaz anahtarı (str) veya eski ayarlardan kalan indeks (int)
+            kind: 'input' veya 'output'
+
+        Returns:
+            Cihaz bilgisi veya None
+        """
+        if device is None:
+            return None
+
+        devices = self.input_devices if kind == 'input' else self.output_devices
+        for info in devices:
+            if isinstance(device, str) and info['key'] == device:
+                return info
+            if isinstance(device, int) and info['id'] == device:
+                return info
+        return None
+
+    def resolve_audio_device(self, device: Union[int, str, None], kind: str) -> Optional[int]:
+        """
+        Kalıcı cihaz anahtarını güncel PortAudio indeksine çevir (Engellemez)
+
+        Args:
+            device: Cihaz anahtarı veya indeks (None = varsayılan cihaz)
+            kind: 'input' veya 'output'
+
+        Returns:
+            Güncel indeks; cihaz bulunamazsa veya ilk tarama henüz bitmediyse
+            None (varsayılan cihaz, liste gelince audio_devices_changed ile
+            yeniden çözümlenmeli)
+        """
+        if device is None or not self.audio_loaded:
+            return None
+
+        info = self.find_device(device, kind)
+        if info is None:
+            print(f"{kind} cihazı '{device}' bulunamadı, varsayılana dönülüyor.")
+            return None
+        return info['id']
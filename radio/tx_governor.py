@@ -0,0 +1,218 @@
+"""
+TX denetleyicisi - İletim zaman aşımı (TOT) ve görev döngüsü takibi
+"""
+import time
+from collections import deque
+from typing import Optional, Deque, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+
+class TXGovernor(QObject):
+    """
+    İletim süresini sınırlayan sınıf
+
+    Her iletimin süresini ve kayan penceredeki görev döngüsünü (duty cycle)
+    takip eder. TOT dolarsa veya görev döngüsü sınırı aşılırsa iletim zorla
+    kesilir ve soğuma süresi boyunca yeni iletime izin verilmez.
+    """
+
+    # Sinyaller
+    tx_timeout = pyqtSignal(str)        # İletim zorla kesilmeli (sebep)
+    lockout_changed = pyqtSignal(bool)  # Soğuma kilidi açıldı/kapandı
+    stats_updated = pyqtSignal(dict)    # Sayaçlar (UI ve log için)
+
+    def __init__(self, timeout: int = 180, lockout: int = 30,
+                 duty_window: int = 600, max_duty_cycle: int = 0):
+        super().__init__()
+        self.timeout = timeout                # TOT (saniye, 0 = kapalı)
+        self.lockout = lockout                # Soğuma süresi (saniye)
+        self.duty_window = duty_window        # Görev döngüsü penceresi (saniye)
+        self.max_duty_cycle = max_duty_cycle  # Yüzde (0 = sınırsız)
+
+        self.is_keyed = False
+        self.key_down_time: Optional[float] = None
+        self.lockout_until: Optional[float] = None
+
+        # Sayaçlar
+        self.tx_count = 0
+        self.timeout_count = 0
+        self.total_tx_time = 0.0
+        self.last_tx_duration = 0.0
+
+        # Pencere içindeki iletimler (başlangıç, bitiş)
+        self._history: Deque[Tuple[float, float]] = deque()
+
+        # TOT timer'ı
+        self.tot_timer = QTimer()
+        self.tot_timer.setSingleShot(True)
+        self.tot_timer.timeout.connect(lambda: self._force_unkey("TOT"))
+
+        # Soğuma timer'ı
+        self.lockout_timer = QTimer()
+        self.lockout_timer.setSingleShot(True)
+        self.lockout_timer.timeout.connect(self._end_lockout)
+
+        # İletim/kilit sırasında sayaçları periyodik yayınla (Görev döngüsü de denetlenir)
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self._on_tick)
+
+    def configure(self, timeout: int, lockout: int, duty_window: int, max_duty_cycle: int) -> None:
+        """Sınırları güncelle (Süren iletim yeni TOT'a göre devam eder)"""
+        self.timeout = max(0, timeout)
+        self.lockout = max(0, lockout)
+        self.duty_window = max(60, duty_window)
+        self.max_duty_cycle = max(0, min(100, max_duty_cycle))
+
+        if self.is_keyed:
+            self.tot_timer.stop()
+            if self.timeout > 0:
+                remaining = self.timeout - (time.monotonic() - self.key_down_time)
+                self.tot_timer.start(max(0, int(remaining * 1000)))
+
+    @property
+    def is_locked(self) -> bool:
+        return self.lockout_until is not None
+
+    def lockout_remaining(self) -> float:
+        if self.lockout_until is None:
+            return 0.0
+        return max(0.0, self.lockout_until - time.monotonic())
+
+    def duty_exceeded(self) -> bool:
+        """Kayan penceredeki görev döngüsü sınıra ulaştı mı?"""
+        return self.max_duty_cycle > 0 and self.duty_cycle() >= self.max_duty_cycle
+
+    def can_transmit(self) -> bool:
+        """Yeni iletime izin var mı? (Soğuma süresi yok ve görev döngüsü sınırın altında)"""
+        return not self.is_locked and not self.duty_exceeded()
+
+    def refusal_reason(self) -> str:
+        """İletime neden izin verilmediği (Kullanıcıya gösterilir)"""
+        if self.is_locked:
+            return f"{self.lockout_remaining():.0f} sn soğuma süresi"
+        return f"görev döngüsü %{self.duty_cycle():.1f} (Sınır %{self.max_duty_cycle})"
+
+    def key_down(self) -> bool:
+        """
+        İletim başlıyor
+
+        Returns:
+            İletime izin varsa True (Soğuma süresinde veya görev döngüsü
+            sınırındaysa False)
+        """
+        if self.is_locked:
+            return False
+        if self.is_keyed:
+            return True
+        if self.duty_exceeded():
+            return False
+
+        self.is_keyed = True
+        self.key_down_time = time.monotonic()
+        self.tx_count += 1
+
+        if self.timeout > 0:
+            self.tot_timer.start(self.timeout * 1000)
+        self.stats_timer.start(1000)
+        self._publish_stats()
+        return True
+
+    def key_up(self) -> None:
+        """İletim bitti"""
+        if not self.is_keyed:
+            return
+
+        now = time.monotonic()
+        self.tot_timer.stop()
+        self.is_keyed = False
+
+        self.last_tx_duration = now - self.key_down_time
+        self.total_tx_time += self.last_tx_duration
+        self._history.append((self.key_down_time, now))
+        self.key_down_time = None
+
+        duty = self.duty_cycle()
+        print(f"[TX] İletim süresi {self.last_tx_duration:.1f} sn, "
+              f"görev döngüsü %{duty:.1f} (son {self.duty_window // 60} dk)")
+
+        if self.max_duty_cycle > 0 and duty >= self.max_duty_cycle and not self.is_locked:
+            print(f"[TX] Görev döngüsü sınırı aşıldı (%{self.max_duty_cycle})")
+            self._start_lockout()
+
+        if not self.is_locked:
+            self.stats_timer.stop()
+        self._publish_stats()
+
+    def duty_cycle(self) -> float:
+        """Kayan pencerede vericinin açık kaldığı süre yüzdesi"""
+        now = time.monotonic()
+        window_start = now - self.duty_window
+
+        # Pencere dışına çıkan iletimleri at
+        while self._history and self._history[0][1] < window_start:
+            self._history.popleft()
+
+        keyed = sum(end - max(start, window_start) for start, end in self._history)
+        if self.is_keyed:
+            keyed += now - max(self.key_down_time, window_start)
+
+        return 100.0 * keyed / self.duty_window
+
+    def get_stats(self) -> dict:
+        """Sayaçların anlık görüntüsü"""
+        current = time.monotonic() - self.key_down_time if self.is_keyed else 0.0
+        return {
+            'keyed': self.is_keyed,
+            'current_tx_time': round(current, 1),
+            'last_tx_time': round(self.last_tx_duration, 1),
+            'total_tx_time': round(self.total_tx_time, 1),
+            'tx_count': self.tx_count,
+            'timeout_count': self.timeout_count,
+            'duty_cycle': round(self.duty_cycle(), 1),
+            'locked': self.is_locked,
+            'lockout_remaining': round(self.lockout_remaining(), 1),
+            'timeout': self.timeout,
+        }
+
+    def _force_unkey(self, reason: str, detail: Optional[str] = None) -> None:
+        """TOT doldu veya görev döngüsü aşıldı: İletimi kes ve kilitle"""
+        if not self.is_keyed:
+            return
+
+        self.timeout_count += 1
+        if detail is None:
+            detail = f"{self.timeout} sn doldu"
+        print(f"[TX] {reason}: {detail}, iletim zorla kesiliyor")
+
+        # Kilit önce kurulur ki sinyali dinleyenler yeniden PTT açamasın
+        self._start_lockout()
+        self.tx_timeout.emit(reason)
+        # Dinleyen yoksa veya PTT kapatılmadıysa sayaç yine de kapansın
+        self.key_up()
+
+    def _start_lockout(self) -> None:
+        if self.lockout <= 0:
+            return
+        self.lockout_until = time.monotonic() + self.lockout
+        self.lockout_timer.start(self.lockout * 1000)
+        self.stats_timer.start(1000)
+        print(f"[TX] {self.lockout} sn soğuma süresi başladı")
+        self.lockout_changed.emit(True)
+
+    def _end_lockout(self) -> None:
+        self.lockout_until = None
+        if not self.is_keyed:
+            self.stats_timer.stop()
+        print("[TX] Soğuma süresi bitti")
+        self.lockout_changed.emit(False)
+        self._publish_stats()
+
+    def _on_tick(self) -> None:
+        """Saniyelik: İletim sürerken görev döngüsü sınırı aşılırsa kes"""
+        if self.is_keyed and self.duty_exceeded():
+            self._force_unkey("Görev döngüsü", f"%{self.duty_cycle():.1f} (Sınır %{self.max_duty_cycle})")
+            return  # key_up sayaçları zaten yayınladı
+        self._publish_stats()
+
+    def _publish_stats(self) -> None:
+        self.stats_updated.emit(self.get_stats())
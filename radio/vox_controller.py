@@ -20,15 +20,25 @@ class VOXController(QObject):
         
         self.vox_enabled = False
         self.is_transmitting = False
+        self.is_releasing = False  # Kuyruk (tail) süresinde mi?
         self.hold_time = 1000  # Gecikme süresi (ms)
+        self.lead_time = 150   # PTT sonrası sesin başlayacağı süre (ms)
+        self.tail_time = 300   # Bırakınca sesin devam edeceği süre (ms)
         
         # Gecikme timer'ı
         self.release_timer = QTimer()
         self.release_timer.setSingleShot(True)
         self.release_timer.timeout.connect(self._release_ptt)
         
+        # Stream sinyali gelmezse (cihaz takıldı vb.) PTT'yi yine de bırak
+        self.tail_guard_timer = QTimer()
+        self.tail_guard_timer.setSingleShot(True)
+        self.tail_guard_timer.timeout.connect(self._finish_transmission)
+        
         # Ses seviyesi bağlantısı
         self.audio_manager.threshold_exceeded.connect(self._on_threshold_exceeded)
+        self.audio_manager.tx_drained.connect(self._finish_transmission)
+        self.radio_connection.tx_timeout.connect(self.abort_transmission)
     
     def enable_vox(self) -> None:
         """VOX'u etkinleştir"""
@@ -37,14 +47,39 @@ class VOXController(QObject):
             if not self.audio_manager.is_monitoring:
                 self.audio_manager.start_monitoring()
     
-    def disable_vox(self) -> None:
-        """VOX'u devre dışı bırak"""
+    def disable_vox(self, keep_ptt: bool = False) -> None:
+        """
+        VOX'u devre dışı bırak
+        
+        Args:
+            keep_ptt: Süren iletimin PTT'si bırakılmaz (Anons iletimi devralır);
+                      sadece VOX sesi kesilir. False ise kuyruk süresiyle bırakılır.
+        """
         self.vox_enabled = False
-        self._release_ptt()
+        if not keep_ptt:
+            self._release_ptt()
+            return
+        
+        self.release_timer.stop()
+        self.tail_guard_timer.stop()
+        self.audio_manager.abort_tx()
+        if self.is_transmitting:
+            self.is_transmitting = False
+            self.is_releasing = False
+            self.vox_released.emit()
     
     def set_hold_time(self, milliseconds: int) -> None:
         self.hold_time = max(100, min(5000, milliseconds))
     
+    def set_lead_time(self, milliseconds: int) -> None:
+        """PTT ön gecikmesi (Telsizin vericiyi açma süresi)"""
+        max_lead = int(self.audio_manager.MAX_TX_DELAY * 1000)
+        self.lead_time = max(0, min(max_lead, milliseconds))
+    
+    def set_tail_time(self, milliseconds: int) -> None:
+        """PTT kuyruk süresi (Son hecenin kesilmemesi için)"""
+        self.tail_time = max(0, min(2000, milliseconds))
+    
     def _on_threshold_exceeded(self) -> None:
         """Eşik değeri aşıldığında PTT ve Loopback aktif et"""
         if not self.vox_enabled:
@@ -52,6 +87,7 @@ class VOXController(QObject):
             
         # Zaten iletişimdeysek süreyi uzat
         if self.is_transmitting:
+            self._cancel_release()
             self.release_timer.stop()
             self.release_timer.start(self.hold_time)
             return
@@ -61,34 +97,90 @@ class VOXController(QObject):
         self.release_timer.start(self.hold_time)
     
     def _start_transmission(self):
-        """İletimi başlat (PTT + Loopback)"""
+        """İletimi başlat (PTT + Gecikmeli Loopback)"""
+        # TOT soğuma süresinde ses de verilmez
+        if not self.radio_connection.can_transmit():
+            return
+        
         self.is_transmitting = True
+        self.is_releasing = False
         
         # 1. COM Port PTT (varsa)
         self.radio_connection.ptt_on()
         
-        # 2. Audio Loopback (Sesi çıkışa ver)
-        self.audio_manager.set_loopback(True)
+        # 2. Audio Loopback: Mikrofon hemen tamponlanır, çıkış lead_time sonra açılır
+        self.audio_manager.begin_tx(self.lead_time / 1000.0)
         
         self.vox_triggered.emit()
     
     def _release_ptt(self) -> None:
-        """İletimi durdur"""
+        """İletimi kuyruk süresiyle durdur (PTT tampon boşalınca kapanır)"""
+        if not self.is_transmitting or self.is_releasing:
+            return
+        
+        self.is_releasing = True
+        if self.audio_manager.end_tx(self.tail_time / 1000.0):
+            # Kuyruk + tampondaki ön gecikme kadar bekle, üstüne pay bırak
+            guard = self.tail_time + self.lead_time + 500
+            self.tail_guard_timer.start(guard)
+        else:
+            self._finish_transmission()
+    
+    def _cancel_release(self) -> None:
+        """Kuyruk süresindeyken yeniden konuşulursa iletimi sürdür"""
+        if self.is_releasing:
+            self.tail_guard_timer.stop()
+            self.audio_manager.resume_tx()
+            self.is_releasing = False
+    
+    def _finish_transmission(self, *args) -> None:
+        """Tampon boşaldı: PTT'yi bırak"""
+        if not self.is_transmitting:
+            return
+        
+        self.tail_guard_timer.stop()
+        
+        # 1. COM Port PTT kapa
+        self.radio_connection.ptt_off()
+        
+        # 2. Audio Loopback kapa (Kuyruk sinyali gelmediyse zorla)
+        self.audio_manager.abort_tx()
+        self._log_timeline()
+        
+        self.is_transmitting = False
+        self.is_releasing = False
+        self.vox_released.emit()
+    
+    def abort_transmission(self, *args) -> None:
+        """TOT: Kuyruk beklemeden iletimi kes"""
+        self.release_timer.stop()
+        self.tail_guard_timer.stop()
+        self.audio_manager.abort_tx()
+        
         if self.is_transmitting:
-            # 1. COM Port PTT kapa
             self.radio_connection.ptt_off()
-            
-            # 2. Audio Loopback kapa
-            self.audio_manager.set_loopback(False)
-            
             self.is_transmitting = False
+            self.is_releasing = False
             self.vox_released.emit()
     
+    def _log_timeline(self) -> None:
+        """İletim fazlarını stream saatine göre logla"""
+        timeline = self.audio_manager.tx_timeline
+        start = timeline.get('ptt_on')
+        if start is None:
+            return
+        phases = ", ".join(
+            f"{name}=+{(t - start) * 1000:.0f}ms"
+            for name, t in timeline.items() if name != 'ptt_on' and t is not None
+        )
+        print(f"[TX] {phases}")
+    
     def manual_ptt(self, active: bool) -> None:
         """Manuel PTT kontrolü"""
         if active:
             # Timer'ı durdur (elle basılı tutuluyor)
             self.release_timer.stop()
+            self._cancel_release()
             if not self.is_transmitting:
                 self._start_transmission()
         else:
@@ -0,0 +1,403 @@
+"""
+HTTP / WebSocket API - İstasyonu ağ üzerinden yönetmek ve izlemek için
+
+Uç noktalar:
+    GET  /api/status      İstasyon durumu
+    GET  /api/telemetry   Son telemetri (Ses seviyesi, TX durumu)
+    POST /api/command     {"command": "vox on"}  (Kontrol soketi komutları)
+    POST /api/announce    {"text": "Merhaba"}
+    POST /api/vox         {"enabled": true}
+    POST /api/ptt         {"active": true}
+    GET  /ws              WebSocket: Telemetri akışı + metin komutları
+
+Sunucu asyncio ile ayrı bir thread'de çalışır. Komutlar sinyal ile ana
+thread'e aktarılır; telemetri ana thread'de belirli hızda bir kez
+kodlanır ve tüm istemcilere aynı çerçeve gönderilir.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Set, Tuple, Deque
+from urllib.parse import urlsplit, parse_qs
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from services.control_socket import execute_command, future_reply
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+MAX_BODY = 64 * 1024     # İstek gövdesi / WebSocket çerçevesi sınırı
+COMMAND_TIMEOUT = 5.0    # Ana thread'in komutu yanıtlama süresi (saniye)
+HEADER_TIMEOUT = 10.0
+
+HTTP_STATUS = {
+    200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 504: "Gateway Timeout",
+}
+
+
+def ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """Sunucudan istemciye WebSocket çerçevesi (Maskesiz, tek parça)"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def ws_read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """İstemciden bir WebSocket çerçevesi oku (opcode, veri)"""
+    head = await reader.readexactly(2)
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > MAX_BODY:
+        raise ValueError("WebSocket çerçevesi çok büyük")
+
+    mask = await reader.readexactly(4) if masked else b""
+    data = await reader.readexactly(length)
+    if masked and length:
+        # Baytları tek tek XOR'lamak yerine tek bir büyük tamsayı ile
+        key = (mask * (length // 4 + 1))[:length]
+        data = (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+    return opcode, data
+
+
+class _WSClient:
+    """Bağlı WebSocket istemcisi (Sadece API thread'inden kullanılır)"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        # Yavaş istemci ara kareleri kaçırır, sadece en sonuncusu bekler
+        self.frame: Optional[bytes] = None
+        # Komut yanıtları atlanmaz
+        self.replies: Deque[bytes] = deque()
+        self.wakeup = asyncio.Event()
+
+    def send(self, data: bytes) -> None:
+        self.replies.append(data)
+        self.wakeup.set()
+
+
+class ApiServer(QObject):
+    """Gömülü HTTP + WebSocket sunucusu"""
+
+    # API thread'i -> ana thread (komut, Future)
+    _command_requested = pyqtSignal(str, object)
+
+    def __init__(self, station, host: str = "127.0.0.1", port: int = 8765,
+                 token: str = "", telemetry_hz: float = 5):
+        super().__init__()
+        self.station = station
+        self.host = host
+        self.port = port
+        self.token = token
+        self.telemetry_hz = telemetry_hz
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._clients: Set[_WSClient] = set()
+        self._client_count = 0
+
+        # Son telemetri (Ana thread yazar, API thread'i okur)
+        self._last_telemetry: Optional[dict] = None
+        self._last_payload: bytes = b"{}"
+        self._last_frame: Optional[bytes] = None
+
+        self._command_requested.connect(self._on_command_requested)
+
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.timeout.connect(self._publish_telemetry)
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None
+
+    def configure(self, host: str, port: int, token: str = "", telemetry_hz: float = 5) -> None:
+        """Ayarları güncelle (Adres değiştiyse çalışan sunucu yeniden başlar)"""
+        restart = self.is_running and (host, port) != (self.host, self.port)
+        self.host = host
+        self.port = port
+        self.token = token or ""
+        self.telemetry_hz = max(0.5, min(50.0, float(telemetry_hz)))
+
+        if restart:
+            self.stop()
+            self.start()
+        elif self.is_running:
+            self.telemetry_timer.setInterval(int(1000 / self.telemetry_hz))
+
+    def start(self) -> bool:
+        """Sunucuyu arka plan thread'inde başlat"""
+        if self.is_running:
+            return True
+
+        ready = threading.Event()
+        result = {}
+        self._thread = threading.Thread(target=self._run_loop, args=(ready, result), daemon=True)
+        self._thread.start()
+        ready.wait(5)
+
+        if 'error' in result:
+            print(f"[API] Sunucu başlatılamadı ({self.host}:{self.port}): {result['error']}")
+            self._thread = None
+            return False
+
+        self.telemetry_timer.start(int(1000 / self.telemetry_hz))
+        return True
+
+    def stop(self) -> None:
+        """Sunucuyu durdur ve tüm bağlantıları kapat"""
+        self.telemetry_timer.stop()
+        loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        print("[API] Sunucu durduruldu")
+
+    def _run_loop(self, ready: threading.Event, result: dict) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port))
+        except OSError as e:
+            result['error'] = e
+            loop.close()
+            ready.set()
+            return
+
+        self._loop = loop
+        ready.set()
+        print(f"[API] Dinleniyor: http://{self.host}:{self.port}")
+
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._clients.clear()
+            self._client_count = 0
+            loop.close()
+
+    # --- Ana thread ---
+
+    def _on_command_requested(self, line: str, future: Future) -> None:
+        """Komutu ana thread'de çalıştır"""
+        # Zaman aşımına uğrayıp iptal edilen istek artık çalıştırılmaz
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            reply = execute_command(self.station, line)
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+        if isinstance(reply, Future):
+            # Arka planda süren komut: Yanıt hazır olunca isteğe aktarılır
+            reply.add_done_callback(lambda f: future.set_result(future_reply(f)))
+        else:
+            future.set_result(reply)
+
+    def _publish_telemetry(self) -> None:
+        """Telemetriyi bir kez kodla ve tüm istemcilere yay"""
+        telemetry = self.station.get_telemetry()
+        if telemetry == self._last_telemetry:
+            return  # Değişiklik yoksa ağ trafiği de yok
+        self._last_telemetry = telemetry
+
+        payload = json.dumps(dict(telemetry, type='telemetry'), ensure_ascii=False).encode('utf-8')
+        self._last_payload = payload
+        self._last_frame = ws_frame(payload)
+
+        loop = self._loop
+        if loop is not None and self._client_count:
+            loop.call_soon_threadsafe(self._broadcast, self._last_frame)
+
+    # --- API thread'i ---
+
+    def _broadcast(self, frame: bytes) -> None:
+        for client in self._clients:
+            client.frame = frame
+            client.wakeup.set()
+
+    async def _run_command(self, line: str) -> dict:
+        """Komutu ana thread'e gönder ve yanıtı bekle"""
+        if line.split(' ', 1)[0].lower() == 'quit':
+            return {'ok': False, 'error': "Uzaktan kapatma desteklenmiyor"}
+
+        future = Future()
+        self._command_requested.emit(line, future)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {'ok': False, 'error': "Komut zaman aşımına uğradı"}
+
+    def _authorized(self, headers: dict, query: dict) -> bool:
+        if not self.token:
+            return True
+        supplied = headers.get('authorization', '')
+        if supplied.lower().startswith('bearer '):
+            supplied = supplied[7:].strip()
+        else:
+            # Tarayıcı WebSocket'leri başlık ekleyemez: /ws?token=...
+            supplied = query.get('token', [''])[0]
+        return hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8'))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+            if not request_line:
+                return
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            if not self._authorized(headers, parse_qs(url.query)):
+                await self._send_json(writer, 401, {'ok': False, 'error': "Yetkisiz"})
+            elif url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._serve_websocket(reader, writer, headers)
+            else:
+                await self._serve_http(reader, writer, method.upper(), url.path, headers)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_http(self, reader, writer, method: str, path: str, headers: dict) -> None:
+        if path == '/api/status':
+            if method != 'GET':
+                return await self._send_json(writer, 405, {'ok': False, 'error': "GET bekleniyor"})
+            reply = await self._run_command('status')
+            return await self._send_json(writer, 200 if reply.get('ok') else 504, reply)
+
+        if path == '/api/telemetry':
+            if method != 'GET':
+                return await self._send_json(writer, 405, {'ok': False, 'error': "GET bekleniyor"})
+            return await self._send_raw(writer, 200, self._last_payload)
+
+        if path not in ('/api/command', '/api/announce', '/api/vox', '/api/ptt'):
+            return await self._send_json(writer, 404, {'ok': False, 'error': "Bulunamadı"})
+        if method != 'POST':
+            return await self._send_json(writer, 405, {'ok': False, 'error': "POST bekleniyor"})
+
+        length = int(headers.get('content-length', 0) or 0)
+        if length > MAX_BODY:
+            return await self._send_json(writer, 413, {'ok': False, 'error': "İstek çok büyük"})
+        try:
+            body = json.loads(await reader.readexactly(length)) if length else {}
+            if not isinstance(body, dict):
+                raise ValueError
+        except ValueError:
+            return await self._send_json(writer, 400, {'ok': False, 'error': "Geçersiz JSON"})
+
+        if path == '/api/command':
+            line = str(body.get('command', ''))
+        elif path == '/api/announce':
+            line = f"say {body.get('text', '')}"
+        elif path == '/api/vox':
+            line = f"vox {'on' if body.get('enabled') else 'off'}"
+        else:
+            line = f"ptt {'on' if body.get('active') else 'off'}"
+
+        reply = await self._run_command(line.strip())
+        await self._send_json(writer, 200 if reply.get('ok') else 400, reply)
+
+    async def _send_json(self, writer, status: int, data: dict) -> None:
+        await self._send_raw(writer, status, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    async def _send_raw(self, writer, status: int, payload: bytes) -> None:
+        header = (
+            f"HTTP/1.1 {status} {HTTP_STATUS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(header.encode('latin-1') + payload)
+        await writer.drain()
+
+    async def _serve_websocket(self, reader, writer, headers: dict) -> None:
+        key = headers.get('sec-websocket-key')
+        if not key:
+            return await self._send_json(writer, 400, {'ok': False, 'error': "Sec-WebSocket-Key eksik"})
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode('latin-1')).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode('latin-1'))
+
+        client = _WSClient(writer)
+        if self._last_frame:
+            client.frame = self._last_frame  # Yeni istemci son durumu hemen görsün
+            client.wakeup.set()
+        self._clients.add(client)
+        self._client_count = len(self._clients)
+        sender = asyncio.ensure_future(self._ws_sender(client))
+
+        try:
+            while True:
+                opcode, data = await ws_read_frame(reader)
+                if opcode == 0x8:    # Kapat
+                    sender.cancel()
+                    writer.write(ws_frame(data[:2], 0x8))
+                    await writer.drain()
+                    break
+                elif opcode == 0x9:  # Ping
+                    client.send(ws_frame(data, 0xA))
+                elif opcode == 0x1:  # Metin: "vox on" veya {"command": "vox on"}
+                    text = data.decode('utf-8', errors='replace').strip()
+                    if text.startswith('{'):
+                        try:
+                            text = str(json.loads(text).get('command', ''))
+                        except (ValueError, AttributeError):
+                            text = ''
+                    reply = await self._run_command(text) if text else {'ok': False, 'error': "Boş komut"}
+                    reply['type'] = 'reply'
+                    client.send(ws_frame(json.dumps(reply, ensure_ascii=False).encode('utf-8')))
+        finally:
+            sender.cancel()
+            self._clients.discard(client)
+            self._client_count = len(self._clients)
+
+    async def _ws_sender(self, client: _WSClient) -> None:
+        """İstemciye yanıtları ve en son telemetri çerçevesini gönder"""
+        writer = client.writer
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                while client.replies:
+                    writer.write(client.replies.popleft())
+                frame, client.frame = client.frame, None
+                if frame:
+                    writer.write(frame)
+                # Yavaş istemci burada bekler; bu sırada gelen kareler üst üste yazılır
+                await writer.drain()
+        except ConnectionError:
+            pass
@@ -0,0 +1,68 @@
+"""
+Saat servisi - Saniyelik tik ve saat başı / buçuk anonsları
+"""
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from datetime import datetime
+
+
+# Saat'in 'i' hali (Accusative)
+# 0->sıfırı, 1->biri, 2->ikiyi, 3->üçü, 4->dördü, 5->beşi, 6->altıyı...
+HOUR_ACCUSATIVE = {
+    0: "sıfırı", 1: "biri", 2: "ikiyi", 3: "üçü", 4: "dördü", 5: "beşi",
+    6: "altıyı", 7: "yediyi", 8: "sekizi", 9: "dokuzu", 10: "onu",
+    11: "on biri", 12: "on ikiyi", 13: "on üçü", 14: "on dördü", 15: "on beşi",
+    16: "on altıyı", 17: "on yediyi", 18: "on sekizi", 19: "on dokuzu", 20: "yirmiyi",
+    21: "yirmi biri", 22: "yirmi ikiyi", 23: "yirmi üçü"
+}
+
+
+def get_natural_time_text(hour: int, minute: int) -> str:
+    """Saati doğal dilde söyle (Örn: Onu yirmi geçiyor)"""
+    if minute == 0:
+        return f"Saat {hour}."
+    elif minute == 30:
+        return f"Saat {hour} buçuk."
+    else:
+        # Örn: 20:24 -> Saat yirmiyi yirmi dört geçiyor.
+        h_text = HOUR_ACCUSATIVE.get(hour, str(hour))
+        return f"Saat {h_text} {minute} geçiyor."
+
+
+class ClockService(QObject):
+    """Arayüzden bağımsız saat servisi (Widget yoksa da anons yapar)"""
+
+    # Sinyaller
+    tick = pyqtSignal(object)               # Her saniye (datetime)
+    request_announcement = pyqtSignal(str)  # Anons isteği (Metin)
+
+    def __init__(self):
+        super().__init__()
+        self.announce_enabled = False  # Saat başı anons
+        self.last_announced_hour = -1
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._on_timeout)
+
+    def start(self) -> None:
+        if not self.timer.isActive():
+            self.timer.start(1000)  # Her saniye
+            self._on_timeout()
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+    def _on_timeout(self) -> None:
+        now = datetime.now()
+        self.tick.emit(now)
+
+        # Anons Kontrolü
+        if self.announce_enabled:
+            # Saniyenin 0 olduğu anı yakala
+            # Ve aynı saat/dakika içinde birden fazla anons yapma
+            current_minute_tag = f"{now.hour}:{now.minute}"
+
+            if now.second == 0 and current_minute_tag != self.last_announced_hour:
+                if now.minute == 0 or now.minute == 30:
+                    text = get_natural_time_text(now.hour, now.minute)
+                    self.request_announcement.emit(text)
+                    self.last_announced_hour = current_minute_tag
@@ -0,0 +1,218 @@
+"""
+Yerel kontrol soketi - Arayüzsüz istasyonu komut satırından yönetmek için
+
+Protokol satır tabanlıdır: Her satır bir komut, her yanıt tek satır JSON.
+Örnek: "status", "connect", "vox on", "ptt off", "say Merhaba", "quit"
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+from PyQt6.QtCore import QObject, QCoreApplication, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from config import settings
+
+
+COMMAND_HELP = {
+    'status': "İstasyon durumu",
+    'connect': "Telsize bağlan ve ses izlemesini başlat",
+    'disconnect': "Bağlantıyı kes",
+    'vox on|off': "VOX aç/kapat",
+    'ptt on|off': "Manuel PTT",
+    'say <metin>': "Metni telsizden oku",
+    'earthquake': "Son depremi oku",
+    'history [saat] [büyüklük]': "Deprem geçmişi (Varsayılan: Son 24 saat)",
+    'time': "Saati oku",
+    'weather [şehir]': "Hava durumunu oku (Şehir verilirse önbellekteki veri döner)",
+    'test': "Test bildirimi",
+    'reload': "Ayarları dosyadan yeniden yükle",
+    'quit': "İstasyonu kapat",
+}
+
+
+class ControlServer(QObject):
+    """QLocalServer tabanlı kontrol soketi (Linux'ta Unix soketi, Windows'ta named pipe)"""
+
+    # Arka plan thread'i -> ana thread (soket, yanıt)
+    _reply_ready = pyqtSignal(object, dict)
+
+    def __init__(self, station, name: str = "tb2asj-control"):
+        super().__init__()
+        self.station = station
+        self.name = name
+        self.server = QLocalServer()
+        self.server.newConnection.connect(self._on_new_connection)
+        self._reply_ready.connect(self._send_reply)
+
+    def start(self) -> bool:
+        """Soketi dinlemeye başla"""
+        # Önceki çökmeden kalan soket dosyasını temizle
+        QLocalServer.removeServer(self.name)
+        if not self.server.listen(self.name):
+            print(f"[KONTROL] Soket açılamadı ({self.name}): {self.server.errorString()}")
+            return False
+        print(f"[KONTROL] Dinleniyor: {self.server.fullServerName()}")
+        return True
+
+    def stop(self) -> None:
+        self.server.close()
+
+    def _on_new_connection(self) -> None:
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            sock.readyRead.connect(lambda s=sock: self._on_ready_read(s))
+            sock.disconnected.connect(sock.deleteLater)
+
+    def _on_ready_read(self, sock: QLocalSocket) -> None:
+        while sock.canReadLine():
+            line = bytes(sock.readLine()).decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            try:
+                reply = self.handle_command(line)
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            if isinstance(reply, Future):
+                # Uzun süren komut: Yanıt hazır olunca ana thread'de yazılır
+                reply.add_done_callback(lambda f, s=sock: self._reply_ready.emit(s, future_reply(f)))
+            else:
+                self._send_reply(sock, reply)
+
+    def _send_reply(self, sock: QLocalSocket, reply: dict) -> None:
+        try:
+            if sock.state() != QLocalSocket.LocalSocketState.ConnectedState:
+                return
+        except RuntimeError:
+            return  # İstemci yanıtı beklemeden ayrıldı, soket silindi
+        sock.write((json.dumps(reply, ensure_ascii=False) + "\n").encode('utf-8'))
+        sock.flush()
+
+    def handle_command(self, line: str):
+        """Tek bir komutu çalıştır"""
+        return execute_command(self.station, line)
+
+
+def future_reply(future: Future) -> dict:
+    """Tamamlanan Future'dan yanıtı al (Hata da yanıta dönüşür)"""
+    try:
+        return future.result()
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+
+def _query_history(station, hours: float, min_magnitude: Optional[float]) -> Future:
+    """Geçmiş sorgusunu arka planda çalıştır (SQLite ana thread'i bekletmesin)"""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def worker():
+        try:
+            records = station.earthquake_service.query_history(
+                start=time.time() - hours * 3600, min_magnitude=min_magnitude, limit=500)
+            future.set_result({'ok': True, 'earthquakes': [eq.to_dict() for eq in records[:100]]})
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+
+def execute_command(station, line: str):
+    """
+    Tek bir komutu çalıştır (Kontrol soketi ve HTTP API ortak kullanır)
+
+    Args:
+        station: İstasyon
+        line: Komut satırı (örn: "vox on")
+
+    Returns:
+        JSON olarak gönderilecek yanıt; arka planda çalışan komutlarda
+        yanıtı taşıyacak Future
+    """
+    command, _, arg = line.partition(' ')
+    command = command.lower()
+    arg = arg.strip()
+
+    if command == 'status':
+        return {'ok': True, 'status': station.get_status()}
+    elif command == 'connect':
+        return {'ok': station.connect_radio()}
+    elif command == 'disconnect':
+        station.disconnect_radio()
+    elif command in ('vox', 'ptt'):
+        if arg not in ('on', 'off'):
+            return {'ok': False, 'error': f"Kullanım: {command} on|off"}
+        if command == 'vox':
+            station.set_vox(arg == 'on')
+        else:
+            station.set_ptt(arg == 'on')
+    elif command == 'say':
+        if not arg:
+            return {'ok': False, 'error': "Kullanım: say <metin>"}
+        station.announce(arg)
+    elif command == 'earthquake':
+        station.read_last_earthquake()
+    elif command == 'history':
+        parts = arg.split()
+        try:
+            hours = float(parts[0]) if parts else 24.0
+            min_magnitude = float(parts[1]) if len(parts) > 1 else None
+        except ValueError:
+            return {'ok': False, 'error': "Kullanım: history [saat] [büyüklük]"}
+        return _query_history(station, hours, min_magnitude)
+    elif command == 'time':
+        station.read_current_time()
+    elif command == 'weather':
+        if not arg:
+            station.read_current_weather()
+        else:
+            city, _, country = arg.partition(',')
+            service = station.weather_service
+            data = service.get_weather(city.strip(), country.strip() or service.country)
+            if data is None:
+                # Önbellekte yok: Sorgu başlat, sonraki komutta hazır olur
+                service.request_weather(city.strip(), country.strip() or service.country)
+                return {'ok': False, 'error': f"{city.strip()} için veri henüz yok, sorgulanıyor"}
+            return {'ok': True, 'weather': data,
+                    'text': service.get_announcement_text(city.strip(), country.strip() or service.country)}
+    elif command == 'test':
+        station.send_test_notification()
+    elif command == 'reload':
+        settings.load()  # Sadece değişen ayarlar abonelerine uygulanır
+    elif command == 'quit':
+        QCoreApplication.instance().quit()
+    elif command == 'help':
+        return {'ok': True, 'commands': COMMAND_HELP}
+    else:
+        return {'ok': False, 'error': f"Bilinmeyen komut: {command}"}
+
+    return {'ok': True}
+
+
+def send_command(line: str, name: str = "tb2asj-control", timeout: int = 3000) -> Optional[dict]:
+    """
+    Çalışan istasyona komut gönder (İstemci tarafı)
+
+    Returns:
+        Yanıt veya bağlanılamazsa None
+    """
+    sock = QLocalSocket()
+    sock.connectToServer(name)
+    if not sock.waitForConnected(timeout):
+        print(f"Bağlanılamadı ({name}): {sock.errorString()}")
+        return None
+
+    sock.write((line.strip() + "\n").encode('utf-8'))
+    sock.flush()
+
+    data = b""
+    while not data.endswith(b"\n"):
+        if not sock.waitForReadyRead(timeout):
+            break
+        data += bytes(sock.readAll())
+    sock.disconnectFromServer()
+
+    if not data:
+        return None
+    return json.loads(data.decode('utf-8'))
@@ -0,0 +1,260 @@
+"""
+Deprem geçmişi - Görülen her depremin yerel SQLite kaydı
+
+Kayıtlar sadece eklenir (Aynı ID ikinci kez yazılmaz). Yazma işi arka
+plan thread'inde toplu yapılır: Kuyrukta biriken kayıtlar tek işlemde
+(transaction) diske gider. Zaman, büyüklük ve konum indeksleri sayesinde
+yıllarca birikmiş kayıt içinde aralık sorguları hızlı kalır.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Tuple, Iterable
+from services.earthquake_records import EarthquakeRecord
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS earthquakes (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    magnitude REAL NOT NULL,
+    location TEXT NOT NULL,
+    location_lc TEXT NOT NULL,
+    depth REAL,
+    date TEXT,
+    timestamp REAL,
+    lat REAL,
+    lon REAL,
+    seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_eq_time ON earthquakes(timestamp);
+CREATE INDEX IF NOT EXISTS idx_eq_mag_time ON earthquakes(magnitude, timestamp);
+CREATE INDEX IF NOT EXISTS idx_eq_lat_lon ON earthquakes(lat, lon);
+"""
+
+COLUMNS = "id, source, magnitude, location, depth, date, timestamp, lat, lon"
+
+
+class EarthquakeHistory:
+    """
+    Kalıcı deprem geçmişi
+
+    add() her thread'den çağrılabilir ve beklemez; query() ayrı bir okuma
+    bağlantısı kullanır (WAL modunda yazma sürerken de okunabilir).
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0, batch_size: int = 500,
+                 recent_size: int = 20000):
+        self.path = path
+        self.flush_interval = flush_interval  # Saniye (Kayıtlar en geç bu kadar bekler)
+        self.batch_size = batch_size
+
+        # Son yazılan ID'ler: Her sorguda gelen aynı liste diske tekrar gitmez
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._recent_size = recent_size
+        self._recent_lock = threading.Lock()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._thread: Optional[threading.Thread] = None
+
+        try:
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+            conn.close()
+            self._reader = self._connect()
+        except sqlite3.Error as e:
+            print(f"[HATA] Deprem geçmişi açılamadı ({path}): {e}")
+            return
+
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    @property
+    def is_open(self) -> bool:
+        return self._thread is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL'da güvenli, her işlemde fsync yok
+        return conn
+
+    # --- Yazma ---
+
+    def add(self, records: Iterable[EarthquakeRecord]) -> int:
+        """
+        Kayıtları yazma kuyruğuna ekle (Beklemez)
+
+        Returns:
+            Kuyruğa eklenen (yeni görülen) kayıt sayısı
+        """
+        if not self.is_open:
+            return 0
+        fresh = []
+        with self._recent_lock:
+            recent = self._recent
+            for record in records:
+                if record.id in recent:
+                    continue
+                recent[record.id] = None
+                fresh.append(record)
+            while len(recent) > self._recent_size:
+                recent.popitem(last=False)
+        if fresh:
+            self._queue.put(fresh)
+        return len(fresh)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Kuyruktaki kayıtların yazılmasını bekle"""
+        if not self.is_open:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """Kuyruğu boşalt ve kapat"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+        with self._read_lock:
+            self._reader.close()
+            self._reader = None
+
+    def _writer(self) -> None:
+        conn = self._connect()
+        pending: List[EarthquakeRecord] = []
+        waiters: List[threading.Event] = []
+        deadline = None
+        running = True
+
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                running = False
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item:
+                pending.extend(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            # Süre doldu, parti doldu, flush istendi veya kapanıyor
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending and (due or len(pending) >= self.batch_size or waiters or not running):
+                self._write(conn, pending)
+                pending = []
+                deadline = None
+            for event in waiters:
+                event.set()
+            waiters = []
+
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, records: List[EarthquakeRecord]) -> None:
+        now = time.time()
+        rows = [
+            (r.id, r.source, r.magnitude, r.location, r.location.lower(), _to_float(r.depth), r.date,
+             r.timestamp if r.has_time else None, r.lat, r.lon, now)
+            for r in records
+        ]
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO earthquakes "
+                    "(id, source, magnitude, location, location_lc, depth, date, timestamp, lat, lon, seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            print(f"[HATA] Deprem geçmişi yazılamadı: {e}")
+
+    # --- Sorgular ---
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              min_magnitude: Optional[float] = None,
+              region: Optional[Tuple[float, float, float, float]] = None,
+              location: Optional[str] = None, limit: Optional[int] = 1000) -> List[EarthquakeRecord]:
+        """
+        Geçmişte arama (Yeniden eskiye)
+
+        Args:
+            start, end: Oluş zamanı aralığı (epoch)
+            min_magnitude: Minimum büyüklük
+            region: (lat_min, lon_min, lat_max, lon_max)
+            location: Yer adında geçen metin
+            limit: En fazla kayıt (None: Sınırsız)
+        """
+        where, params = [], []
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("timestamp <= ?")
+            params.append(end)
+        if min_magnitude is not None:
+            where.append("magnitude >= ?")
+            params.append(min_magnitude)
+        if region is not None:
+            where.append("lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?")
+            params.extend((region[0], region[2], region[1], region[3]))
+        if location:
+            where.append("instr(location_lc, ?) > 0")
+            params.append(location.lower().strip())
+
+        sql = f"SELECT {COLUMNS} FROM earthquakes"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._read_lock:
+            if self._reader is None:
+                return []
+            try:
+                rows = self._reader.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                print(f"[HATA] Deprem geçmişi okunamadı: {e}")
+                return []
+        return [_to_record(row) for row in rows]
+
+    def count(self) -> int:
+        with self._read_lock:
+            if self._reader is None:
+                return 0
+            return self._reader.execute("SELECT COUNT(*) FROM earthquakes").fetchone()[0]
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_record(row) -> EarthquakeRecord:
+    eq_id, source, magnitude, location, depth, date, timestamp, lat, lon = row
+    return EarthquakeRecord(
+        id=eq_id,
+        source=source,
+        magnitude=magnitude,
+        location=location,
+        depth=depth if depth is not None else 0,
+        date=date or '',
+        timestamp=timestamp if timestamp is not None else float('nan'),
+        lat=lat or 0.0,
+        lon=lon or 0.0,
+        sources=(source,),
+        ids=(eq_id,)
+    )
@@ -0,0 +1,137 @@
+"""
+Deprem kayıtları - Ortak kayıt tipi ve toplu (vektörel) filtreleme
+
+Her deprem bir kez EarthquakeRecord'a çevrilir; filtreler kayıt kayıt
+değil, sayısal alanlardan kurulan NumPy dizileri üzerinde toplu çalışır.
+"""
+import math
+import re
+from datetime import datetime
+from typing import NamedTuple, Optional, List, Tuple, Sequence
+import numpy as np
+
+
+class EarthquakeRecord(NamedTuple):
+    """Tek deprem (Tüm kaynaklar için ortak, değişmez)"""
+    id: str
+    source: str
+    magnitude: float
+    location: str
+    depth: float
+    date: str            # Listede gösterilen yerel tarih
+    timestamp: float     # Epoch (Bilinmiyorsa NaN)
+    lat: float
+    lon: float
+    sources: Tuple[str, ...] = ()  # Birleştirilmiş kayıtta tüm kurumlar
+    ids: Tuple[str, ...] = ()
+
+    @property
+    def has_time(self) -> bool:
+        return not math.isnan(self.timestamp)
+
+    def to_dict(self) -> dict:
+        """Sinyaller ve arayüz için sözlük"""
+        data = self._asdict()
+        data['timestamp'] = self.timestamp if self.has_time else None
+        return data
+
+
+def parse_event_time(date_str) -> float:
+    """API tarihini epoch'a çevir ("2024.02.05 20:30:45" veya "2024-02-05 20:30:45"), okunamazsa NaN"""
+    if not date_str:
+        return math.nan
+    s = str(date_str)
+    try:
+        # Sabit biçim: strptime'dan birkaç kat hızlı dilimleme
+        if len(s) == 19:
+            return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                            int(s[11:13]), int(s[14:16]), int(s[17:19])).timestamp()
+        return datetime.strptime(s.replace('.', '-'), "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return math.nan
+
+
+class LocationMatcher:
+    """Virgülle ayrılmış yer filtresi, bir kez derlenir ("izmir, manisa")"""
+
+    def __init__(self, text: Optional[str]):
+        self.text = text.lower().strip() if text else ""
+        parts = [p.strip() for p in self.text.split(',') if p.strip()]
+        self._pattern = re.compile("|".join(re.escape(p) for p in parts)) if parts else None
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LocationMatcher) and other.text == self.text
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def __repr__(self) -> str:
+        return f"LocationMatcher({self.text!r})"
+
+    def matches(self, location: str) -> bool:
+        return self._pattern is None or self._pattern.search(location.lower()) is not None
+
+    def mask(self, locations: Sequence[str]) -> np.ndarray:
+        """Küçük harfe çevrilmiş yer adları için toplu eşleşme"""
+        if self._pattern is None:
+            return np.ones(len(locations), dtype=bool)
+        search = self._pattern.search
+        return np.fromiter((search(loc) is not None for loc in locations), dtype=bool, count=len(locations))
+
+
+class EarthquakeBatch:
+    """
+    Kayıt listesi + sayısal alanların dizileri (Bir kez kurulur)
+
+    Filtreler bool maske döndürür; maskeler & ile birleştirilip
+    select() ile kayıtlara çevrilir.
+    """
+
+    __slots__ = ('records', 'magnitude', 'timestamp', 'lat', 'lon', '_locations')
+
+    def __init__(self, records: List[EarthquakeRecord]):
+        self.records = records
+        n = len(records)
+        self.magnitude = np.fromiter((r.magnitude for r in records), dtype=np.float64, count=n)
+        self.timestamp = np.fromiter((r.timestamp for r in records), dtype=np.float64, count=n)
+        self.lat = np.fromiter((r.lat for r in records), dtype=np.float64, count=n)
+        self.lon = np.fromiter((r.lon for r in records), dtype=np.float64, count=n)
+        self._locations: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def locations(self) -> List[str]:
+        """Küçük harfli yer adları (İlk yer filtresinde hesaplanır)"""
+        if self._locations is None:
+            self._locations = [r.location.lower() for r in self.records]
+        return self._locations
+
+    def all(self) -> np.ndarray:
+        return np.ones(len(self.records), dtype=bool)
+
+    def min_magnitude(self, value: float) -> np.ndarray:
+        return self.magnitude >= value
+
+    def newer_than(self, seconds: float, now: float) -> np.ndarray:
+        """Son N saniyedeki depremler (Tarihi okunamayanlar da geçer)"""
+        return ~(now - self.timestamp > seconds)  # NaN karşılaştırması False
+
+    def in_region(self, lat_min: float, lon_min: float, lat_max: float, lon_max: float) -> np.ndarray:
+        return (self.lat >= lat_min) & (self.lat <= lat_max) & (self.lon >= lon_min) & (self.lon <= lon_max)
+
+    def location(self, matcher: LocationMatcher) -> np.ndarray:
+        if not matcher:
+            return self.all()
+        return matcher.mask(self.locations)
+
+    def select(self, mask: np.ndarray, limit: Optional[int] = None) -> List[EarthquakeRecord]:
+        indexes = np.flatnonzero(mask)
+        if limit is not None:
+            indexes = indexes[:limit]
+        records = self.records
+        return [records[i] for i in indexes]
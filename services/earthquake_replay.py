@@ -0,0 +1,415 @@
+"""
+Deprem akışı kaydı ve tekrar oynatma - Canlı API olmadan uçtan uca deneme
+
+Kayıt dosyası JSON Lines biçimindedir; her satır bir kaynağın o andaki
+yanıtıdır:
+    {"t": 12.5, "provider": "AFAD", "recorded_at": 1707165045.0, "payload": {...}}
+
+ReplayServer kayıtları zamanlamasına göre yerel bir HTTP sunucusundan
+(API ile aynı yollar) sunar. Deprem saatleri oynatmanın başladığı ana
+kaydırılır, böylece bildirim penceresine (Son 15 dakika) girerler.
+
+Aynı sunucu /stream yolunda EMSC biçiminde Server-Sent Events akışı da
+verir: Seçilen kurumun her yeni kaydı yayınlandığı anda EMSC mesajı
+olarak gönderilir (Yer adı EMSC gibi bölge adıdır, "WESTERN TURKEY").
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Tuple
+import requests
+
+
+# API'deki yollar (EarthquakeService.providers ile aynı)
+PROVIDER_PATHS = {
+    "Kandilli": "/deprem/kandilli/live",
+    "AFAD": "/deprem/afad/live",
+}
+COMBINED_PATH = "/deprem"
+STREAM_PATH = "/stream"
+STREAM_HEARTBEAT = 15.0  # Saniye (Yorum satırı, istemcinin okuma zaman aşımı için)
+
+
+def load_feed(path: str) -> List[Dict]:
+    """Kayıt dosyasını oku (Zamana göre sıralı)"""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    entries.sort(key=lambda e: e['t'])
+    return entries
+
+
+def save_feed(path: str, entries: List[Dict]) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def record_feed(path: str, duration: float, interval: float = 10.0,
+                base_url: str = "https://api.orhanaydogdu.com.tr") -> int:
+    """
+    Canlı API'yi belirli süre dinleyip değişen yanıtları kaydet
+
+    Returns:
+        Kaydedilen satır sayısı
+    """
+    session = requests.Session()
+    hashes: Dict[str, str] = {}
+    count = 0
+    started = time.time()
+    with open(path, 'w', encoding='utf-8') as f:
+        while time.time() - started < duration:
+            for provider, api_path in PROVIDER_PATHS.items():
+                try:
+                    response = session.get(base_url + api_path, timeout=10)
+                    response.raise_for_status()
+                except requests.exceptions.RequestException as e:
+                    print(f"[KAYIT] {provider} alınamadı: {e}")
+                    continue
+                digest = hashlib.sha1(response.content).hexdigest()
+                if digest == hashes.get(provider):
+                    continue
+                hashes[provider] = digest
+                now = time.time()
+                f.write(json.dumps({
+                    't': round(now - started, 3),
+                    'provider': provider,
+                    'recorded_at': now,
+                    'payload': response.json(),
+                }, ensure_ascii=False) + "\n")
+                f.flush()
+                count += 1
+                print(f"[KAYIT] {provider}: {len(response.json().get('result') or [])} deprem")
+            time.sleep(interval)
+    return count
+
+
+def generate_scenario(seed: int = 1, aftershocks: int = 30, duration: float = 60.0,
+                      afad_delay: Tuple[float, float] = (2.0, 8.0)) -> List[Dict]:
+    """
+    Yapay senaryo: Eski depremler, ana şok, artçı sarsıntı kümesi
+
+    Her deprem önce Kandilli'de, birkaç saniye sonra farklı ID, yer adı ve
+    küçük zaman/konum/büyüklük farkıyla AFAD'da yayınlanır (Kurumlar arası
+    tekrar). Bir artçının büyüklüğü sonradan revize edilir.
+    """
+    rng = random.Random(seed)
+    base = time.time()
+    start = datetime.fromtimestamp(base)
+    events = []  # (yayın zamanı, kaynak, ham kayıt)
+
+    def item(provider, eq_id, when, mag, lat, lon, title):
+        return {
+            'earthquake_id': eq_id,
+            'provider': provider,
+            'title': title,
+            'date': when.strftime("%Y.%m.%d %H:%M:%S"),
+            'date_time': when.strftime("%Y-%m-%d %H:%M:%S"),
+            'mag': round(mag, 1),
+            'depth': round(rng.uniform(5, 15), 1),
+            'geojson': {'type': 'Point', 'coordinates': [round(lon, 4), round(lat, 4)]},
+        }
+
+    def publish(n, t, mag, lat, lon, title, afad_title):
+        when = start + timedelta(seconds=t)
+        events.append((t, "Kandilli", item("Kandilli", f"K{seed}-{n}", when, mag, lat, lon, title)))
+        # AFAD: Aynı deprem, farklı kayıt
+        afad_when = when + timedelta(seconds=rng.uniform(-8, 8))
+        events.append((t + rng.uniform(*afad_delay), "AFAD", item(
+            "AFAD", f"A{seed}-{n}", afad_when, mag + rng.uniform(-0.2, 0.2),
+            lat + rng.uniform(-0.03, 0.03), lon + rng.uniform(-0.03, 0.03), afad_title)))
+
+    # Oynatmadan önce olmuş depremler (İlk sorguda öğrenilir, okunmaz)
+    for n in range(20):
+        t = -rng.uniform(3600, 86400)
+        publish(f"old{n}", t, rng.uniform(1.5, 4.5), rng.uniform(36, 41), rng.uniform(26, 44),
+                "ESKI DEPREM", "Eski Deprem")
+    events = [(0.0, provider, raw) for _, provider, raw in events]
+
+    # Ana şok ve artçılar
+    lat0, lon0 = 38.08, 37.03
+    main_t = 5.0
+    publish("main", main_t, 6.1, lat0, lon0, "PAZARCIK (KAHRAMANMARAS)", "Pazarcık (Kahramanmaraş)")
+    t = main_t
+    for n in range(aftershocks):
+        t += rng.expovariate(aftershocks / max(1.0, duration - main_t - 10))
+        mag = min(5.8, 2.0 + rng.expovariate(1.2))
+        publish(n, t, mag, lat0 + rng.uniform(-0.3, 0.3), lon0 + rng.uniform(-0.3, 0.3),
+                "ELBISTAN (KAHRAMANMARAS)", "Elbistan (Kahramanmaraş)")
+
+    # Revizyon: Kandilli aynı ID ile büyüklüğü günceller (Tekrar okunmamalı)
+    revised = [e for e in events if e[1] == "Kandilli" and e[0] > main_t]
+    if revised:
+        t0, _, raw = revised[len(revised) // 2]
+        events.append((t0 + 10, "Kandilli", dict(raw, mag=round(raw['mag'] + 0.3, 1))))
+
+    # Her yayın anında kaynağın canlı listesi (Yeniden eskiye, en fazla 100)
+    events.sort(key=lambda e: e[0])
+    entries = []
+    lists: Dict[str, Dict[str, Dict]] = {name: {} for name in PROVIDER_PATHS}
+    for t, provider, raw in events:
+        lists[provider][raw['earthquake_id']] = raw
+        result = sorted(lists[provider].values(), key=lambda r: r['date_time'], reverse=True)[:100]
+        if entries and entries[-1]['provider'] == provider and entries[-1]['t'] == round(t, 3):
+            entries.pop()
+        entries.append({
+            't': round(t, 3),
+            'provider': provider,
+            'recorded_at': base + t,
+            'payload': {'status': True, 'result': result},
+        })
+    return entries
+
+
+def first_publish_times(entries: List[Dict]) -> Dict[str, float]:
+    """Deprem ID'si -> ilk yayınlandığı an (Kayıt başına göre saniye)"""
+    first: Dict[str, float] = {}
+    for entry in entries:
+        for raw in entry['payload'].get('result') or []:
+            eq_id = raw.get('earthquake_id')
+            if eq_id and eq_id not in first:
+                first[str(eq_id)] = entry['t']
+    return first
+
+
+def _flynn_region(lat: float, lon: float) -> str:
+    """EMSC tarzı kaba bölge adı (Şehir adı içermez)"""
+    if lon < 31.0:
+        return "WESTERN TURKEY"
+    if lon < 38.0:
+        return "CENTRAL TURKEY"
+    return "EASTERN TURKEY"
+
+
+def emsc_message(raw: Dict, action: str = "create") -> Dict:
+    """API kaydını EMSC akış mesajına çevir (Zaman UTC, ISO biçiminde)"""
+    coordinates = (raw.get('geojson') or {}).get('coordinates') or [0, 0]
+    lon, lat = float(coordinates[0]), float(coordinates[1])
+    local = datetime.strptime(raw['date_time'], "%Y-%m-%d %H:%M:%S")
+    utc = datetime.fromtimestamp(local.timestamp(), timezone.utc)
+    return {
+        'action': action,
+        'data': {
+            'type': 'Feature',
+            'id': str(raw.get('earthquake_id')),
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat, -float(raw.get('depth', 0))]},
+            'properties': {
+                'unid': str(raw.get('earthquake_id')),
+                'time': utc.strftime("%Y-%m-%dT%H:%M:%S.0Z"),
+                'lat': lat,
+                'lon': lon,
+                'depth': raw.get('depth', 0),
+                'mag': raw.get('mag', 0),
+                'flynn_region': _flynn_region(lat, lon),
+            },
+        },
+    }
+
+
+def _shift_item(raw: Dict, shift: timedelta) -> Dict:
+    """Kaydın tarihlerini kaydır (Biçim korunur)"""
+    raw = dict(raw)
+    for key, fmt in (('date_time', "%Y-%m-%d %H:%M:%S"), ('date', "%Y.%m.%d %H:%M:%S")):
+        value = raw.get(key)
+        if not value:
+            continue
+        for candidate in (fmt, fmt.replace('.', '-'), fmt.replace('-', '.')):
+            try:
+                raw[key] = (datetime.strptime(value, candidate) + shift).strftime(candidate)
+                break
+            except ValueError:
+                continue
+    return raw
+
+
+class ReplayServer:
+    """
+    Kayıtları zamanlamasına göre sunan yerel API (Arka plan thread'i)
+
+    Her yol için o anki en son yanıt döner; ETag ve If-None-Match
+    desteklenir (Gerçek API gibi 304). speed > 1 oynatmayı hızlandırır.
+    STREAM_PATH, stream_provider'ın yeni kayıtlarını EMSC akışı olarak verir.
+    """
+
+    def __init__(self, entries: List[Dict], host: str = "127.0.0.1", port: int = 0,
+                 speed: float = 1.0, shift_times: bool = True, stream_provider: str = "Kandilli"):
+        self.entries = entries
+        self.speed = max(0.01, speed)
+        self.shift_times = shift_times
+        self.stream_provider = stream_provider
+        self.started_at: Optional[float] = None  # Oynatma başlangıcı (time.time)
+        self.requests = 0
+
+        # Yol -> [(t, gövde, etag)] (start() sırasında bir kez hazırlanır)
+        self._timeline: Dict[str, List[Tuple[float, bytes, str]]] = {}
+        # Akış mesajları [(t, SSE olayı)]; oynatma öncesi kayıtlar gönderilmez
+        self._stream_events: List[Tuple[float, bytes]] = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive (Servisin kalıcı oturumu gibi)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, provider: str) -> str:
+        """Sağlayıcının yerel adresi"""
+        return self.base_url + PROVIDER_PATHS.get(provider, COMBINED_PATH)
+
+    @property
+    def stream_url(self) -> str:
+        """EMSC biçimli SSE akışının yerel adresi"""
+        return self.base_url + STREAM_PATH
+
+    def elapsed(self) -> float:
+        """Kayıt zamanında geçen süre"""
+        if self.started_at is None:
+            return 0.0
+        return (time.time() - self.started_at) * self.speed
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self._stopping.clear()
+        self._prepare()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()  # Açık akış bağlantıları kapanır
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.httpd.server_close()
+
+    def _prepare(self) -> None:
+        """Yanıtları önceden kodla (Sunarken sadece bayt kopyalanır)"""
+        shift = timedelta(0)
+        if self.shift_times and self.entries:
+            recorded_start = self.entries[0].get('recorded_at', self.started_at) - self.entries[0]['t']
+            shift = timedelta(seconds=self.started_at - recorded_start)
+
+        latest: Dict[str, List[Dict]] = {}
+        timeline: Dict[str, List[Tuple[float, bytes, str]]] = {}
+        stream_events: List[Tuple[float, bytes]] = []
+        streamed = set()
+        for entry in self.entries:
+            result = [_shift_item(raw, shift) for raw in entry['payload'].get('result') or []]
+            if entry['provider'] == self.stream_provider:
+                for raw in result:
+                    eq_id = raw.get('earthquake_id')
+                    if eq_id in streamed or not raw.get('date_time'):
+                        continue
+                    streamed.add(eq_id)
+                    if entry['t'] > 0:
+                        data = json.dumps(emsc_message(raw), ensure_ascii=False)
+                        stream_events.append((entry['t'], f"data: {data}\n\n".encode('utf-8')))
+            payload = dict(entry['payload'], result=result)
+            path = PROVIDER_PATHS.get(entry['provider'], COMBINED_PATH)
+            latest[path] = result
+            timeline.setdefault(path, []).append((entry['t'], *_encode(payload)))
+
+            # Tümü: Kurumların son listelerinin birleşimi
+            if path != COMBINED_PATH:
+                combined = [raw for name, items in latest.items() if name != COMBINED_PATH for raw in items]
+                combined.sort(key=lambda raw: raw.get('date_time', ''), reverse=True)
+                timeline.setdefault(COMBINED_PATH, []).append(
+                    (entry['t'], *_encode({'status': True, 'result': combined})))
+        with self._lock:
+            self._timeline = timeline
+            self._stream_events = stream_events
+
+    def _current(self, path: str) -> Optional[Tuple[float, bytes, str]]:
+        elapsed = self.elapsed()
+        current = None
+        for item in self._timeline.get(path, ()):
+            if item[0] > elapsed:
+                break
+            current = item
+        return current
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        self.requests += 1
+        path = handler.path.split('?', 1)[0].rstrip('/') or '/'
+        if path == STREAM_PATH:
+            self._handle_stream(handler)
+            return
+        with self._lock:
+            known = path in self._timeline
+            current = self._current(path)
+        if not known:
+            handler.send_error(404)
+            return
+        if current is None:
+            body, etag = _encode({'status': True, 'result': []})
+        else:
+            _, body, etag = current
+
+        if handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('ETag', etag)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+    def _handle_stream(self, handler: BaseHTTPRequestHandler) -> None:
+        """SSE: Zamanı gelen mesajları gönder, arada kalp atışı (Bağlantı başına thread)"""
+        handler.close_connection = True
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+
+        with self._lock:
+            events = list(self._stream_events)
+        # Bağlanmadan önce yayınlananlar gönderilmez (Gerçek akış gibi)
+        elapsed = self.elapsed()
+        index = next((i for i, (t, _) in enumerate(events) if t > elapsed), len(events))
+        last_write = time.monotonic()
+        try:
+            while not self._stopping.is_set():
+                elapsed = self.elapsed()
+                while index < len(events) and events[index][0] <= elapsed:
+                    handler.wfile.write(events[index][1])
+                    index += 1
+                    last_write = time.monotonic()
+                if time.monotonic() - last_write >= STREAM_HEARTBEAT:
+                    handler.wfile.write(b": ping\n\n")
+                    last_write = time.monotonic()
+                handler.wfile.flush()
+                self._stopping.wait(0.05)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # İstemci ayrıldı
+
+
+def _encode(payload: Dict) -> Tuple[bytes, str]:
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return body, f'"{hashlib.sha1(body).hexdigest()[:16]}"'
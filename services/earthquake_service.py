@@ -2,19 +2,175 @@
 Deprem bildirim servisi - Kandilli Rasathanesi API
 """
 import requests
+import bisect
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, List, Dict
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
-from datetime import datetime, timedelta
+from datetime import datetime
+from services.earthquake_records import EarthquakeRecord, EarthquakeBatch, LocationMatcher, parse_event_time
+from services.earthquake_stream import EarthquakeStream, EMSC_STREAM_URL
+from services.geo_filter import GeoAlertFilter, AlertRule
+from services.earthquake_history import EarthquakeHistory
+from services.http_client import http_client
+
+
+class KnownEarthquakes:
+    """
+    Bildirimi yapılmış depremler (Sınırlı, ekleme sıralı ID kümesi)
+    
+    ID -> ilk görülme zamanı (epoch). Arama O(1); süresi dolan veya sınırı
+    aşan en eski kayıtlar baştan atılır. Dosyaya yazılır ki yeniden
+    başlatmada aynı deprem tekrar okunmasın.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_age: int = 86400, max_size: int = 5000):
+        self.path = path
+        self.max_age = max_age    # Saniye (Bildirim penceresinden çok uzun olmalı)
+        self.max_size = max_size
+        self._items: "OrderedDict[str, float]" = OrderedDict()
+        self.loaded = False       # Diskten önceki kayıt okundu mu?
+        self._load()
+    
+    def __contains__(self, eq_id: str) -> bool:
+        return eq_id in self._items
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def add(self, eq_id: str, seen: Optional[float] = None) -> bool:
+        """ID'yi ekle. Zaten biliniyorsa False"""
+        if eq_id in self._items:
+            return False
+        self._items[eq_id] = seen if seen is not None else time.time()
+        return True
+    
+    def expire(self) -> None:
+        """Süresi dolan ve sınırı aşan kayıtları at (En eskiler baştadır)"""
+        limit = time.time() - self.max_age
+        items = self._items
+        while items:
+            seen = next(iter(items.values()))
+            if seen >= limit and len(items) <= self.max_size:
+                break
+            items.popitem(last=False)
+    
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for eq_id, seen in sorted(data.items(), key=lambda item: item[1]):
+                self._items[eq_id] = float(seen)
+            self.expire()
+            self.loaded = True
+        except Exception as e:
+            print(f"Bilinen depremler okunamadı: {e}")
+    
+    def save(self) -> None:
+        """Dosyaya yaz (Yarım kalan yazma eski dosyayı bozmasın diye önce geçici dosya)"""
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._items, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Bilinen depremler kaydedilemedi: {e}")
+
+
+# Aynı depremin farklı kurumlardaki kayıtlarını eşleştirme toleransları
+MERGE_TIME_WINDOW = 60.0   # Oluş zamanı farkı (saniye)
+MERGE_DISTANCE_KM = 50.0   # Merkez üssü uzaklığı (km)
+MERGE_MAG_DIFF = 0.7       # Büyüklük farkı
+
+NOTIFY_WINDOW = 15 * 60    # Sadece son 15 dakikadaki depremler bildirilir (saniye)
+
+# Akış açıkken liste yenilemesi için seyrek sorgu (saniye)
+STREAM_POLL_INTERVAL = 300
+# Akıştan gelen depremler için bölge (lat_min, lon_min, lat_max, lon_max): Türkiye ve çevresi
+STREAM_REGION = (35.5, 25.0, 42.5, 45.0)
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Yaklaşık uzaklık (Eşdikdörtgen izdüşüm, birkaç yüz km için yeterli)"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371.0 * math.hypot(x, y)
+
+
+def is_same_event(a: EarthquakeRecord, b: EarthquakeRecord) -> bool:
+    """İki kayıt aynı fiziksel depremi mi anlatıyor? (Zaman, konum, büyüklük)"""
+    if not abs(a.timestamp - b.timestamp) <= MERGE_TIME_WINDOW:  # NaN da eşleşmez
+        return False
+    if abs(a.magnitude - b.magnitude) > MERGE_MAG_DIFF:
+        return False
+    if (a.lat or a.lon) and (b.lat or b.lon):
+        return distance_km(a.lat, a.lon, b.lat, b.lon) <= MERGE_DISTANCE_KM
+    # Koordinat yoksa yer adına bak
+    return a.location.lower() == b.location.lower()
+
+
+def merge_earthquakes(records: List[EarthquakeRecord]) -> List[EarthquakeRecord]:
+    """
+    Farklı kurumların aynı deprem için yayınladığı kayıtları birleştir
+
+    Kayıtlar oluş zamanına göre sıralanır ve her kayıt sadece zaman
+    penceresi içindeki olaylarla karşılaştırılır (İkili karşılaştırma yok).
+
+    Returns:
+        Yeniden eskiye olaylar ('sources' ve 'ids' alanları dolu)
+    """
+    timed = sorted((r for r in records if r.has_time), key=lambda r: r.timestamp)
+    # [ilk kayıt, kurumlar, ID'ler]; kayıtlar değişmez olduğu için sonda kurulur
+    merged: List[list] = []
+    window: deque = deque()
+
+    for record in timed:
+        while window and record.timestamp - window[0][0].timestamp > MERGE_TIME_WINDOW:
+            window.popleft()
+
+        for event in window:
+            # Aynı kurumun iki kaydı ayrı depremdir (Artçılar)
+            if record.source not in event[1] and is_same_event(event[0], record):
+                event[1].append(record.source)
+                event[2].append(record.id)
+                break
+        else:
+            event = [record, [record.source], [record.id]]
+            merged.append(event)
+            window.append(event)
+
+    merged.reverse()
+    result = [first._replace(sources=tuple(sources), ids=tuple(ids)) for first, sources, ids in merged]
+    result.extend(r._replace(sources=(r.source,), ids=(r.id,)) for r in records if not r.has_time)
+    return result
+
 
 class EarthquakeService(QObject):
     """Deprem bildirim servisi"""
     
     # Sinyaller
     earthquake_detected = pyqtSignal(dict)  # Yeni kritik deprem (Bildirim için)
-    data_updated = pyqtSignal(list)         # Liste güncellendi (UI için)
+    data_updated = pyqtSignal(list)         # Liste güncellendi (Sözlük listesi)
+    records_updated = pyqtSignal(list)      # Liste güncellendi (EarthquakeRecord listesi, UI için)
     error_occurred = pyqtSignal(str)        # Hata oluştu
+    # Worker thread -> GUI thread (kaynak anahtarı, sonuç / hata mesajı / None)
+    _fetch_finished = pyqtSignal(str, object)
+    # Paralel modda ilk yanıt veren kurumun adayları (Diğerlerini beklemeden bildirim)
+    _source_ready = pyqtSignal(str, object)
+    history_loaded = pyqtSignal(list)       # Geçmiş sorgusu sonucu (EarthquakeRecord listesi)
     
-    def __init__(self, min_magnitude: float = 4.0):
+    def __init__(self, min_magnitude: float = 4.0, state_file: Optional[str] = None,
+                 history_file: Optional[str] = None):
         super().__init__()
         # Kandilli Rasathanesi API Endpoints
         self.providers = {
@@ -22,171 +178,503 @@ class EarthquakeService(QObject):
             "AFAD": "https://api.orhanaydogdu.com.tr/deprem/afad/live",
             "Tümü (Kandilli+AFAD)": "https://api.orhanaydogdu.com.tr/deprem"
         }
+        # Aynı anda sorgulanıp birleştirilen kaynaklar
+        self.merged_providers = {
+            "Kandilli + AFAD (Paralel)": ["Kandilli", "AFAD"],
+        }
         self.current_provider = "Kandilli"
-        self.api_url = self.providers[self.current_provider]
+        self.sources = [(self.current_provider, self.providers[self.current_provider])]
         
         self.min_magnitude = min_magnitude
         self.city_filter: Optional[str] = None
+        self.location_matcher = LocationMatcher(None)  # city_filter'ın derlenmiş hali
+        self.geo_filter = GeoAlertFilter()  # Konum kuralları (Varsa bildirimde yer adının yerine geçer)
         
         self.check_interval = 60  # Kontrol aralığı (saniye)
         self.last_check_time: Optional[datetime] = None
-        self.known_earthquakes: List[str] = []  # Bilinen deprem ID'leri
-        self.last_data: List[Dict] = []         # Son çekilen ham veri
+        self.known_earthquakes = KnownEarthquakes(state_file)  # Bilinen deprem ID'leri
+        self.last_data: List[EarthquakeRecord] = []  # Son birleştirilmiş liste (Yeniden eskiye)
+        # Görülen tüm depremler (Opsiyonel, kalıcı)
+        self.history: Optional[EarthquakeHistory] = EarthquakeHistory(history_file) if history_file else None
+        
+        # Bildirilen depremler (Oluş zamanına göre sıralı): Başka kurumun
+        # aynı deprem için sonradan yayınladığı kayıt tekrar okunmaz
+        self._recent_times: List[float] = []
+        self._recent_events: List[EarthquakeRecord] = []
+        
+        # Kaynak başına son yanıt: etag, last_modified, hash, records (Sadece worker yazar)
+        self._http_cache: Dict[str, Dict] = {}
+        # Son işlenen kaynak + filtre (Veri ve filtre aynıysa liste yeniden kurulmaz)
+        self._last_processed: Optional[str] = None
+        
+        # Arka plan sorgusu (Aynı anda tek sorgu)
+        self._fetch_thread: Optional[threading.Thread] = None
+        self._fetch_finished.connect(self._on_fetch_finished)
+        self._source_ready.connect(self._on_source_ready)
         
         # Otomatik kontrol timer'ı
         self.check_timer = QTimer()
         self.check_timer.timeout.connect(self.check_earthquakes)
+        
+        # Anlık akış (Opsiyonel, koparsa sorgulama normal aralığa döner)
+        self.stream: Optional[EarthquakeStream] = None
+        self.stream_enabled = False
+        self.stream_url = EMSC_STREAM_URL
+        self.stream_region = STREAM_REGION
+    
+    def get_provider_names(self) -> List[str]:
+        """Seçilebilir veri kaynakları"""
+        return list(self.providers) + list(self.merged_providers)
     
     def set_provider(self, provider_name: str) -> None:
         """Veri sağlayıcıyı değiştir"""
+        if provider_name == self.current_provider:
+            return
         if provider_name in self.providers:
-            self.current_provider = provider_name
-            self.api_url = self.providers[provider_name]
-            # Değişiklik sonrası hemen kontrol et
+            names = [provider_name]
+        elif provider_name in self.merged_providers:
+            names = self.merged_providers[provider_name]
+        else:
+            return
+        
+        self.current_provider = provider_name
+        self.sources = [(name, self.providers[name]) for name in names]
+        # Değişiklik sonrası hemen kontrol et (İzleme açıksa)
+        if self.check_timer.isActive():
             QTimer.singleShot(100, self.check_earthquakes)
 
     def set_min_magnitude(self, magnitude: float) -> None:
         """Minimum deprem büyüklüğünü ayarla (Bildirim için)"""
         self.min_magnitude = max(0.0, magnitude)
         
-    def set_city_filter(self, city: str) -> None:
-        """Şehir filtresi ayarla (Opsiyonel)"""
-        self.city_filter = city.lower().strip() if city else None
-    
-    def set_min_magnitude(self, magnitude: float) -> None:
-        """Minimum deprem büyüklüğünü ayarla (Bildirim için)"""
-        self.min_magnitude = max(0.0, magnitude)
-        
     def set_check_interval(self, seconds: int) -> None:
         """Sorgulama aralığını saniye cinsinden ayarla"""
         self.check_interval = max(10, seconds)  # Minimum 10 saniye
-        if self.check_timer.isActive():
-            self.check_timer.start(self.check_interval * 1000)
+        self._update_poll_interval()
+
+    def _poll_interval(self) -> int:
+        """Geçerli sorgu aralığı (Akış bağlıyken sorgu sadece yedektir)"""
+        if self.stream is not None and self.stream.is_connected and self._stream_covers_filter():
+            return max(self.check_interval, STREAM_POLL_INTERVAL)
+        return self.check_interval
+
+    def _stream_covers_filter(self) -> bool:
+        """
+        Akış kayıtları bildirim filtresinden geçebilir mi?
+
+        EMSC yer adları bölge adıdır ("WESTERN TURKEY"); şehir adına göre
+        filtre akış kayıtlarını eler. Sadece yer adı filtresi varsa bildirim
+        sorgudan gelir ve sorgu aralığı uzatılmaz. Konum kuralları koordinata
+        baktığı için akışla çalışır.
+        """
+        return bool(self.geo_filter) or not self.location_matcher
+
+    def _update_poll_interval(self) -> None:
+        """Aralık değiştiyse timer'ı yeniden kur (Aynıysa sayaç sıfırlanmaz)"""
+        interval = self._poll_interval() * 1000
+        if self.check_timer.isActive() and self.check_timer.interval() != interval:
+            self.check_timer.start(interval)
+
+    def set_stream(self, enabled: bool, url: str = EMSC_STREAM_URL) -> None:
+        """Anlık akışı aç/kapat (İzleme açıksa hemen uygulanır)"""
+        url = url or EMSC_STREAM_URL
+        changed = enabled != self.stream_enabled or url != self.stream_url
+        self.stream_enabled = enabled
+        self.stream_url = url
+        if not changed:
+            return
+        
+        self._stop_stream()
+        if enabled and self.check_timer.isActive():
+            self._start_stream()
+
+    def _start_stream(self) -> None:
+        if self.stream is None:
+            self.stream = EarthquakeStream(self.stream_url)
+            self.stream.event_received.connect(self._on_stream_event)
+            self.stream.connected_changed.connect(self._on_stream_state)
+        self.stream.start()
+
+    def _stop_stream(self) -> None:
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.deleteLater()
+            self.stream = None
             
     def set_city_filter(self, city: str) -> None:
         """Şehir filtresi ayarla (Opsiyonel)"""
         self.city_filter = city.lower().strip() if city else None
+        self.location_matcher = LocationMatcher(self.city_filter)
+        self._update_poll_interval()
+
+    def set_alert_rules(self, rules: List[AlertRule]) -> None:
+        """Konuma göre uyarı kuralları (Boş liste: Yer adı filtresi kullanılır)"""
+        self.geo_filter = GeoAlertFilter(rules)
+        self._update_poll_interval()
     
     def start_monitoring(self) -> None:
         """Deprem monitörünü başlat"""
         if not self.check_timer.isActive():
             self.check_earthquakes()  # İlk kontrol
-            self.check_timer.start(self.check_interval * 1000)
+            self.check_timer.start(self._poll_interval() * 1000)
+            if self.stream_enabled:
+                self._start_stream()
     
     def stop_monitoring(self) -> None:
         """Deprem monitörünü durdur"""
         self.check_timer.stop()
+        self._stop_stream()
+
+    def close(self) -> None:
+        """İzlemeyi durdur ve geçmişi diske yaz (Uygulama kapanırken)"""
+        self.stop_monitoring()
+        if self.history is not None:
+            self.history.close()
+
+    def _on_stream_state(self, connected: bool) -> None:
+        """Akış açıldı/koptu: Sorgu aralığını ayarla"""
+        if not self.check_timer.isActive():
+            return
+        self._update_poll_interval()
+        if not connected:
+            # Akış kesildi: Arada kaçan depremler için hemen sorgula
+            self.check_earthquakes()
+
+    def _on_stream_event(self, eq: EarthquakeRecord, action: str) -> None:
+        """Akıştan gelen deprem (GUI thread'inde)"""
+        lat_min, lon_min, lat_max, lon_max = self.stream_region
+        if not (lat_min <= eq.lat <= lat_max and lon_min <= eq.lon <= lon_max):
+            return
+        
+        print(f"[AKIŞ] {action}: {eq.magnitude} {eq.location}")
+        if self.history is not None:
+            self.history.add([eq])
+        if self._is_first_check():
+            # Liste henüz öğrenilmedi, ilk sorgu sonucu beklenir
+            return
+        batch = EarthquakeBatch([eq])
+        self._announce_new(self._select_candidates(batch, self.location_matcher, self.min_magnitude, self.geo_filter))
         
+    @property
+    def is_checking(self) -> bool:
+        """Sorgu arka planda sürüyor mu?"""
+        return self._fetch_thread is not None
+
+    def _sources_key(self) -> str:
+        return "|".join(url for _, url in self.sources)
+
     def check_earthquakes(self) -> None:
-        """Yeni depremleri kontrol et (Otomatik/Manuel)"""
-        print(f"[DEBUG] Deprem kontrolü başlatıldı... URL: {self.api_url}")
+        """Yeni depremleri kontrol et (Otomatik/Manuel, arka planda)"""
+        # Önceki sorgu bitmediyse yenisini biriktirme
+        if self._fetch_thread is not None:
+            print("[DEBUG] Önceki deprem sorgusu sürüyor, bu kontrol atlandı.")
+            return
+
+        print(f"[DEBUG] Deprem kontrolü başlatıldı... Kaynak: {self.current_provider}")
+        self._fetch_thread = threading.Thread(
+            target=self._fetch_worker,
+            args=(self._sources_key(), list(self.sources), self.location_matcher, self.min_magnitude,
+                  self.geo_filter),
+            daemon=True
+        )
+        self._fetch_thread.start()
+
+    def _fetch_worker(self, key: str, sources: List[tuple], matcher: LocationMatcher,
+                      min_magnitude: float, geo: GeoAlertFilter) -> None:
+        """Kaynakları (paralel) sorgula, birleştir ve filtrele (Worker thread, UI donmaz)"""
         try:
-            response = requests.get(self.api_url, timeout=10)
-            print(f"[DEBUG] API Yanıt Kodu: {response.status_code}")
-            response.raise_for_status()
+            results = []
+            errors = []
+            if len(sources) == 1:
+                results.append(self._fetch_source(*sources[0]))
+            else:
+                with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+                    futures = {pool.submit(self._fetch_source, name, url): (name, url) for name, url in sources}
+                    for future in as_completed(futures):
+                        name, url = futures[future]
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            # İstek hatası da bozuk yanıt da sadece bu kaynağı etkiler
+                            print(f"[HATA] {name} verisi alınamadı: {e}")
+                            errors.append(f"{name}: {e}")
+                            # Diğer kurum çalışıyorsa bu kaynağın son verisiyle devam et
+                            if 'batch' in self._http_cache.get(url, {}):
+                                results.append({'batch': self._http_cache[url]['batch'], 'changed': False})
+                            continue
+                        results.append(result)
+                        # İlk yayınlayan kurum bildirimi tetikler
+                        if result['changed']:
+                            candidates = self._select_candidates(result['batch'], matcher, min_magnitude, geo)
+                            if candidates:
+                                self._source_ready.emit(key, candidates)
+                if not results or len(errors) == len(sources):
+                    self._fetch_finished.emit(key, f"Deprem verisi alınamadı: {'; '.join(errors)}")
+                    return
             
-            data = response.json()
-            if not data.get('result'):
-                print("[DEBUG] API yanıtında 'result' boş veya yok!")
+            processed_key = f"{key}|{matcher.text}|{min_magnitude}|{hash(geo)}"
+            if not any(r['changed'] for r in results) and processed_key == self._last_processed:
+                print("[DEBUG] Deprem verisi değişmedi.")
+                self._fetch_finished.emit(key, None)
                 return
             
-            earthquakes = data['result']
-            print(f"[DEBUG] Çekilen ham deprem sayısı: {len(earthquakes)}")
-            if len(earthquakes) > 0:
-                print(f"[DEBUG] İlk deprem örneği: {earthquakes[0]}")
+            if len(results) == 1:
+                batch = results[0]['batch']
+            else:
+                batch = EarthquakeBatch([record for r in results for record in r['batch'].records])
+            if not len(batch):
+                print("[DEBUG] API yanıtında 'result' boş veya yok!")
+                self._fetch_finished.emit(key, None)
+                return
             
-            self.last_data = earthquakes # Veriyi sakla
+            if self.history is not None and any(r['changed'] for r in results):
+                self.history.add(batch.records)
             
-            # Filtrelenmiş listeyi UI için hazırla ve gönder
-            display_list = []
-            for eq in earthquakes[:100]: # Son 100 deprem
-                if self._passes_basic_filter(eq):
-                     display_list.append(self._parse_earthquake(eq))
+            merged = EarthquakeBatch(merge_earthquakes(batch.records))
+            print(f"[DEBUG] Çekilen deprem sayısı: {len(batch)} (birleştirilmiş: {len(merged)})")
             
+            # Filtrelenmiş listeyi UI için hazırla (Son 100 deprem)
+            display_mask = merged.location(matcher)
+            display_mask[100:] = False
+            display_list = merged.select(display_mask)
             print(f"[DEBUG] UI listesi için filtrelenen deprem sayısı: {len(display_list)}")
-            self.data_updated.emit(display_list)
             
-            # Yeni deprem kontrolü (Sadece bildirim için)
-            self._process_new_events(earthquakes)
+            result = {
+                'earthquakes': merged.records,
+                'display_list': display_list,
+                'candidates': self._select_candidates(batch, matcher, min_magnitude, geo),
+            }
+            self._last_processed = processed_key
+            self._fetch_finished.emit(key, result)
             
         except requests.exceptions.RequestException as e:
             print(f"[HATA] İstek hatası: {e}")
-            self.error_occurred.emit(f"Deprem verisi alınamadı: {str(e)}")
+            self._fetch_finished.emit(key, f"Deprem verisi alınamadı: {str(e)}")
         except Exception as e:
             print(f"[HATA] Beklenmeyen hata: {e}")
             import traceback
             traceback.print_exc()
-            self.error_occurred.emit(f"Beklenmeyen hata: {str(e)}")
-
-    def _passes_basic_filter(self, eq: Dict) -> bool:
-        """UI listesi için temel filtre"""
-        # 1. Şehir Filtresi
-        if self.city_filter:
-            # print(f"[DEBUG] Şehir filtresi aktif: {self.city_filter}")
-            location = eq.get('title', '').lower()
-            filters = [f.strip().lower() for f in self.city_filter.split(',')]
-            if not any(f in location for f in filters):
-                return False
-        
-        # Büyüklük filtresi kaldırıldı: Listede tüm depremler görünsün (Kullanıcı isteği)
-        return True
+            self._fetch_finished.emit(key, f"Beklenmeyen hata: {str(e)}")
 
-    def _process_new_events(self, earthquakes: List[Dict]):
+    def _fetch_source(self, name: str, url: str) -> Dict:
+        """
+        Tek kaynağı koşullu istekle sorgula ve kayıtları ortak biçime çevir
+        
+        Returns:
+            {'batch': EarthquakeBatch, 'changed': bool} (Değişmediyse önceki kayıtlar)
+        """
+        cache = self._http_cache.get(url, {})
+        headers = {}
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+        
+        # Ortak istemci: Kalıcı bağlantı, sıkıştırma, yeniden deneme ve devre kesici
+        response = http_client.get(url, headers=headers, timeout=10)
+        print(f"[DEBUG] {name} API Yanıt Kodu: {response.status_code}")
+        
+        # 304: Sunucu verinin değişmediğini söyledi (Gövde yok)
+        if response.status_code == 304 and 'batch' in cache:
+            return {'batch': cache['batch'], 'changed': False}
+        response.raise_for_status()
+        
+        # ETag desteklemeyen sunucular için: Aynı içerik yeniden çözümlenmez
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        if content_hash == cache.get('hash'):
+            return {'batch': cache['batch'], 'changed': False}
+        
+        data = response.json()
+        batch = EarthquakeBatch([self._parse_earthquake(eq, name) for eq in (data.get('result') or [])])
+        
+        # Doğrulayıcılar sadece başarıyla çözümlenen veri için saklanır
+        self._http_cache[url] = {
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+            'hash': content_hash,
+            'batch': batch,
+        }
+        return {'batch': batch, 'changed': True}
+
+    def _on_source_ready(self, key: str, candidates: List[EarthquakeRecord]) -> None:
+        """Paralel modda bir kurum yanıt verdi (GUI thread'inde)"""
+        if key != self._sources_key() or self._is_first_check():
+            return
+        self._announce_new(candidates)
+
+    def _on_fetch_finished(self, key: str, result) -> None:
+        """Worker sonucu (GUI thread'inde)"""
+        self._fetch_thread = None
+        
+        # Sorgu sürerken sağlayıcı değiştiyse eski veriyi kullanma
+        if key != self._sources_key():
+            print("[DEBUG] Sağlayıcı değişti, eski deprem verisi atıldı.")
+            self._last_processed = None
+            if self.check_timer.isActive():
+                self.check_earthquakes()
+            return
+        
+        if result is None:
+            return
+        if isinstance(result, str):
+            self.error_occurred.emit(result)
+            return
+        
+        self.last_data = result['earthquakes'] # Veriyi sakla
+        self.records_updated.emit(result['display_list'])
+        if self.receivers(self.data_updated):
+            self.data_updated.emit([eq.to_dict() for eq in result['display_list']])
+        
+        # Yeni deprem kontrolü (Sadece bildirim için)
+        self._process_new_events(result['earthquakes'], result['candidates'])
+
+    def _select_candidates(self, batch: EarthquakeBatch, matcher: LocationMatcher,
+                           min_magnitude: float, geo: Optional[GeoAlertFilter] = None) -> List[EarthquakeRecord]:
+        """
+        Bildirim filtrelerinden geçen depremler (Tüm liste için tek seferde)
+        
+        Konum kuralı varsa: Kural alanı + uzaklığa göre büyüklük eşiği.
+        Yoksa: 1. Yer filtresi, 2. Minimum büyüklük.
+        Her iki durumda son 15 dakika (Tarihi okunamayan deprem bildirilir)
+        """
+        mask = batch.newer_than(NOTIFY_WINDOW, time.time())
+        if geo:
+            if mask.any():
+                mask &= geo.mask(batch)
+            return batch.select(mask)
+        
+        mask &= batch.min_magnitude(min_magnitude)
+        if matcher and mask.any():
+            mask &= batch.location(matcher)
+        return batch.select(mask)
+
+    def query_history(self, start: Optional[float] = None, end: Optional[float] = None,
+                      min_magnitude: Optional[float] = None, region: Optional[tuple] = None,
+                      location: Optional[str] = None, limit: Optional[int] = 1000) -> List[EarthquakeRecord]:
+        """
+        Geçmişte arama (Kurumların kayıtları birleştirilmiş, yeniden eskiye)
+        
+        Args: EarthquakeHistory.query ile aynı
+        """
+        if self.history is None:
+            return []
+        records = self.history.query(start, end, min_magnitude, region, location, limit)
+        return merge_earthquakes(records)
+
+    def load_history(self, start: Optional[float] = None, min_magnitude: Optional[float] = None,
+                     limit: Optional[int] = 1000) -> None:
+        """Geçmişi arka planda sorgula (Sonuç: history_loaded, yer filtresi uygulanır)"""
+        matcher = self.location_matcher
+
+        def worker():
+            try:
+                records = self.query_history(start=start, min_magnitude=min_magnitude, limit=limit)
+                batch = EarthquakeBatch(records)
+                self.history_loaded.emit(batch.select(batch.location(matcher)))
+            except Exception as e:
+                print(f"[HATA] Deprem geçmişi sorgusu: {e}")
+                self.history_loaded.emit([])
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _is_first_check(self) -> bool:
+        """İlk kurulumdaki ilk sorgu mu? (Mevcut liste okunmadan öğrenilir)"""
+        return self.last_check_time is None and not self.known_earthquakes.loaded
+
+    def _process_new_events(self, earthquakes: List[EarthquakeRecord], candidates: List[EarthquakeRecord]):
         """Yeni ve kritik depremleri tespit et (Bildirim Mantığı)"""
-        if self.last_check_time is None:
+        # İlk kurulumda (Kayıt dosyası yoksa) mevcut listeyi okumadan öğren.
+        # Kayıt varsa kapalıyken olan yeni depremler de bildirilir.
+        if self._is_first_check():
             self.last_check_time = datetime.now()
-            for eq in earthquakes[:50]:
-                self.known_earthquakes.append(self._generate_id(eq))
+            known = self.known_earthquakes
+            for event in earthquakes:
+                for eq_id in event.ids:
+                    known.add(eq_id)
+                self._remember_event(event)
+            known.expire()
+            known.save()
             return
 
-        for eq in earthquakes:
-            # Bildirim için daha sıkı filtreler
+        self._announce_new(candidates)
+        self.last_check_time = datetime.now()
+
+    def _announce_new(self, candidates: List[EarthquakeRecord]) -> None:
+        """Daha önce görülmemiş depremleri bildir"""
+        known = self.known_earthquakes
+        changed = False
+        
+        # 4. Yeni mi?
+        for eq in candidates:
+            if not known.add(eq.id):
+                continue
+            changed = True
             
-            # 1. Şehir ve Temel Filtre
-            if not self._passes_basic_filter(eq):
+            # Aynı deprem başka kurumdan zaten bildirildi mi?
+            if self._match_recent(eq):
+                print(f"[DEBUG] {eq.source} kaydı daha önce bildirilen depremle eşleşti: {eq.location}")
                 continue
+            
+            self._remember_event(eq)
+            self.earthquake_detected.emit(eq.to_dict())
+        
+        # Temizlik
+        if changed:
+            known.expire()
+            known.save()
 
-            # 2. Bildirim Limiti (Min Magnitude)
-            mag = float(eq.get('mag', 0))
-            if mag < self.min_magnitude:
+    def _match_recent(self, eq: EarthquakeRecord) -> bool:
+        """Zaman penceresindeki bildirilmiş depremlerle karşılaştır (İkili arama)"""
+        if not eq.has_time:
+            return False
+        lo = bisect.bisect_left(self._recent_times, eq.timestamp - MERGE_TIME_WINDOW)
+        hi = bisect.bisect_right(self._recent_times, eq.timestamp + MERGE_TIME_WINDOW)
+        ids = set(eq.ids or (eq.id,))
+        for i in range(lo, hi):
+            recent = self._recent_events[i]
+            if ids.intersection(recent.ids or (recent.id,)):
+                return True
+            # Aynı kurumun iki kaydı ayrı depremdir (Artçılar)
+            if eq.source in (recent.sources or (recent.source,)):
                 continue
-                
-            # 3. Zaman Kontrolü (Son 15 dakika)
-            try:
-                eq_date_str = eq.get('date_time') or eq.get('date')
-                # Tarih formatını düzelt (API tire veya nokta kullanabiliyor)
-                eq_date_str = eq_date_str.replace('.', '-')
-                eq_date = datetime.strptime(eq_date_str, "%Y-%m-%d %H:%M:%S")
-                
-                if datetime.now() - eq_date > timedelta(minutes=15):
-                    continue
-            except:
-                pass 
-
-            # 4. Yeni mi?
-            eq_id = self._generate_id(eq)
-            if eq_id not in self.known_earthquakes:
-                self.known_earthquakes.append(eq_id)
-                self.earthquake_detected.emit(self._parse_earthquake(eq))
+            if is_same_event(recent, eq):
+                return True
+        return False
+
+    def _remember_event(self, eq: EarthquakeRecord) -> None:
+        if not eq.has_time:
+            return
+        i = bisect.bisect_right(self._recent_times, eq.timestamp)
+        self._recent_times.insert(i, eq.timestamp)
+        self._recent_events.insert(i, eq)
         
-        # Temizlik
-        if len(self.known_earthquakes) > 200:
-            self.known_earthquakes = self.known_earthquakes[-100:]
-            
-        self.last_check_time = datetime.now()
+        # Bir günden eski olaylar artık eşleşemez
+        cut = bisect.bisect_left(self._recent_times, time.time() - 86400)
+        if cut:
+            del self._recent_times[:cut]
+            del self._recent_events[:cut]
 
-    def _parse_earthquake(self, eq: Dict) -> Dict:
-        """API verisini standart formata çevir"""
-        return {
-            'magnitude': float(eq.get('mag', 0)),
-            'location': eq.get('title', 'Bilinmiyor'),
-            'depth': eq.get('depth', 0),
-            'date': eq.get('date_time') or eq.get('date', ''),
-            'lat': eq.get('geojson', {}).get('coordinates', [0, 0])[1],
-            'lon': eq.get('geojson', {}).get('coordinates', [0, 0])[0]
-        }
+    def _parse_earthquake(self, eq: Dict, source: str = '') -> EarthquakeRecord:
+        """API verisini ortak kayda çevir (Deprem başına bir kez)"""
+        coordinates = (eq.get('geojson') or {}).get('coordinates') or [0, 0]
+        date = eq.get('date_time') or eq.get('date', '')
+        return EarthquakeRecord(
+            id=self._generate_id(eq),
+            source=eq.get('provider') or source,
+            magnitude=float(eq.get('mag', 0)),
+            location=eq.get('title', 'Bilinmiyor'),
+            depth=eq.get('depth', 0),
+            date=date,
+            timestamp=parse_event_time(date),
+            lat=float(coordinates[1]),
+            lon=float(coordinates[0])
+        )
 
     def _generate_id(self, eq: Dict) -> str:
+        """Kalıcı deprem ID'si (Sağlayıcının kendi ID'si, yoksa tarih+büyüklük+yer)"""
+        eq_id = eq.get('earthquake_id')
+        if eq_id:
+            return str(eq_id)
         date_str = eq.get('date_time') or eq.get('date')
         return f"{date_str}_{eq.get('mag')}_{eq.get('title')}"
 
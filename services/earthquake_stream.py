@@ -0,0 +1,333 @@
+"""
+Anlık deprem akışı - EMSC seismicportal biçiminde WebSocket / SSE aboneliği
+
+ws:// veya wss:// adresleri WebSocket, http:// veya https:// adresleri
+Server-Sent Events olarak dinlenir. Her iki durumda da mesajlar EMSC
+biçimindedir: {"action": "create", "data": {GeoJSON Feature}}
+"""
+import base64
+import hashlib
+import json
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict
+from urllib.parse import urlsplit
+from services.http_client import http_client
+from PyQt6.QtCore import QObject, pyqtSignal
+from services.earthquake_records import EarthquakeRecord
+
+
+EMSC_STREAM_URL = "wss://www.seismicportal.eu/standing_order/websocket"
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+MAX_MESSAGE = 1024 * 1024
+
+
+def parse_emsc_event(message: Dict) -> Optional[EarthquakeRecord]:
+    """EMSC mesajını deprem servisinin ortak kayıt biçimine çevir"""
+    feature = message.get('data') or {}
+    props = feature.get('properties') or {}
+    try:
+        # Zaman UTC gelir ("2024-02-05T20:30:45.1Z"), liste yerel saati gösterir
+        timestamp = datetime.fromisoformat(props['time'].replace('Z', '+00:00')).timestamp()
+        return EarthquakeRecord(
+            id=f"EMSC:{props.get('unid') or feature.get('id')}",
+            source='EMSC',
+            magnitude=float(props.get('mag', 0)),
+            location=props.get('flynn_region', 'Bilinmiyor'),
+            depth=props.get('depth', 0),
+            date=datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+            timestamp=timestamp,
+            lat=float(props.get('lat', 0)),
+            lon=float(props.get('lon', 0))
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[AKIŞ] Mesaj çözümlenemedi: {e}")
+        return None
+
+
+class EarthquakeStream(QObject):
+    """
+    Kalıcı deprem akışı aboneliği (Arka plan thread'i)
+
+    Bağlantı koparsa artan beklemeyle yeniden bağlanır. Belirli süre hiç
+    veri gelmezse (WebSocket'te ping yanıtı dahil) bağlantı ölü sayılır.
+    """
+
+    # Sinyaller (Worker thread'den, kuyruklu bağlantı ile GUI thread'ine)
+    event_received = pyqtSignal(object, str)  # EarthquakeRecord, action ("create"/"update")
+    connected_changed = pyqtSignal(bool)  # Akış açıldı/koptu
+
+    def __init__(self, url: str = EMSC_STREAM_URL, heartbeat_timeout: int = 90):
+        super().__init__()
+        self.url = url
+        self.heartbeat_timeout = heartbeat_timeout  # Saniye
+        self.ping_interval = max(5, heartbeat_timeout // 3)
+        self.is_connected = False
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._response = None
+        self._buffer = bytearray()
+        self._fragments: Optional[bytearray] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Aboneliği başlat"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Aboneliği durdur (Bekleyen okuma soket kapatılarak kesilir)"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._close()
+        self._thread.join(timeout=2)
+        self._thread = None
+        self._set_connected(False)
+
+    def _run(self) -> None:
+        delay = 1.0
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                if urlsplit(self.url).scheme in ('ws', 'wss'):
+                    self._run_websocket()
+                else:
+                    self._run_sse()
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    print(f"[AKIŞ] Bağlantı koptu: {e}")
+            finally:
+                self._close()
+                self._set_connected(False)
+
+            # Uzun süre açık kalan bağlantıdan sonra hızlı yeniden dene
+            if time.monotonic() - started > 60:
+                delay = 1.0
+            if self._stop_event.wait(delay):
+                break
+            delay = min(delay * 2, 60.0)
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected != self.is_connected:
+            self.is_connected = connected
+            print(f"[AKIŞ] {'Bağlandı' if connected else 'Bağlantı yok'}: {self.url}")
+            self.connected_changed.emit(connected)
+
+    def _close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)  # Başka thread'deki recv'i uyandırır
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+        response, self._response = self._response, None
+        if response is not None:
+            response.close()
+
+    def _dispatch(self, text: str) -> None:
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        record = parse_emsc_event(message)
+        if record:
+            self.event_received.emit(record, str(message.get('action', 'create')))
+
+    # --- Server-Sent Events ---
+
+    def _run_sse(self) -> None:
+        # Okuma zaman aşımı = kalp atışı: Sunucu yorum satırı (":") bile göndermezse kopar
+        self._response = http_client.stream(
+            self.url, timeout=(10, self.heartbeat_timeout),
+            headers={'Accept': 'text/event-stream', 'Cache-Control': 'no-cache'}
+        )
+        self._response.raise_for_status()
+        self._set_connected(True)
+
+        data_lines = []
+        # chunk_size=1: Satır geldiği anda işlenir (Varsayılan 512 baytlık parça
+        # dolana kadar bekler; alt katman zaten tamponlu olduğu için ucuz)
+        for line in self._response.iter_lines(chunk_size=1, decode_unicode=True):
+            if self._stop_event.is_set():
+                return
+            if line is None:
+                continue
+            if line == '':
+                # Boş satır olayı bitirir
+                if data_lines:
+                    self._dispatch("\n".join(data_lines))
+                    data_lines = []
+                continue
+            if line.startswith(':'):
+                continue  # Yorum / kalp atışı
+            field, _, value = line.partition(':')
+            if field == 'data':
+                data_lines.append(value[1:] if value.startswith(' ') else value)
+        raise ConnectionError("Akış sunucu tarafından kapatıldı")
+
+    # --- WebSocket ---
+
+    def _run_websocket(self) -> None:
+        parts = urlsplit(self.url)
+        secure = parts.scheme == 'wss'
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+        sock = socket.create_connection((host, port), timeout=10)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        self._sock = sock
+        self._buffer = bytearray()
+        self._fragments = None
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            "User-Agent: TB2ASJ\r\n\r\n"
+        ).encode('latin-1'))
+
+        # El sıkışma yanıtı
+        while b"\r\n\r\n" not in self._buffer:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("El sıkışma sırasında bağlantı kapandı")
+            self._buffer += chunk
+            if len(self._buffer) > 16384:
+                raise ConnectionError("Geçersiz el sıkışma yanıtı")
+        end = self._buffer.index(b"\r\n\r\n") + 4
+        head = bytes(self._buffer[:end]).decode('latin-1')
+        del self._buffer[:end]
+
+        expected = base64.b64encode(hashlib.sha1((key + WS_GUID).encode('latin-1')).digest()).decode()
+        if " 101 " not in head.split("\r\n", 1)[0] or expected not in head:
+            raise ConnectionError(f"WebSocket reddedildi: {head.splitlines()[0]}")
+
+        self._set_connected(True)
+        sock.settimeout(self.ping_interval)
+        last_received = time.monotonic()
+
+        while not self._stop_event.is_set():
+            try:
+                opcode, payload = self._read_frame()
+            except socket.timeout:
+                # Sessizlik: Ping gönder, çok uzun sürdüyse bağlantı ölü
+                if time.monotonic() - last_received > self.heartbeat_timeout:
+                    raise ConnectionError("Kalp atışı alınamadı")
+                self._send_frame(0x9, b"tb2asj")
+                continue
+
+            last_received = time.monotonic()
+            if opcode == 0x1:
+                self._dispatch(payload.decode('utf-8', errors='replace'))
+            elif opcode == 0x9:
+                self._send_frame(0xA, payload)
+            elif opcode == 0x8:
+                raise ConnectionError("Sunucu bağlantıyı kapattı")
+
+    def _read_frame(self):
+        """Tam bir mesaj gelene kadar oku (Zaman aşımında tampon korunur)"""
+        while True:
+            frame = self._parse_frame()
+            if frame is not None:
+                opcode, fin, payload = frame
+                if opcode in (0x1, 0x2) and not fin:
+                    self._fragments = bytearray(payload)
+                    continue
+                if opcode == 0x0:
+                    if self._fragments is None:
+                        continue
+                    self._fragments += payload
+                    if len(self._fragments) > MAX_MESSAGE:
+                        raise ConnectionError("Mesaj çok büyük")
+                    if not fin:
+                        continue
+                    opcode, payload, self._fragments = 0x1, bytes(self._fragments), None
+                return opcode, payload
+
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("Bağlantı kapandı")
+            self._buffer += chunk
+
+    def _parse_frame(self):
+        """Tampondaki ilk çerçeveyi çöz; eksikse None (Tampona dokunmaz)"""
+        buf = self._buffer
+        if len(buf) < 2:
+            return None
+        fin = bool(buf[0] & 0x80)
+        opcode = buf[0] & 0x0F
+        masked = buf[1] & 0x80
+        length = buf[1] & 0x7F
+        offset = 2
+        if length == 126:
+            if len(buf) < 4:
+                return None
+            length = struct.unpack_from('!H', buf, 2)[0]
+            offset = 4
+        elif length == 127:
+            if len(buf) < 10:
+                return None
+            length = struct.unpack_from('!Q', buf, 2)[0]
+            offset = 10
+        if length > MAX_MESSAGE:
+            raise ConnectionError("Mesaj çok büyük")
+
+        mask = b""
+        if masked:
+            mask = bytes(buf[offset:offset + 4])
+            offset += 4
+        if len(buf) < offset + length:
+            return None
+
+        payload = bytes(buf[offset:offset + length])
+        del buf[:offset + length]
+        if masked and length:
+            payload = _apply_mask(payload, mask)
+        return opcode, fin, payload
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        """İstemci çerçevesi (RFC 6455: İstemci her zaman maskeler)"""
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        self._sock.sendall(header + mask + _apply_mask(payload, mask))
+
+
+def _apply_mask(data: bytes, mask: bytes) -> bytes:
+    """WebSocket maskesi (Tek büyük tamsayı XOR'u)"""
+    length = len(data)
+    if not length:
+        return data
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
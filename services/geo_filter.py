@@ -0,0 +1,207 @@
+"""
+Konuma göre deprem uyarısı - İstasyon çevresi (yarıçap) ve çokgen kuralları
+
+Her kural bir merkez (istasyon koordinatı), isteğe bağlı yarıçap ve/veya
+çokgen ile uzaklıkla artan büyüklük eşiğinden oluşur. Uzaklıklar tüm
+deprem listesi için tek seferde (NumPy) hesaplanır. Çok sayıda istasyonun
+kuralları ızgara indeksiyle eşlenir: Her deprem sadece bulunduğu hücreye
+dokunan kurallarla karşılaştırılır.
+"""
+import math
+from typing import NamedTuple, Optional, List, Dict, Tuple, Sequence
+import numpy as np
+from services.earthquake_records import EarthquakeBatch
+
+
+EARTH_RADIUS_KM = 6371.0
+GRID_DEG = 1.0  # Izgara hücresi (derece)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Bir noktadan dizideki noktalara büyük daire uzaklığı (km)"""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def points_in_polygon(lats: np.ndarray, lons: np.ndarray,
+                      polygon: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """Işın atma (Noktalar toplu, döngü sadece kenarlar üzerinde)"""
+    inside = np.zeros(len(lats), dtype=bool)
+    n = len(polygon)
+    for i in range(n):
+        lat1, lon1 = polygon[i]
+        lat2, lon2 = polygon[i - 1]
+        if lat1 == lat2:
+            continue
+        crosses = (lat1 > lats) != (lat2 > lats)
+        lon_at = lon1 + (lats - lat1) * (lon2 - lon1) / (lat2 - lat1)
+        inside ^= crosses & (lons < lon_at)
+    return inside
+
+
+class AlertRule(NamedTuple):
+    """
+    Tek uyarı kuralı
+
+    Alan: Yarıçap dairesi ve/veya çokgen (İkisi de yoksa her yer).
+    Eşik: min_magnitude + magnitude_per_100km * uzaklık / 100
+    """
+    name: str
+    lat: float
+    lon: float
+    radius_km: float = 0.0              # 0: Daire yok
+    min_magnitude: float = 4.0          # Merkezdeki eşik
+    magnitude_per_100km: float = 0.0    # Uzaklaştıkça eklenen eşik
+    polygon: Tuple[Tuple[float, float], ...] = ()  # (lat, lon) köşeleri
+
+    @classmethod
+    def from_dict(cls, data: Dict, min_magnitude: float = 4.0) -> 'AlertRule':
+        """Ayar dosyasındaki kuraldan oluştur"""
+        return cls(
+            name=str(data.get('name', 'İstasyon')),
+            lat=float(data.get('lat', 0)),
+            lon=float(data.get('lon', 0)),
+            radius_km=float(data.get('radius_km', 0)),
+            min_magnitude=float(data.get('min_magnitude', min_magnitude)),
+            magnitude_per_100km=float(data.get('magnitude_per_100km', 0)),
+            polygon=tuple((float(p[0]), float(p[1])) for p in data.get('polygon') or ())
+        )
+
+    @property
+    def is_global(self) -> bool:
+        return self.radius_km <= 0 and len(self.polygon) < 3
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Alanı kapsayan kutu (lat_min, lon_min, lat_max, lon_max)"""
+        boxes = []
+        if self.radius_km > 0:
+            dlat = self.radius_km / 111.2
+            coslat = math.cos(math.radians(self.lat))
+            dlon = 180.0 if coslat < 0.01 else min(180.0, dlat / coslat)
+            boxes.append((self.lat - dlat, self.lon - dlon, self.lat + dlat, self.lon + dlon))
+        if len(self.polygon) >= 3:
+            lats = [p[0] for p in self.polygon]
+            lons = [p[1] for p in self.polygon]
+            boxes.append((min(lats), min(lons), max(lats), max(lons)))
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def evaluate(self, magnitude: np.ndarray, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Verilen depremler için eşleşme maskesi"""
+        distance = haversine_km(self.lat, self.lon, lats, lons)
+        mask = magnitude >= self.min_magnitude + self.magnitude_per_100km * distance / 100.0
+        if self.is_global or not mask.any():
+            return mask
+        area = np.zeros(len(lats), dtype=bool)
+        if self.radius_km > 0:
+            area |= distance <= self.radius_km
+        if len(self.polygon) >= 3:
+            area |= points_in_polygon(lats, lons, self.polygon)
+        return mask & area
+
+
+class GeoAlertFilter:
+    """
+    Kural kümesi + ızgara indeksi (Kurallar değiştiğinde bir kez kurulur)
+
+    Boş küme False sayılır; servis bu durumda eski yer adı filtresine döner.
+    """
+
+    def __init__(self, rules: Sequence[AlertRule] = ()):
+        self.rules: Tuple[AlertRule, ...] = tuple(rules)
+        self._global: List[int] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+
+        for index, rule in enumerate(self.rules):
+            if rule.is_global:
+                self._global.append(index)
+                continue
+            lat_min, lon_min, lat_max, lon_max = rule.bounds()
+            for cell_lat in range(math.floor(lat_min / GRID_DEG), math.floor(lat_max / GRID_DEG) + 1):
+                for cell_lon in range(math.floor(lon_min / GRID_DEG), math.floor(lon_max / GRID_DEG) + 1):
+                    self._grid.setdefault((cell_lat, _wrap_cell(cell_lon)), []).append(index)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GeoAlertFilter) and other.rules == self.rules
+
+    def __hash__(self) -> int:
+        return hash(self.rules)
+
+    def __repr__(self) -> str:
+        return f"GeoAlertFilter({len(self.rules)} kural)"
+
+    def _candidates(self, batch: EarthquakeBatch) -> Dict[int, np.ndarray]:
+        """Kural -> olası deprem indeksleri (Izgara üzerinden)"""
+        n = len(batch)
+        result: Dict[int, List[np.ndarray]] = {}
+        everything = np.arange(n)
+        for index in self._global:
+            result[index] = [everything]
+
+        if self._grid and n:
+            cell_lat = np.floor(batch.lat / GRID_DEG).astype(np.int64)
+            cell_lon = np.floor(batch.lon / GRID_DEG).astype(np.int64)
+            cells, inverse = np.unique(np.stack([cell_lat, cell_lon], axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind='stable')
+            splits = np.cumsum(np.bincount(inverse, minlength=len(cells)))[:-1]
+            for (lat_key, lon_key), members in zip(cells, np.split(order, splits)):
+                for index in self._grid.get((int(lat_key), _wrap_cell(int(lon_key))), ()):
+                    result.setdefault(index, []).append(members)
+
+        return {index: np.concatenate(parts) for index, parts in result.items()}
+
+    def matches(self, batch: EarthquakeBatch) -> Dict[int, np.ndarray]:
+        """
+        Kural bazında eşleşen depremler (Çok istasyonlu değerlendirme)
+
+        Returns:
+            Kural indeksi -> eşleşen deprem indeksleri (Eşleşmeyen kural yok)
+        """
+        matched = {}
+        for index, members in self._candidates(batch).items():
+            hit = self.rules[index].evaluate(batch.magnitude[members], batch.lat[members], batch.lon[members])
+            if hit.any():
+                matched[index] = members[hit]
+        return matched
+
+    def mask(self, batch: EarthquakeBatch) -> np.ndarray:
+        """Herhangi bir kurala uyan depremler"""
+        mask = np.zeros(len(batch), dtype=bool)
+        for members in self.matches(batch).values():
+            mask[members] = True
+        return mask
+
+
+def _wrap_cell(cell_lon: int) -> int:
+    """Boylam hücresini -180..180 aralığına sar (Tarih çizgisi)"""
+    cells = int(round(360 / GRID_DEG))
+    return (cell_lon + cells // 2) % cells - cells // 2
+
+
+def rules_from_settings(area: Optional[Dict], extra: Optional[List[Dict]],
+                        min_magnitude: float) -> List[AlertRule]:
+    """
+    Ayarlardan kurallar
+
+    Args:
+        area: 'earthquake.alert_area' (İstasyon çevresi, enabled ile açılır)
+        extra: 'earthquake.alert_rules' (Diğer istasyonlar / bölgeler)
+        min_magnitude: Kuralda eşik yoksa kullanılacak büyüklük
+    """
+    rules = []
+    if area and area.get('enabled'):
+        rules.append(AlertRule.from_dict(area, min_magnitude))
+    for data in extra or ():
+        try:
+            rules.append(AlertRule.from_dict(data, min_magnitude))
+        except (TypeError, ValueError, IndexError) as e:
+            print(f"[HATA] Geçersiz deprem uyarı kuralı atlandı: {e}")
+    return rules
@@ -0,0 +1,320 @@
+"""
+Ortak HTTP istemcisi - Tüm servislerin ağ istekleri tek yerden
+
+- Tek oturum (keep-alive): Aynı sunucuya her istekte yeni bağlantı açılmaz
+- Sunucu başına eşzamanlı istek sınırı
+- Geçici hatalarda (bağlantı, zaman aşımı, 5xx) rastgele gecikmeli yeniden deneme
+- Uç nokta başına devre kesici: Üst üste hata veren adrese bir süre istek yapılmaz
+- Uç nokta başına istek sayısı, hata ve süre istatistikleri
+
+İstekler çağıran thread'de yapılır (Servisler zaten worker thread kullanır).
+Hatalar requests istisnaları olarak döner; mevcut except blokları aynen çalışır.
+"""
+import random
+import threading
+import time
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+
+RETRY_STATUSES = (500, 502, 503, 504)
+RETRY_METHODS = ('GET', 'HEAD')
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Uç nokta devre kesici nedeniyle geçici olarak kapalı"""
+
+
+class HostBusyError(requests.exceptions.ConnectionError):
+    """Sunucu başına istek sınırı dolu ve süre içinde yer açılmadı"""
+
+
+class CircuitBreaker:
+    """
+    Kapalı -> (failure_threshold hata) -> Açık -> (reset_timeout) -> Yarı açık
+
+    Yarı açıkta tek bir deneme isteğine izin verilir; başarılıysa devre
+    kapanır, değilse süre yeniden başlar.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial = False
+            if self.state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """İzin alınıp istek yapılamadı: Yarı açık deneme hakkını geri ver"""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"[AĞ] Devre kesici açıldı ({self.failures} hata), {self.reset_timeout:.0f} sn beklenecek")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class HttpClient:
+    """Paylaşılan, thread güvenli HTTP istemcisi"""
+
+    def __init__(self, max_per_host: int = 4, retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 8.0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 timeout: float = 10.0):
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff          # İlk bekleme üst sınırı (saniye), her denemede iki katı
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'TB2ASJ',
+        })
+        self._mount()
+
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def _mount(self) -> None:
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.max_per_host)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def configure(self, max_per_host: Optional[int] = None, retries: Optional[int] = None,
+                  failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None) -> None:
+        """Ayarları değiştir (Sonraki isteklerden itibaren geçerli)"""
+        with self._lock:
+            if max_per_host is not None and max(1, max_per_host) != self.max_per_host:
+                self.max_per_host = max(1, max_per_host)
+                self._host_slots.clear()  # Süren istekler eski sınırı bırakır
+                self._mount()
+            if retries is not None:
+                self.retries = max(0, retries)
+            if failure_threshold is not None:
+                self.failure_threshold = max(1, failure_threshold)
+            if reset_timeout is not None:
+                self.reset_timeout = max(1.0, reset_timeout)
+            for breaker in self._breakers.values():
+                breaker.failure_threshold = self.failure_threshold
+                breaker.reset_timeout = self.reset_timeout
+
+    # --- İstekler ---
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method: str, url: str, timeout=None, retries: Optional[int] = None,
+                retry_statuses: Tuple[int, ...] = RETRY_STATUSES, **kwargs) -> requests.Response:
+        """
+        İstek yap (Çağıran thread'de, gerekirse yeniden dener)
+
+        Args:
+            timeout: Saniye veya (bağlanma, okuma) (Varsayılan: self.timeout)
+            retries: Yeniden deneme sayısı (Sadece GET/HEAD; varsayılan: self.retries)
+            retry_statuses: Yeniden denenecek HTTP kodları
+
+        Raises:
+            requests.exceptions.RequestException (CircuitOpenError dahil)
+        """
+        method = method.upper()
+        host, endpoint = _endpoint(url)
+        breaker = self._breaker(endpoint)
+        slots = self._slots(host)
+        timeout = self.timeout if timeout is None else timeout
+        if retries is None:
+            retries = self.retries
+        if method not in RETRY_METHODS:
+            retries = 0
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._record(endpoint, rejected=True)
+                raise CircuitOpenError(f"{endpoint} geçici olarak devre dışı (Üst üste hata)")
+
+            if not slots.acquire(timeout=_total_timeout(timeout)):
+                breaker.release()  # Yarı açık deneme hakkı kullanılmadı
+                self._record(endpoint, error="Sunucu istek sınırı dolu")
+                raise HostBusyError(f"{host} için istek sınırı dolu")
+            started = time.monotonic()
+            error = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                error = e
+            except BaseException:
+                breaker.release()  # Sonuç bilinmiyor, deneme hakkı geri verilir
+                raise
+            finally:
+                slots.release()
+            elapsed = time.monotonic() - started
+
+            if error is not None:
+                # Her istek hatası devreye yazılır (Yarı açık deneme askıda kalmaz);
+                # sadece bağlantı ve zaman aşımı hataları yeniden denenir. Devre bu
+                # hatayla açıldıysa beklenmez: Asıl hata CircuitOpenError'a dönüşmez
+                breaker.record_failure()
+                self._record(endpoint, elapsed, error=str(error), retry=attempt > 0)
+                if (attempt >= retries or not isinstance(error, RETRY_ERRORS)
+                        or breaker.state == 'open'):
+                    raise error
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in retry_statuses:
+                breaker.record_failure()
+                self._record(endpoint, elapsed, status=response.status_code, retry=attempt > 0,
+                             error=f"HTTP {response.status_code}")
+                if attempt < retries and breaker.state != 'open':
+                    delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                    response.close()
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                return response
+
+            # 4xx dahil: Sunucu yanıt veriyor, devre kapalı kalır
+            breaker.record_success()
+            self._record(endpoint, elapsed, status=response.status_code, retry=attempt > 0)
+            return response
+
+    def stream(self, url: str, **kwargs) -> requests.Response:
+        """
+        Uzun süreli akış bağlantısı (SSE)
+
+        Sunucu sınırı ve yeniden deneme uygulanmaz (Bağlantı saatlerce açık
+        kalır, yeniden bağlanmayı akış servisi yönetir); sadece bağlanma
+        süresi istatistiğe girer.
+        """
+        _, endpoint = _endpoint(url)
+        started = time.monotonic()
+        try:
+            response = self.session.get(url, stream=True, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._record(endpoint, time.monotonic() - started, error=str(e))
+            raise
+        self._record(endpoint, time.monotonic() - started, status=response.status_code)
+        return response
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Tam rastgele (full jitter) üstel bekleme; sunucu Retry-After verdiyse o"""
+        if retry_after:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _slots(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slots = self._host_slots.get(host)
+            if slots is None:
+                slots = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slots
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    # --- İstatistik ---
+
+    def _record(self, endpoint: str, elapsed: float = 0.0, status: Optional[int] = None,
+                error: Optional[str] = None, retry: bool = False, rejected: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = {
+                    'requests': 0, 'errors': 0, 'retries': 0, 'rejected': 0,
+                    'total_time': 0.0, 'max_time': 0.0, 'last_status': None, 'last_error': None,
+                }
+            if rejected:
+                stats['rejected'] += 1
+                return
+            stats['requests'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            if retry:
+                stats['retries'] += 1
+            if status is not None:
+                stats['last_status'] = status
+            if error is not None:
+                stats['errors'] += 1
+                stats['last_error'] = error
+
+    def stats(self) -> Dict[str, Dict]:
+        """Uç nokta başına istatistik (Süreler ms, devre durumu dahil)"""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._stats.items():
+                count = stats['requests']
+                breaker = self._breakers.get(endpoint)
+                result[endpoint] = {
+                    'requests': count,
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'rejected': stats['rejected'],
+                    'avg_ms': round(stats['total_time'] / count * 1000, 1) if count else 0.0,
+                    'max_ms': round(stats['max_time'] * 1000, 1),
+                    'last_status': stats['last_status'],
+                    'last_error': stats['last_error'],
+                    'circuit': breaker.state if breaker else 'closed',
+                }
+            return result
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def _endpoint(url: str) -> Tuple[str, str]:
+    """(Sunucu, uç nokta): Sorgu parametreleri uç noktaya dahil değil"""
+    parts = urlsplit(url)
+    return parts.netloc, f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def _total_timeout(timeout) -> float:
+    if isinstance(timeout, tuple):
+        return float(sum(t for t in timeout if t))
+    return float(timeout or 30)
+
+
+# Uygulama genelinde tek istemci
+http_client = HttpClient()
@@ -8,6 +8,7 @@ import os
 import time
 import pygame
 from services.tts.factory import TTSFactory
+from services.weather_service import age_note
 
 # Pygame mixer init
 try:
@@ -21,12 +22,25 @@ class NotificationManager(QObject):
     # Sinyaller
     notification_started = pyqtSignal(str)
     notification_finished = pyqtSignal()
+    voices_loaded = pyqtSignal(str, list)  # Sağlayıcı adı, ses listesi
+    # TTS thread'i -> GUI thread (Thread'de QTimer çalışmaz, PTT açık kalırdı)
+    _speech_done = pyqtSignal()
     
     def __init__(self, radio_connection=None, vox_controller=None):
         super().__init__()
         self.radio_connection = radio_connection
         self.vox_controller = vox_controller
         self.tts_lock = threading.Lock()
+        self._speech_done.connect(self._on_speech_done)
+        
+        # Sağlayıcı başına ses listesi (Sistem motoru listeyi pyttsx3 başlatarak verir)
+        self._voice_cache: Dict[str, List[Dict]] = {}
+        self._voice_jobs = set()  # Listesi taranan sağlayıcılar
+        self._voice_lock = threading.Lock()
+        
+        # TOT dolarsa çalan anonsu kes
+        if self.radio_connection:
+            self.radio_connection.tx_timeout.connect(self._on_tx_timeout)
         
         # TTS Provider kurulumu
         self.providers = TTSFactory.get_providers()
@@ -55,8 +69,66 @@ class NotificationManager(QObject):
                 print(f"Provider değişti: {provider_name}")
                 break
                 
+    def _find_provider(self, provider_name: Optional[str]):
+        if provider_name is None:
+            return self.current_provider
+        for p in self.providers:
+            if p.get_name() == provider_name:
+                return p
+        return None
+                
     def get_available_voices(self) -> List[Dict]:
-        return self.current_provider.get_voices()
+        """Seçili sağlayıcının sesleri (Önbellekte yoksa engelleyici)"""
+        name = self.current_provider.get_name()
+        voices = self.get_cached_voices(name)
+        if voices is None:
+            voices = self._load_voices(self.current_provider)
+        return voices
+    
+    def get_cached_voices(self, provider_name: Optional[str] = None) -> Optional[List[Dict]]:
+        """Önbellekteki ses listesi (Henüz taranmadıysa None)"""
+        provider = self._find_provider(provider_name)
+        if provider is None:
+            return []
+        with self._voice_lock:
+            voices = self._voice_cache.get(provider.get_name())
+        return list(voices) if voices is not None else None
+    
+    def request_voices(self, provider_name: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Ses listesini iste (Engellemez)
+        
+        Önbellekte varsa hemen döner. Yoksa liste arka planda taranır, sonuç
+        voices_loaded sinyaliyle gelir ve None döner.
+        """
+        voices = self.get_cached_voices(provider_name)
+        if voices is not None:
+            return voices
+        provider = self._find_provider(provider_name)
+        name = provider.get_name()
+        with self._voice_lock:
+            if name in self._voice_jobs:
+                return None  # Tarama zaten sürüyor
+            self._voice_jobs.add(name)
+        threading.Thread(target=self._voices_worker, args=(provider,), daemon=True).start()
+        return None
+    
+    def _voices_worker(self, provider) -> None:
+        """Worker thread: Sağlayıcının seslerini tara"""
+        voices = self._load_voices(provider)
+        with self._voice_lock:
+            self._voice_jobs.discard(provider.get_name())
+        self.voices_loaded.emit(provider.get_name(), voices)
+    
+    def _load_voices(self, provider) -> List[Dict]:
+        try:
+            voices = provider.get_voices()
+        except Exception as e:
+            print(f"Ses listesi alınamadı ({provider.get_name()}): {e}")
+            return []
+        with self._voice_lock:
+            self._voice_cache[provider.get_name()] = list(voices)
+        return voices
     
     def set_voice(self, voice_id: str):
         self.current_provider.set_voice(voice_id)
@@ -136,11 +208,14 @@ class NotificationManager(QObject):
             finally:
                 pass
             
-            # PTT kapat (gecikmeli)
-            if self.radio_connection:
-                QTimer.singleShot(200, self._finish_notification)
-            else:
-                self._finish_notification()
+            # PTT kapat (gecikmeli, GUI thread'inde)
+            self._speech_done.emit()
+    
+    def _on_speech_done(self):
+        if self.radio_connection:
+            QTimer.singleShot(200, self._finish_notification)
+        else:
+            self._finish_notification()
     
     def _finish_notification(self):
         """Bildirimi sonlandır"""
@@ -153,14 +228,28 @@ class NotificationManager(QObject):
         
         self.notification_finished.emit()
 
+    def _on_tx_timeout(self, reason: str):
+        """İletim zorla kesildi: Çalan sesi durdur"""
+        try:
+            if pygame.mixer.get_init() and pygame.mixer.music.get_busy():
+                print(f"Anons kesildi ({reason})")
+                pygame.mixer.music.stop()
+        except Exception as e:
+            print(f"Anons durdurulamadı: {e}")
+
     def send_notification(self, message: str, use_radio: bool = True) -> None:
         """Bildirim gönder"""
+        if use_radio and self.radio_connection and not self.radio_connection.can_transmit():
+            print(f"İletim kilitli (TOT soğuma süresi veya görev döngüsü sınırı), anons atlandı: {message}")
+            return
+        
         self.notification_started.emit(message)
         
         if use_radio and self.vox_controller:
             self.vox_was_enabled = self.vox_controller.vox_enabled
             if self.vox_was_enabled:
-                self.vox_controller.disable_vox()
+                # PTT açık kalır, aşağıdaki ptt_on iletimi devralır
+                self.vox_controller.disable_vox(keep_ptt=True)
             
             if self.radio_connection:
                 self.radio_connection.ptt_on()
@@ -178,6 +267,9 @@ class NotificationManager(QObject):
             f"Sıcaklık {weather_data.get('temperature', 0)} derece. "
             f"{weather_data.get('description', '')}."
         )
+        note = age_note(weather_data)
+        if note:
+            message = f"{message} {note}"
         self.send_notification(message)
 
     def send_earthquake_notification(self, earthquake_data: dict) -> None:
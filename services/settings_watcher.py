@@ -0,0 +1,92 @@
+"""
+Ayar dosyası izleyici - settings.json elle değiştirilince yeniden başlatmadan uygula
+
+QFileSystemWatcher Linux'ta inotify kullanır (Diğer sistemlerde kendi
+yöntemi). İzleme kurulamazsa dosya belirli aralıkla yoklanır. Editörler
+dosyayı birkaç adımda yazdığı için değişiklikler kısa bir süre biriktirilip
+tek seferde yüklenir; sadece değişen ayarların aboneleri çağrılır.
+"""
+import os
+from typing import Optional, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QFileSystemWatcher
+
+
+class SettingsWatcher(QObject):
+    """settings.json izleyici (GUI thread'inde çalışır)"""
+
+    # Sinyaller
+    reloaded = pyqtSignal()  # Dosya dışarıdan değişti ve yüklendi
+
+    def __init__(self, settings, debounce_ms: int = 300, poll_interval: float = 2.0):
+        super().__init__()
+        self.settings = settings
+        self.path = str(settings.settings_file)
+        self.poll_interval = poll_interval
+
+        self._watcher: Optional[QFileSystemWatcher] = None
+        self._stat: Optional[Tuple[float, int]] = None
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._check)
+
+        # Yedek: Değişiklik bildirimi alınamazsa yoklama
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self._poll)
+
+    @property
+    def is_running(self) -> bool:
+        return self._watcher is not None or self._poll_timer.isActive()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        watcher = QFileSystemWatcher(self)
+        # Dizin de izlenir: Dosya yerine taşınarak yazılınca (Atomik kayıt,
+        # çoğu editör) dosya izlemesi düşer ve yeniden eklenmesi gerekir
+        watching = bool(watcher.addPath(os.path.dirname(self.path)))
+        if os.path.exists(self.path):
+            watching = bool(watcher.addPath(self.path)) and watching
+        if watching:
+            watcher.fileChanged.connect(self._on_changed)
+            watcher.directoryChanged.connect(self._on_changed)
+            self._watcher = watcher
+            print(f"[AYAR] Dosya izleniyor: {self.path}")
+        else:
+            watcher.deleteLater()
+            self._stat = self._file_stat()
+            self._poll_timer.start(int(self.poll_interval * 1000))
+            print(f"[AYAR] Dosya izlenemiyor, {self.poll_interval:.0f} sn'de bir yoklanacak: {self.path}")
+
+    def stop(self) -> None:
+        self._debounce.stop()
+        self._poll_timer.stop()
+        if self._watcher is not None:
+            self._watcher.deleteLater()
+            self._watcher = None
+
+    def _on_changed(self, path: str) -> None:
+        self._debounce.start()  # Her yeni olay süreyi baştan başlatır
+
+    def _poll(self) -> None:
+        stat = self._file_stat()
+        if stat != self._stat:
+            self._stat = stat
+            self._debounce.start()
+
+    def _file_stat(self) -> Optional[Tuple[float, int]]:
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime, st.st_size)
+        except OSError:
+            return None
+
+    def _check(self) -> None:
+        # Yerine taşınan dosya izlemeden düşmüş olabilir
+        if self._watcher is not None and self.path not in self._watcher.files() and os.path.exists(self.path):
+            self._watcher.addPath(self.path)
+
+        if self.settings.reload_if_changed():
+            print("[AYAR] settings.json değişti, yeni değerler uygulandı")
+            self.reloaded.emit()
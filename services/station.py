@@ -0,0 +1,453 @@
+"""
+İstasyon çekirdeği - Telsiz, ses ve servisleri arayüzden bağımsız birleştirir
+
+Hem ana pencere hem de arayüzsüz (headless) mod aynı bileşenleri buradan
+kullanır. Otomatik anonslar (deprem, hava durumu, saat, batarya) burada
+bağlanır; arayüz sadece görsel tepkileri ekler.
+"""
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from datetime import datetime
+from config import settings
+from radio.connection import RadioConnection
+from radio.device_registry import DeviceRegistry
+from radio.tx_governor import TXGovernor
+from radio.audio_manager import AudioManager
+from radio.vox_controller import VOXController
+from services.weather_service import WeatherService, parse_locations
+from services.earthquake_service import EarthquakeService
+from services.notification_manager import NotificationManager
+from services.battery_service import BatteryService
+from services.clock_service import ClockService, get_natural_time_text
+from services.api_server import ApiServer
+from services.geo_filter import rules_from_settings
+from services.weather_alerts import ForecastThresholds
+from services.http_client import http_client
+from services.settings_watcher import SettingsWatcher
+
+
+class Station(QObject):
+    """Telsiz istasyonu - Bileşenlerin sahibi"""
+
+    # Sinyaller
+    connection_changed = pyqtSignal(bool)
+
+    def __init__(self):
+        super().__init__()
+
+        # İlk açılışta hava durumu anonsunu engellemek için bayrak
+        self._first_weather_check = True
+        # Manuel "Hava durumunu oku" isteği (Ayardan bağımsız okunur)
+        self._announce_next_weather = False
+        # Ayar abonelikleri (İlk apply_settings'te kurulur)
+        self._subscribed = False
+
+        # Bileşenler
+        self.device_registry = DeviceRegistry(settings.get('devices.poll_interval', 5))
+        self.tx_governor = TXGovernor()
+        self.radio_connection = RadioConnection(self.tx_governor)
+        self.audio_manager = AudioManager(self.device_registry)
+        self.vox_controller = VOXController(self.audio_manager, self.radio_connection)
+
+        # Servisler
+        self.weather_service = WeatherService(cache_file=str(settings.config_dir / "weather_cache.json"))
+        self.earthquake_service = EarthquakeService(
+            state_file=str(settings.config_dir / "earthquake_known.json"),
+            history_file=str(settings.config_dir / "earthquake_history.db")
+            if settings.get('earthquake.history_enabled', True) else None)
+        self.notification_manager = NotificationManager(self.radio_connection, self.vox_controller)
+        self.battery_service = BatteryService()
+        self.clock_service = ClockService()
+
+        # Ağ üzerinden kontrol ve telemetri (apply_settings ile açılır)
+        self.api_server = ApiServer(self)
+        # settings.json elle düzenlenince yeniden başlatmadan uygula
+        self.settings_watcher = SettingsWatcher(settings)
+
+        self._connect_signals()
+
+    def _connect_signals(self):
+        """Otomatik anons sinyallerini bağla"""
+        self.earthquake_service.earthquake_detected.connect(self._on_earthquake_detected)
+        self.weather_service.weather_updated.connect(self._on_weather_updated)
+        self.weather_service.weather_alert.connect(self._on_weather_alert)
+        self.battery_service.warning_threshold_reached.connect(self._on_battery_warning)
+        self.clock_service.request_announcement.connect(self.announce)
+
+    def start(self) -> None:
+        """Cihaz taramasını ve saati başlat (Servisler apply_settings ile başlar)"""
+        self.device_registry.start()  # Cihazlar arka planda taranır
+        self.clock_service.start()
+        # Ses listesi önceden taranır, ayarlar penceresi beklemez
+        self.notification_manager.request_voices(settings.get('notification.provider'))
+        if settings.get('general.watch_config', True):
+            self.settings_watcher.start()
+
+    def stop(self) -> None:
+        """Her şeyi durdur"""
+        self.api_server.stop()
+        self.disconnect_radio()
+        self.weather_service.stop_auto_update()
+        self.weather_service.cache.flush()  # Bekleyen önbellek değişiklikleri
+        self.earthquake_service.close()
+        self.clock_service.stop()
+        self.device_registry.stop()
+        self.settings_watcher.stop()
+        settings.flush()  # Bekleyen ayar değişiklikleri
+
+    def apply_settings(self) -> None:
+        """Tüm ayarları bileşenlere uygula (Açılışta; sonraki değişiklikler aboneliklerle gelir)"""
+        self._apply_devices()
+        self._apply_audio_devices()
+        self._apply_audio_levels()
+        self._apply_tx()
+        self._apply_ptt()
+        self._apply_notification()
+        self._apply_network()
+        self._apply_weather()
+        self._apply_earthquake_filters()
+        self._apply_earthquake_monitoring()
+        self._apply_api()
+
+        if not self._subscribed:
+            self._subscribe_settings()
+
+    def _subscribe_settings(self) -> None:
+        """Değişen ayarı sadece ilgili bileşene uygula (Diğerleri yeniden başlamaz)"""
+        self._subscribed = True
+        subscriptions = {
+            'audio.input_device': self._apply_audio_devices,
+            'audio.output_device': self._apply_audio_devices,
+            'audio.mic_level': self._apply_audio_levels,
+            'audio.speaker_level': self._apply_audio_levels,
+            'audio.vox_threshold': self._apply_audio_levels,
+            'audio.ptt_lead_ms': self._apply_ptt,
+            'audio.ptt_tail_ms': self._apply_ptt,
+            'devices.poll_interval': self._apply_devices,
+            'tx': self._apply_tx,
+            'notification': self._apply_notification,
+            'general.roger_beep': self._apply_notification,
+            'general.hourly_announce': self._apply_notification,
+            'network': self._apply_network,
+            'weather': self._apply_weather,
+            'earthquake.provider': self._apply_earthquake_filters,
+            'earthquake.min_magnitude': self._apply_earthquake_filters,
+            'earthquake.city_filter': self._apply_earthquake_filters,
+            'earthquake.alert_area': self._apply_earthquake_filters,
+            'earthquake.alert_rules': self._apply_earthquake_filters,
+            'earthquake.enabled': self._apply_earthquake_monitoring,
+            'earthquake.interval': self._apply_earthquake_monitoring,
+            'earthquake.stream_enabled': self._apply_earthquake_monitoring,
+            'earthquake.stream_url': self._apply_earthquake_monitoring,
+            'api': self._apply_api,
+        }
+        for key, apply in subscriptions.items():
+            settings.subscribe(key, lambda value, apply=apply: apply())
+
+    def _apply_devices(self) -> None:
+        """Hot-plug tarama aralığı"""
+        self.device_registry.set_poll_interval(int(settings.get('devices.poll_interval', 5)))
+
+    def _apply_audio_devices(self) -> None:
+        """Ses cihazları (Stream'ler sadece gerçekten değiştiyse, bir kez yeniden açılır)"""
+        self.audio_manager.configure(
+            settings.get('audio.input_device'),
+            settings.get('audio.output_device')
+        )
+
+    def _apply_audio_levels(self) -> None:
+        self.audio_manager.set_mic_level(settings.get('audio.mic_level', 50))
+        self.audio_manager.set_speaker_level(settings.get('audio.speaker_level', 75))
+        self.audio_manager.set_vox_threshold(settings.get('audio.vox_threshold', 30))
+
+    def _apply_tx(self) -> None:
+        """İletim sınırları (TOT)"""
+        self.tx_governor.configure(
+            int(settings.get('tx.timeout', 180)),
+            int(settings.get('tx.lockout', 30)),
+            int(settings.get('tx.duty_window', 600)),
+            int(settings.get('tx.max_duty_cycle', 0))
+        )
+
+    def _apply_ptt(self) -> None:
+        """PTT sıralaması"""
+        self.vox_controller.set_lead_time(settings.get('audio.ptt_lead_ms', 150))
+        self.vox_controller.set_tail_time(settings.get('audio.ptt_tail_ms', 300))
+
+    def _apply_notification(self) -> None:
+        """Bildirim, roger beep ve saat anonsu"""
+        provider = settings.get('notification.provider')
+        if provider:
+            self.notification_manager.set_provider(provider)
+
+        voice_id = settings.get('notification.voice_id')
+        if voice_id:
+            self.notification_manager.set_voice(voice_id)
+
+        test_msg = settings.get('notification.test_message')
+        if test_msg:
+            self.notification_manager.set_test_message(test_msg)
+
+        # Roger Beep Ayarı
+        self.notification_manager.roger_beep_enabled = settings.get('general.roger_beep', False)
+
+        # Saat anonsu
+        self.clock_service.announce_enabled = settings.get('general.hourly_announce', False)
+
+    def _apply_network(self) -> None:
+        """Ortak HTTP istemcisi (Tüm servisler)"""
+        http_client.configure(
+            max_per_host=int(settings.get('network.max_per_host', 4)),
+            retries=int(settings.get('network.retries', 2)),
+            failure_threshold=int(settings.get('network.breaker_failures', 5)),
+            reset_timeout=float(settings.get('network.breaker_reset', 30)))
+
+    def _apply_weather(self) -> None:
+        """Hava durumu servisi (Konum veya anahtar değiştiyse hemen yeniden sorgulanır)"""
+        service = self.weather_service
+        city = settings.get('weather.city', 'Istanbul')
+        country = settings.get('weather.country', 'TR')
+        api_key = settings.get('weather.api_key', '')
+        changed = (city, country, api_key) != (service.city, service.country, service.api_key)
+
+        service.set_location(city, country)
+        service.set_locations(parse_locations(settings.get('weather.locations', []), country))
+        # Son bilinen veri ağ beklenmeden gösterilir (Anahtar olmasa da)
+        service.restore_cached()
+
+        forecast = settings.get('weather.forecast', {}) or {}
+        service.set_forecast_mode(bool(forecast.get('enabled', False)),
+                                  ForecastThresholds.from_dict(forecast))
+
+        if not api_key or not settings.get('weather.auto_announce', True):
+            service.stop_auto_update()
+            return
+
+        service.set_api_key(api_key)
+        service.set_rate_limits(
+            int(settings.get('weather.max_calls_per_minute', 60)),
+            int(settings.get('weather.max_calls_per_day', 1000)))
+        service.set_update_interval(settings.get('weather.update_interval', 3600))
+
+        if service.update_timer.isActive():
+            if changed:
+                service.fetch_weather()
+        else:
+            service.start_auto_update()
+
+    def _apply_earthquake_filters(self) -> None:
+        """Deprem kaynağı ve bildirim filtreleri"""
+        min_magnitude = float(settings.get('earthquake.min_magnitude', 4.0))
+        self.earthquake_service.set_provider(settings.get('earthquake.provider', "Kandilli"))
+        self.earthquake_service.set_min_magnitude(min_magnitude)
+        self.earthquake_service.set_city_filter(settings.get('earthquake.city_filter', ''))
+        self.earthquake_service.set_alert_rules(rules_from_settings(
+            settings.get('earthquake.alert_area'),
+            settings.get('earthquake.alert_rules', []),
+            min_magnitude
+        ))
+
+    def _apply_earthquake_monitoring(self) -> None:
+        """Deprem sorgu aralığı, anlık akış ve izleme"""
+        self.earthquake_service.set_check_interval(int(settings.get('earthquake.interval', 60)))
+        self.earthquake_service.set_stream(
+            settings.get('earthquake.stream_enabled', False),
+            settings.get('earthquake.stream_url', '')
+        )
+
+        if settings.get('earthquake.enabled', True):
+            self.earthquake_service.start_monitoring()
+        else:
+            self.earthquake_service.stop_monitoring()
+
+    def _apply_api(self) -> None:
+        """HTTP / WebSocket API"""
+        self.api_server.configure(
+            settings.get('api.host', '127.0.0.1'),
+            int(settings.get('api.port', 8765)),
+            settings.get('api.token', ''),
+            float(settings.get('api.telemetry_hz', 5))
+        )
+        if settings.get('api.enabled', False):
+            self.api_server.start()
+        else:
+            self.api_server.stop()
+
+    # --- Telsiz ---
+
+    def connect_radio(self) -> bool:
+        """
+        Telsiz ile bağlan ve ses izlemesini başlat
+
+        Returns:
+            Ses sistemi başlatıldıysa True (COM hatası AUX modunda sorun değildir)
+        """
+        port = settings.get('radio.port', '')
+        connection_type = settings.get('radio.connection_type', 'COM')
+
+        # COM modu seçiliyse port kontrolü yap
+        if connection_type == 'COM' and not port:
+            ports = self.device_registry.get_ports()
+            if ports:
+                port = ports[0]
+            else:
+                # Uyarı verme, sadece logla (kullanıcı AUX kullanıyor olabilir)
+                print("COM Port bulunamadı, AUX modu deneniyor.")
+
+        self.radio_connection.connect(
+            port,
+            settings.get('radio.baudrate', 9600),
+            settings.get('radio.databits', 8),
+            settings.get('radio.parity', 'N'),
+            settings.get('radio.stopbits', 1)
+        )
+
+        # AUX modunda hata olsa bile devam et
+        # Her durumda ses monitörünü başlat
+        self.audio_manager.start_monitoring()
+
+        # VOX'u etkinleştir (eğer ayarlardaysa)
+        if settings.get('audio.vox_enabled', True):
+            self.vox_controller.enable_vox()
+
+        self.connection_changed.emit(True)
+        return self.audio_manager.is_monitoring
+
+    def disconnect_radio(self) -> None:
+        """Telsiz bağlantısını kes"""
+        try:
+            # 1. VOX devre dışı
+            self.vox_controller.disable_vox()
+
+            # 2. Ses monitörünü durdur (Kritik)
+            self.audio_manager.stop_monitoring()
+
+            # 3. Bağlantıyı kapat
+            self.radio_connection.disconnect()
+
+        except Exception as e:
+            print(f"Bağlantı kesilirken hata: {e}")
+        finally:
+            self.connection_changed.emit(False)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.radio_connection.is_connected or self.audio_manager.is_monitoring
+
+    def set_vox(self, enabled: bool) -> None:
+        """VOX aç/kapat"""
+        if enabled:
+            self.vox_controller.enable_vox()
+        else:
+            self.vox_controller.disable_vox()
+
+    def set_ptt(self, active: bool) -> None:
+        """Manuel PTT"""
+        if active and not self.audio_manager.is_monitoring:
+            self.audio_manager.start_monitoring()
+        self.vox_controller.manual_ptt(active)
+
+    # --- Anonslar ---
+
+    def announce(self, text: str, use_radio: bool = True) -> None:
+        """Metni telsizden oku"""
+        self.notification_manager.send_notification(text, use_radio)
+
+    def read_last_earthquake(self) -> None:
+        """Son depremi sesli oku"""
+        if self.earthquake_service.last_data:
+            eq = self.earthquake_service.last_data[0].to_dict()
+            text = self.earthquake_service.get_announcement_text(eq)
+            self.notification_manager.send_notification(text)
+        else:
+            self.notification_manager.send_notification("Henüz deprem verisi alınmadı.", use_radio=False)
+
+    def read_current_time(self) -> None:
+        """Saati sesli oku"""
+        now = datetime.now()
+        self.notification_manager.send_notification(get_natural_time_text(now.hour, now.minute))
+
+        # Saat başıysa ve ayar açıksa 1 dakika sonra hava durumunu oku
+        if now.minute == 0 and settings.get('weather.hourly', False):
+            QTimer.singleShot(60000, self.read_current_weather)
+
+    def read_current_weather(self) -> None:
+        """Hava durumunu güncelle ve (ayardan bağımsız) sesli oku"""
+        self._announce_next_weather = True
+        self.weather_service.fetch_weather_manual()
+
+    def send_test_notification(self) -> None:
+        self.notification_manager.send_test_notification()
+
+    def _on_earthquake_detected(self, data: dict):
+        """Deprem tespit edildiğinde"""
+        self.notification_manager.send_earthquake_notification(data)
+
+    def _on_weather_updated(self, data: dict):
+        """Hava durumu güncellendiğinde"""
+        if data.get('restored') and not self._announce_next_weather:
+            # Önceki çalışmadan kalan veri: Sadece gösterilir, okunmaz
+            return
+        
+        if self._announce_next_weather:
+            self._announce_next_weather = False
+            self._first_weather_check = False
+            self.notification_manager.send_weather_notification(data)
+            return
+
+        # İlk açılışta sesli okumayı engelle
+        if self._first_weather_check:
+            print("[DEBUG] İlk açılış -> Hava durumu anonsu ATLANDI.")
+            self._first_weather_check = False
+            return
+
+        # Sesli oku (Sadece otomatik ayarı açıksa)
+        # Ayar anahtarı: 'weather_hourly' (SettingsDialog ile uyumlu)
+        should_announce = settings.get("weather_hourly", True)
+
+        if should_announce:
+            self.notification_manager.send_weather_notification(data)
+
+    def _on_weather_alert(self, message: str):
+        """Tahminde yeni aşılan eşik veya resmi uyarı"""
+        print(f"[HAVA UYARISI] {message}")
+        self.notification_manager.send_notification(message)
+
+    def _on_battery_warning(self, message: str):
+        """Batarya seviyesi kritik olduğunda sesli uyarı yap"""
+        if settings.get('power.warning_enabled', True):
+            # Ayarlardaki mesajı kullan veya gelen mesajı (varsayılan) kullan
+            custom_msg = settings.get('power.warning_message', "")
+            display_msg = custom_msg if custom_msg else message
+            self.notification_manager.send_notification(display_msg)
+
+    # --- Durum ---
+
+    def get_status(self) -> dict:
+        """İstasyonun anlık durumu (Kontrol soketi / API için)"""
+        weather = self.weather_service.get_last_data()
+        return {
+            'connected': self.radio_connection.is_connected,
+            'audio_monitoring': self.audio_manager.is_monitoring,
+            'vox_enabled': self.vox_controller.vox_enabled,
+            'transmitting': self.vox_controller.is_transmitting,
+            'audio_level': round(self.audio_manager.current_level, 1),
+            'tx': self.tx_governor.get_stats(),
+            'weather': weather,
+            'earthquake_count': len(self.earthquake_service.last_data),
+            'network': http_client.stats(),
+        }
+
+    def get_telemetry(self) -> dict:
+        """Sık yayınlanan hafif durum (Ses seviyesi ve TX)"""
+        governor = self.tx_governor
+        return {
+            'connected': self.is_connected,
+            'vox_enabled': self.vox_controller.vox_enabled,
+            'transmitting': self.vox_controller.is_transmitting,
+            'keyed': governor.is_keyed,
+            'audio_level': round(self.audio_manager.current_level, 1),
+            'vox_threshold': self.audio_manager.vox_threshold,
+            'duty_cycle': round(governor.duty_cycle(), 1),
+            'locked': governor.is_locked,
+            'lockout_remaining': round(governor.lockout_remaining(), 1),
+        }
@@ -1,6 +1,6 @@
-import requests
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 import os
+from services.http_client import http_client
 
 class UpdateChecker(QThread):
     """Arka planda güncelleme kontrolü yapan thread"""
@@ -17,7 +17,7 @@ class UpdateChecker(QThread):
         try:
             # GitHub API'den son release bilgisini al
             api_url = f"https://api.github.com/repos/{self.repo_url}/releases/latest"
-            response = requests.get(api_url, timeout=10)
+            response = http_client.get(api_url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
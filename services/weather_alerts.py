@@ -0,0 +1,192 @@
+"""
+Hava tahmini ve uyarılar - One Call 3.0 saatlik tahmin / resmi uyarılar
+
+Saatlik tahmin sözlük listesi olarak tutulmaz: Her sorguda bir kez sayısal
+dizilere (NumPy) çevrilir. Eşik kontrolü sorgular arasında durumu hatırlar;
+duyuru sadece eşik aşılmaya başladığında (ve her resmi uyarı için bir kez)
+yapılır, aynı durum her sorguda tekrar okunmaz.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional, List, Dict, Tuple
+import numpy as np
+
+
+MS_TO_KMH = 3.6
+RESET_RATIO = 0.8  # Değer eşiğin %80'inin altına inince durum sıfırlanır (Salınım olmaz)
+
+
+class WeatherAlert(NamedTuple):
+    """Resmi meteoroloji uyarısı"""
+    sender: str
+    event: str
+    start: float  # Epoch
+    end: float
+    description: str
+
+    @property
+    def key(self) -> Tuple[str, str, float]:
+        return (self.sender, self.event, self.start)
+
+    @classmethod
+    def from_onecall(cls, item: Dict) -> "WeatherAlert":
+        return cls(
+            sender=str(item.get('sender_name', '')),
+            event=str(item.get('event', '')),
+            start=float(item.get('start', 0)),
+            end=float(item.get('end', 0)),
+            description=str(item.get('description', ''))
+        )
+
+
+class HourlyForecast:
+    """Saatlik tahmin (Sütun dizileri; rüzgar km/s, yağış mm/saat)"""
+
+    def __init__(self, times: np.ndarray, temperature: np.ndarray, wind: np.ndarray,
+                 gust: np.ndarray, rain: np.ndarray, pop: np.ndarray,
+                 alerts: Optional[List[WeatherAlert]] = None):
+        self.times = times
+        self.temperature = temperature
+        self.wind = wind
+        self.gust = gust
+        self.rain = rain
+        self.pop = pop  # Yağış olasılığı (0-1)
+        self.alerts = alerts or []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_onecall(cls, data: Dict) -> "HourlyForecast":
+        """One Call yanıtından ('hourly' ve 'alerts' bölümleri)"""
+        hourly = data.get('hourly') or []
+        n = len(hourly)
+        times = np.empty(n, dtype=np.int64)
+        temperature = np.empty(n)
+        wind = np.empty(n)
+        gust = np.empty(n)
+        rain = np.zeros(n)
+        pop = np.zeros(n)
+        for i, hour in enumerate(hourly):
+            times[i] = hour.get('dt', 0)
+            temperature[i] = hour.get('temp', np.nan)
+            wind[i] = hour.get('wind_speed', 0.0)
+            gust[i] = hour.get('wind_gust', 0.0)  # Hamle verisi her saatte olmayabilir
+            rain[i] = (hour.get('rain') or {}).get('1h', 0.0) + (hour.get('snow') or {}).get('1h', 0.0)
+            pop[i] = hour.get('pop', 0.0)
+        alerts = [WeatherAlert.from_onecall(item) for item in data.get('alerts') or []]
+        return cls(times, temperature, wind * MS_TO_KMH, gust * MS_TO_KMH, rain, pop, alerts)
+
+    def window(self, now: float, hours: int) -> slice:
+        """Şimdiden itibaren 'hours' saatlik bölüm"""
+        first = int(np.searchsorted(self.times, now - 3600, side='right'))
+        return slice(first, first + hours)
+
+
+class ForecastThresholds(NamedTuple):
+    """Duyuru eşikleri (0: Kapalı)"""
+    lookahead_hours: int = 6
+    wind_kmh: float = 50.0
+    gust_kmh: float = 70.0
+    rain_mm_per_hour: float = 10.0
+    official_alerts: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "ForecastThresholds":
+        data = data or {}
+        default = cls()
+        return cls(
+            lookahead_hours=max(1, int(data.get('lookahead_hours', default.lookahead_hours))),
+            wind_kmh=float(data.get('wind_kmh', default.wind_kmh)),
+            gust_kmh=float(data.get('gust_kmh', default.gust_kmh)),
+            rain_mm_per_hour=float(data.get('rain_mm_per_hour', default.rain_mm_per_hour)),
+            official_alerts=bool(data.get('official_alerts', default.official_alerts))
+        )
+
+
+# (Eşik alanı, tahmin dizisi, duyuru kalıbı)
+CONDITIONS = [
+    ('wind_kmh', 'wind', "kuvvetli rüzgar bekleniyor. Saat {hour} civarı saatte {value:.0f} kilometre"),
+    ('gust_kmh', 'gust', "fırtına şiddetinde rüzgar bekleniyor. Saat {hour} civarı hamlelerde saatte {value:.0f} kilometre"),
+    ('rain_mm_per_hour', 'rain', "kuvvetli yağış bekleniyor. Saat {hour} civarı saatte {value:.0f} milimetre"),
+]
+
+
+class ForecastMonitor:
+    """
+    Sorgular arası eşik takibi (Konum başına)
+
+    check() yeni tahmini bir önceki durumla karşılaştırır ve sadece yeni
+    başlayan durumlar için duyuru metni döndürür.
+    """
+
+    def __init__(self, thresholds: Optional[ForecastThresholds] = None):
+        self.thresholds = thresholds or ForecastThresholds()
+        self._active: Dict[Tuple[str, str], bool] = {}  # (Konum, eşik) -> aşılıyor mu
+        self._alerts: Dict[str, Dict[Tuple, float]] = {}  # Konum -> duyurulan uyarı -> bitişi
+
+    def set_thresholds(self, thresholds: ForecastThresholds) -> None:
+        """
+        Eşikleri değiştir
+
+        Sadece değişen eşiğin durumu sıfırlanır (Ayar her kaydedildiğinde
+        çağrılır; süren durumlar tekrar duyurulmaz). Bakılan süre değişirse
+        tüm durumlar yeniden değerlendirilir.
+        """
+        old, self.thresholds = self.thresholds, thresholds
+        if thresholds.lookahead_hours != old.lookahead_hours:
+            self._active.clear()
+            return
+        changed = {field for field, _, _ in CONDITIONS if getattr(thresholds, field) != getattr(old, field)}
+        for state in [state for state in self._active if state[1] in changed]:
+            del self._active[state]
+
+    def check(self, city: str, forecast: HourlyForecast, now: Optional[float] = None) -> List[str]:
+        """
+        Yeni tahmin (GUI thread'i)
+
+        Returns:
+            Duyurulacak metinler (Yeni aşılan eşikler ve yeni resmi uyarılar)
+        """
+        now = datetime.now().timestamp() if now is None else now
+        t = self.thresholds
+        messages = []
+
+        window = forecast.window(now, t.lookahead_hours)
+        times = forecast.times[window]
+        for field, column, template in CONDITIONS:
+            limit = getattr(t, field)
+            state = (city, field)
+            values = getattr(forecast, column)[window]
+            if limit <= 0 or len(values) == 0:
+                self._active.pop(state, None)
+                continue
+
+            peak = int(np.argmax(values))
+            if values[peak] >= limit:
+                if not self._active.get(state):
+                    first = int(np.argmax(values >= limit))
+                    hour = datetime.fromtimestamp(int(times[first])).strftime("%H:%M")
+                    messages.append(f"{city} için {template.format(hour=hour, value=values[peak])}.")
+                self._active[state] = True
+            elif values[peak] < limit * RESET_RATIO:
+                self._active[state] = False
+
+        if t.official_alerts:
+            announced = self._alerts.setdefault(city, {})
+            for key in [key for key, end in announced.items() if end and end < now]:
+                del announced[key]  # Süresi dolan uyarı unutulur
+            for alert in forecast.alerts:
+                if alert.key in announced or (alert.end and alert.end < now):
+                    continue
+                announced[alert.key] = alert.end
+                messages.append(_alert_text(city, alert))
+        return messages
+
+
+def _alert_text(city: str, alert: WeatherAlert) -> str:
+    text = f"{city} için resmi hava uyarısı: {alert.event}."
+    if alert.end:
+        text += f" Geçerlilik saat {datetime.fromtimestamp(alert.end).strftime('%H:%M')} kadar."
+    if alert.sender:
+        text += f" Kaynak: {alert.sender}."
+    return text
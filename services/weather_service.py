@@ -2,27 +2,300 @@
 Hava durumu servisi - OpenWeatherMap API entegrasyonu
 """
 import requests
-from typing import Optional, Dict
+import atexit
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Tuple, List
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from datetime import datetime
+from services.weather_alerts import HourlyForecast, ForecastMonitor, ForecastThresholds
+from services.http_client import http_client
+
+
+class WeatherError(Exception):
+    """Kullanıcıya gösterilecek hava durumu hatası"""
+
+
+class WeatherCache:
+    """
+    Değişmeyen sorgu sonuçları (Dosyada kalıcı)
+    
+    - Şehir -> koordinat (Geocoding sonucu bir şehir için hiç değişmez)
+    - API anahtarı -> çalışan API sürümü ("2.5" veya "3.0"), her sorguda
+      başarısız bir istek yapmamak için. Anahtarın kendisi değil özeti saklanır.
+    - Konum -> son başarılı hava durumu (Açılışta ve bağlantı yokken sunulur)
+    
+    Değişiklikler dosyaya hemen yazılmaz: Arka plan thread'i save_delay
+    kadar sessizlik bekleyip tek seferde yazar (Çağıran thread beklemez).
+    """
+    
+    def __init__(self, path: Optional[str] = None, save_delay: float = 2.0):
+        self.path = path
+        self.save_delay = save_delay  # Saniye
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Aynı anda tek yazma
+        self._wakeup = threading.Condition(self._lock)
+        self._dirty = False
+        self._writer: Optional[threading.Thread] = None
+        self._data: Dict[str, Dict] = {'geocode': {}, 'api_version': {}, 'snapshots': {}}
+        self._load()
+        atexit.register(self.flush)
+    
+    @staticmethod
+    def _location_key(city: str, country: str) -> str:
+        return f"{city.strip().lower()},{country.strip().lower()}"
+    
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        return hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:16]
+    
+    def get_location(self, city: str, country: str) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            value = self._data['geocode'].get(self._location_key(city, country))
+        return (value[0], value[1]) if value else None
+    
+    def set_location(self, city: str, country: str, lat: float, lon: float) -> None:
+        with self._lock:
+            self._data['geocode'][self._location_key(city, country)] = [lat, lon]
+            self._schedule_save()
+    
+    def get_api_version(self, api_key: str) -> Optional[str]:
+        with self._lock:
+            return self._data['api_version'].get(self._key_id(api_key))
+    
+    def set_api_version(self, api_key: str, version: Optional[str]) -> None:
+        key_id = self._key_id(api_key)
+        with self._lock:
+            if self._data['api_version'].get(key_id) == version:
+                return
+            if version:
+                self._data['api_version'][key_id] = version
+            else:
+                self._data['api_version'].pop(key_id, None)
+            self._schedule_save()
+    
+    def get_snapshots(self) -> Dict[str, Tuple[float, Dict]]:
+        """Kayıtlı son veriler: Konum anahtarı -> (alındığı an (epoch), veri)"""
+        with self._lock:
+            snapshots = dict(self._data['snapshots'])
+        return {key: (value['fetched_at'], value['data']) for key, value in snapshots.items()
+                if isinstance(value, dict) and 'fetched_at' in value and 'data' in value}
+    
+    def set_snapshot(self, key: str, fetched_at: float, data: Dict) -> None:
+        with self._lock:
+            self._data['snapshots'][key] = {'fetched_at': fetched_at, 'data': data}
+            self._schedule_save()
+    
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for section in self._data:
+                self._data[section].update(data.get(section) or {})
+        except Exception as e:
+            print(f"Hava durumu önbelleği okunamadı: {e}")
+    
+    def save(self) -> None:
+        """Hemen dosyaya yaz (Çağıran thread'de, önce geçici dosya)"""
+        if not self.path:
+            return
+        with self._write_lock:
+            try:
+                with self._lock:
+                    self._dirty = False
+                    content = json.dumps(self._data, ensure_ascii=False)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Hava durumu önbelleği kaydedilemedi: {e}")
+    
+    def flush(self) -> None:
+        """Bekleyen değişiklik varsa hemen yaz (Kapanışta)"""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self.save()
+    
+    def _schedule_save(self) -> None:
+        """Yazıcı thread'ini uyandır (self._lock altında çağrılır)"""
+        if not self.path:
+            return
+        self._dirty = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        self._wakeup.notify()
+    
+    def _write_loop(self) -> None:
+        """Değişiklikler durulunca yaz (Her yeni değişiklik beklemeyi yeniden başlatır)"""
+        with self._lock:
+            while True:
+                while not self._dirty:
+                    self._wakeup.wait()
+                while self._wakeup.wait(self.save_delay):
+                    pass
+                self._lock.release()
+                try:
+                    self.save()
+                finally:
+                    self._lock.acquire()
+
+
+def format_age(seconds: float) -> str:
+    """Veri yaşı (Okunabilir: "40 dakika", "3 saat", "2 gün")"""
+    minutes = max(1, int(seconds // 60))
+    if minutes < 120:
+        return f"{minutes} dakika"
+    if minutes < 48 * 60:
+        return f"{minutes // 60} saat"
+    return f"{minutes // 1440} gün"
+
+
+def age_note(data: Dict) -> str:
+    """Eski veri için duyuru eki (Taze veride boş)"""
+    if not data or not data.get('stale'):
+        return ""
+    return f"Bu bilgi {format_age(time.time() - data.get('fetched_at', time.time()))} öncesine aittir."
+
+
+class RateLimiter:
+    """
+    OpenWeatherMap kotası (Dakikalık ve günlük kayan pencere)
+    
+    Worker thread'leri istekten önce acquire() çağırır; sınır doluysa
+    yer açılana kadar bekler. 429 yanıtında block() ile istekler durdurulur.
+    """
+    
+    def __init__(self, per_minute: int = 60, per_day: int = 1000):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self._minute: deque = deque()
+        self._day: deque = deque()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def configure(self, per_minute: int, per_day: int) -> None:
+        with self._lock:
+            self.per_minute = max(1, per_minute)
+            self.per_day = max(1, per_day)
+    
+    def block(self, seconds: float) -> None:
+        """Sunucu "çok fazla istek" dedi: Bir süre hiç istek yapma"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+    
+    def calls_today(self) -> int:
+        with self._lock:
+            self._prune(time.monotonic())
+            return len(self._day)
+    
+    def _prune(self, now: float) -> None:
+        while self._minute and now - self._minute[0] >= 60:
+            self._minute.popleft()
+        while self._day and now - self._day[0] >= 86400:
+            self._day.popleft()
+    
+    def _wait_time(self, now: float) -> float:
+        self._prune(now)
+        wait = self._blocked_until - now
+        if len(self._minute) >= self.per_minute:
+            wait = max(wait, 60 - (now - self._minute[0]))
+        if len(self._day) >= self.per_day:
+            wait = max(wait, 86400 - (now - self._day[0]))
+        return max(0.0, wait)
+    
+    def acquire(self, timeout: float = 30.0) -> bool:
+        """İstek hakkı al (Gerekirse bekle). Süre içinde hak açılmazsa False"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    self._minute.append(now)
+                    self._day.append(now)
+                    return True
+            if now + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+
+
+def location_key(city: str, country: str) -> str:
+    """Konumun görünen anahtarı ("Ankara,TR")"""
+    return f"{city.strip()},{country.strip().upper()}"
+
+
+def parse_locations(items, default_country: str = "TR") -> List[Tuple[str, str]]:
+    """Ayardaki konum listesi ("Ankara", "Izmir,TR" veya {"city":..., "country":...})"""
+    locations = []
+    for item in items or ():
+        if isinstance(item, dict):
+            city, country = item.get('city', ''), item.get('country', default_country)
+        else:
+            city, _, country = str(item).partition(',')
+        city, country = city.strip(), (country.strip() or default_country)
+        if city and (city, country) not in locations:
+            locations.append((city, country))
+    return locations
 
 
 class WeatherService(QObject):
     """Hava durumu servisi"""
     
     # Sinyaller
-    weather_updated = pyqtSignal(dict)  # Hava durumu güncellendi
+    weather_updated = pyqtSignal(dict)  # Hava durumu güncellendi (Ana konum)
+    location_updated = pyqtSignal(str, dict)  # Herhangi bir konum güncellendi (Anahtar, veri)
+    forecast_updated = pyqtSignal(str, object)  # Saatlik tahmin (Anahtar, HourlyForecast)
+    weather_alert = pyqtSignal(str)  # Yeni aşılan eşik veya resmi uyarı (Duyuru metni)
     error_occurred = pyqtSignal(str)  # Hata oluştu
+    # Worker thread -> GUI thread (Konum anahtarı, veri sözlüğü / (veri, tahmin) veya hata mesajı)
+    _fetch_finished = pyqtSignal(str, object)
+    
+    MAX_PARALLEL = 4  # Aynı anda en fazla istek
     
-    def __init__(self, api_key: str = "", city: str = "Istanbul", country: str = "TR"):
+    def __init__(self, api_key: str = "", city: str = "Istanbul", country: str = "TR",
+                 cache_file: Optional[str] = None):
         super().__init__()
         self.api_key = api_key
         self.city = city
         self.country = country
         self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+        self.geo_url = "https://api.openweathermap.org/geo/1.0/direct"
+        self.onecall_url = "https://api.openweathermap.org/data/3.0/onecall"
+        
+        self.extra_locations: List[Tuple[str, str]] = []  # Diğer röle şehirleri
         
         self.last_weather_data: Optional[Dict] = None
         self.update_interval = 3600  # 1 saat (saniye)
+        self.cache_ttl = 600  # Konum verisi bu süre taze sayılır (saniye)
+        
+        # Koordinat ve API sürümü önbelleği
+        self.cache = WeatherCache(cache_file)
+        self.rate_limiter = RateLimiter()
+        
+        # Konum anahtarı -> (alındığı an (epoch), veri). Önceki çalışmadan kalanlarla başlar
+        self._snapshots: Dict[str, Tuple[float, Dict]] = self.cache.get_snapshots()
+        # Bu çalışmada en az bir kez yayınlanan konumlar
+        self._published: set = set()
+        # Süren sorgular (Aynı konum için ikinci istek açılmaz)
+        self._inflight: set = set()
+        self._slots = threading.Semaphore(self.MAX_PARALLEL)
+        
+        # Tahmin ve uyarılar (Açıksa aynı One Call isteğinde gelir)
+        self.forecast_enabled = False
+        self.forecast_monitor = ForecastMonitor()
+        self._forecasts: Dict[str, HourlyForecast] = {}
+        self._forecast_unavailable = False
+        self._fetch_finished.connect(self._on_fetch_finished)
         
         # Otomatik güncelleme timer'ı
         self.update_timer = QTimer()
@@ -37,118 +310,316 @@ class WeatherService(QObject):
         self.city = city
         self.country = country
     
+    def set_locations(self, locations: List[Tuple[str, str]]) -> None:
+        """Ana konuma ek olarak sorgulanacak konumlar"""
+        self.extra_locations = list(locations)
+        self._reschedule()
+    
+    def get_locations(self) -> List[Tuple[str, str]]:
+        """Tüm konumlar (İlki ana konum)"""
+        locations = [(self.city, self.country)]
+        for location in self.extra_locations:
+            if location_key(*location) not in {location_key(*l) for l in locations}:
+                locations.append(location)
+        return locations
+    
+    def set_forecast_mode(self, enabled: bool, thresholds: Optional[ForecastThresholds] = None) -> None:
+        """Saatlik tahmin ve resmi uyarıları da al (One Call 3.0 gerekir)"""
+        self.forecast_enabled = enabled
+        self._forecast_unavailable = False
+        if thresholds is not None:
+            self.forecast_monitor.set_thresholds(thresholds)
+    
+    def get_forecast(self, city: Optional[str] = None, country: Optional[str] = None) -> Optional[HourlyForecast]:
+        """Son saatlik tahmin (Tahmin kapalıysa None)"""
+        return self._forecasts.get(location_key(city or self.city, country or self.country))
+    
+    def set_rate_limits(self, per_minute: int, per_day: int) -> None:
+        """API kotası (Ücretsiz One Call 3.0: Günde 1000 istek)"""
+        self.rate_limiter.configure(per_minute, per_day)
+        self._reschedule()
+    
     def set_update_interval(self, seconds: int) -> None:
         """Güncelleme aralığını ayarla"""
         self.update_interval = max(300, seconds)  # Minimum 5 dakika
+        self._reschedule()
+    
+    def _quota_interval(self) -> int:
+        # Günlük kotanın %90'ı otomatik güncellemeye, kalanı manuel isteklere
+        per_day = self.rate_limiter.per_day * 0.9
+        return max(self.update_interval, math.ceil(86400 * len(self.get_locations()) / per_day))
+    
+    def _effective_interval(self) -> int:
+        """Kotaya sığan güncelleme aralığı (Konum sayısı arttıkça uzar)"""
+        interval = self._quota_interval()
+        if interval > self.update_interval:
+            print(f"Hava durumu: {len(self.get_locations())} konum için aralık {interval} sn'ye uzatıldı (Kota)")
+        return interval
+    
+    @property
+    def stale_after(self) -> int:
+        """Bu yaştan eski veri "eski" sayılır (En az bir güncelleme kaçırılmış)"""
+        return self._quota_interval() + self.cache_ttl
+    
+    def _reschedule(self) -> None:
+        if self.update_timer.isActive():
+            self.update_timer.start(self._effective_interval() * 1000)
+    
+    def restore_cached(self) -> None:
+        """
+        Önceki çalışmadan kalan verileri hemen yayınla (Ağ beklenmez)
+        
+        Veriler 'restored' ile işaretlenir; bu çalışmada zaten yayınlanmış
+        konumlar atlanır.
+        """
+        for city, country in self.get_locations():
+            key = location_key(city, country)
+            if key in self._snapshots and key not in self._published:
+                self._publish(key, self._tagged(key, restored=True))
     
     def start_auto_update(self) -> None:
         """Otomatik güncellemeyi başlat"""
         if not self.update_timer.isActive():
-            self.fetch_weather()  # İlk güncelleme
-            self.update_timer.start(self.update_interval * 1000)  # ms'ye çevir
+            self.restore_cached()
+            self.fetch_weather()  # İlk güncelleme (Arka planda yeniler)
+            self.update_timer.start(self._effective_interval() * 1000)  # ms'ye çevir
     
     def stop_auto_update(self) -> None:
         """Otomatik güncellemeyi durdur"""
         self.update_timer.stop()
     
     def fetch_weather_manual(self):
-        """Manuel hava durumu güncelleme"""
-        return self.fetch_weather()
-
-    def fetch_weather(self) -> Optional[Dict]:
+        """Manuel hava durumu güncelleme (Ana konum taze ise istek yapılmaz)"""
+        return self.request_weather(self.city, self.country)
+    
+    @property
+    def is_fetching(self) -> bool:
+        """Sorgu arka planda sürüyor mu?"""
+        return bool(self._inflight)
+    
+    def fetch_weather(self) -> None:
         """
-        Hava durumunu getir
+        Tüm konumları arka planda güncelle (Sonuç: weather_updated / location_updated / error_occurred)
+        
+        Otomatik: 2.5/weather veya 3.0/onecall; çalışan sürüm hatırlanır.
+        """
+        for city, country in self.get_locations():
+            self.request_weather(city, country, max_age=0)
+    
+    def request_weather(self, city: str, country: str = "TR", max_age: Optional[float] = None) -> bool:
+        """
+        Bir konumun verisini iste (Birden çok tüketici aynı isteği paylaşır)
+        
+        Args:
+            max_age: Bu kadar saniyeden yeni veri varsa istek yapılmaz, veri
+                     hemen yayınlanır (None: cache_ttl)
         
         Returns:
-            Hava durumu verisi veya None
+            Yeni istek başladıysa True
         """
         if not self.api_key:
             self.error_occurred.emit("API anahtarı eksik. Ayarlardan ekleyin.")
-            return None
+            return False
+        
+        key = location_key(city, country)
+        data = self.get_weather(city, country, self.cache_ttl if max_age is None else max_age)
+        if data is not None:
+            self._publish(key, data)
+            return False
         
-    def fetch_weather(self) -> Optional[Dict]:
+        # Aynı konum zaten sorgulanıyorsa onun sonucu bekleniyor
+        if key in self._inflight:
+            return False
+        
+        self._inflight.add(key)
+        threading.Thread(
+            target=self._fetch_worker,
+            args=(key, self.api_key, city, country, self.forecast_enabled),
+            daemon=True
+        ).start()
+        return True
+    
+    def get_weather(self, city: Optional[str] = None, country: Optional[str] = None,
+                    max_age: Optional[float] = None) -> Optional[Dict]:
         """
-        Hava durumunu getir (Otomatik: 2.5/weather veya 3.0/onecall dener)
+        Önbellekteki konum verisi (İstek yapmaz; max_age verilirse eskiyse None)
+        
+        Veride 'fetched_at' (epoch) ve 'stale' (stale_after'dan eski) bulunur.
         """
-        if not self.api_key:
-            self.error_occurred.emit("API anahtarı eksik. Ayarlardan ekleyin.")
+        key = location_key(city or self.city, country or self.country)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            return None
+        if max_age is not None and time.time() - snapshot[0] > max_age:
             return None
+        return self._tagged(key)
+    
+    def _tagged(self, key: str, **extra) -> Dict:
+        """Kaydın yaş bilgisi eklenmiş kopyası"""
+        fetched_at, data = self._snapshots[key]
+        return dict(data, fetched_at=fetched_at, stale=time.time() - fetched_at > self.stale_after, **extra)
+    
+    def _fetch_worker(self, key: str, api_key: str, city: str, country: str, forecast: bool) -> None:
+        """Sorgu (Worker thread, UI donmaz)"""
+        with self._slots:
+            try:
+                self._fetch_finished.emit(key, self._fetch(api_key, city, country, forecast))
+            except WeatherError as e:
+                self._fetch_finished.emit(key, str(e))
+            except Exception as e:
+                self._fetch_finished.emit(key, f"Hava durumu alınamadı: {str(e)}")
+    
+    def _on_fetch_finished(self, key: str, result) -> None:
+        """Worker sonucu (GUI thread'inde)"""
+        self._inflight.discard(key)
+        if isinstance(result, str):
+            primary = key == location_key(self.city, self.country)
+            self.error_occurred.emit(result if primary else f"{key.split(',')[0]}: {result}")
+            if key in self._snapshots:
+                # Bağlantı yok: Son iyi veri (yaşıyla) sunulmaya devam eder
+                self._publish(key, self._tagged(key))
+            return
+        forecast = None
+        if isinstance(result, tuple):
+            result, forecast = result
+        fetched_at = time.time()
+        self._snapshots[key] = (fetched_at, result)
+        self.cache.set_snapshot(key, fetched_at, result)
+        self._publish(key, self._tagged(key))
+        
+        if forecast is not None:
+            self._forecasts[key] = forecast
+            self.forecast_updated.emit(key, forecast)
+            # Sadece bu sorguda yeni başlayan durumlar duyurulur
+            for message in self.forecast_monitor.check(result['city'], forecast):
+                self.weather_alert.emit(message)
+    
+    def _publish(self, key: str, data: Dict) -> None:
+        self._published.add(key)
+        self.location_updated.emit(key, data)
+        if key == location_key(self.city, self.country):
+            self.last_weather_data = data
+            self.weather_updated.emit(data)
+    
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """Kotaya uyan GET isteği (Worker thread)"""
+        if not self.rate_limiter.acquire():
+            raise WeatherError("Hava durumu API kotası doldu, istek ertelendi.")
+        response = http_client.get(url, params=params, timeout=10)
+        if response.status_code == 429:
+            # Çok fazla istek: Sunucunun istediği kadar (yoksa 1 dk) bekle
+            try:
+                retry_after = float(response.headers.get('Retry-After', 60))
+            except ValueError:
+                retry_after = 60.0
+            self.rate_limiter.block(retry_after)
+            raise WeatherError("Hava durumu API kotası aşıldı (429).")
+        return response
+    
+    def _fetch(self, api_key: str, city: str, country: str, forecast: bool = False):
+        """
+        Uygun API sürümüyle hava durumunu getir (Worker thread)
+        
+        Returns:
+            Veri sözlüğü; forecast açık ve One Call 3.0 kullanılabiliyorsa (veri, HourlyForecast)
+        """
+        version = self.cache.get_api_version(api_key)
+        
+        # Tahmin modu: Güncel durum, saatlik tahmin ve uyarılar tek One Call isteğinde
+        if forecast and version != "2.5":
+            try:
+                return self._fetch_weather_onecall(api_key, city, country, forecast=True)
+            except WeatherError as e:
+                if version == "3.0":
+                    raise
+                print(f"One Call 3.0 kullanılamadı ({e}), sadece güncel durum alınacak")
+                version = self.cache.get_api_version(api_key)
+        elif forecast and not self._forecast_unavailable:
+            self._forecast_unavailable = True
+            print("Hava durumu: Anahtar One Call 3.0'a açık değil, tahmin ve uyarılar alınamıyor")
         
         # 1. Yöntem: Standart 2.5/weather API (Şehir ismiyle)
-        try:
+        if version != "3.0":
             params = {
-                'q': f"{self.city},{self.country}",
-                'appid': self.api_key,
+                'q': f"{city},{country}",
+                'appid': api_key,
                 'units': 'metric',
                 'lang': 'tr'
             }
+            try:
+                response = self._get(self.base_url, params)
+            except requests.exceptions.RequestException as e:
+                if version == "2.5":
+                    raise WeatherError(f"Hava durumu alınamadı: {str(e)}")
+                print(f"Standart API hatası: {e}")
+                response = None
             
-            response = requests.get(self.base_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self._process_weather_data(data)
+            if response is not None and response.status_code == 200:
+                self.cache.set_api_version(api_key, "2.5")
+                return self._process_weather_data(response.json())
             
-            elif response.status_code == 401:
+            if response is not None and response.status_code == 401:
                 # 401 Hatası: Belki One Call API 3.0 anahtarıdır?
-                # One Call API şehir ismi desteklemez, önce koordinat bulmalıyız.
                 print("2.5/weather 401 döndü, One Call 3.0 deneniyor...")
-                return self._fetch_weather_onecall()
-                
-            else:
-                response.raise_for_status()
-                
-        except Exception as e:
-            print(f"Standart API hatası: {e}")
-            # Hata durumunda da One Call denenebilir
-            return self._fetch_weather_onecall()
-
-        return None
-
-    def _fetch_weather_onecall(self) -> Optional[Dict]:
-        """One Call API 3.0 ile hava durumu getir (Geocoding -> OneCall)"""
+            elif version == "2.5":
+                raise WeatherError(f"Hava durumu alınamadı: HTTP {response.status_code}")
+        
+        # 2. Yöntem: One Call 3.0 (Koordinatla)
+        return self._fetch_weather_onecall(api_key, city, country)
+    
+    def _geocode(self, api_key: str, city: str, country: str) -> Tuple[float, float]:
+        """Şehirden koordinat bul (Önbellekte yoksa Geocoding API)"""
+        location = self.cache.get_location(city, country)
+        if location:
+            return location
+        
+        geo_params = {
+            'q': f"{city},{country}",
+            'limit': 1,
+            'appid': api_key
+        }
+        geo_res = self._get(self.geo_url, geo_params)
+        
+        if geo_res.status_code == 401:
+            raise WeatherError("API Hatası (401): Anahtar geçersiz veya henüz aktif değil.")
+        if geo_res.status_code != 200 or not geo_res.json():
+            raise WeatherError(f"Konum bulunamadı: {city}")
+        
+        found = geo_res.json()[0]
+        lat, lon = float(found['lat']), float(found['lon'])
+        self.cache.set_location(city, country, lat, lon)
+        return lat, lon
+    
+    def _fetch_weather_onecall(self, api_key: str, city: str, country: str, forecast: bool = False):
+        """One Call API 3.0 ile hava durumu getir (Geocoding -> OneCall; forecast: + saatlik tahmin ve uyarılar)"""
         try:
             # 1. Geocoding: Şehirden koordinat bul
-            geo_url = "http://api.openweathermap.org/geo/1.0/direct"
-            geo_params = {
-                'q': f"{self.city},{self.country}",
-                'limit': 1,
-                'appid': self.api_key
-            }
-            
-            geo_res = requests.get(geo_url, params=geo_params, timeout=10)
-            
-            if geo_res.status_code == 401:
-                self.error_occurred.emit("API Hatası (401): Anahtar geçersiz veya henüz aktif değil.")
-                return None
-                
-            if geo_res.status_code != 200 or not geo_res.json():
-                self.error_occurred.emit(f"Konum bulunamadı: {self.city}")
-                return None
-                
-            location = geo_res.json()[0]
-            lat, lon = location['lat'], location['lon']
+            lat, lon = self._geocode(api_key, city, country)
             
             # 2. One Call API 3.0
-            onecall_url = "https://api.openweathermap.org/data/3.0/onecall"
             onecall_params = {
                 'lat': lat,
                 'lon': lon,
-                'exclude': 'minutely,hourly,daily,alerts', # Sadece current yeterli
+                # Sadece current yeterli (Tahmin modunda saatlik tahmin ve uyarılar da)
+                'exclude': 'minutely,daily' if forecast else 'minutely,hourly,daily,alerts',
                 'units': 'metric',
                 'lang': 'tr',
-                'appid': self.api_key
+                'appid': api_key
             }
             
-            oc_res = requests.get(onecall_url, params=onecall_params, timeout=10)
+            oc_res = self._get(self.onecall_url, onecall_params)
+            if oc_res.status_code == 401:
+                # Anahtar değişmiş olabilir: Sonraki sorguda iki sürüm de yeniden denenir
+                self.cache.set_api_version(api_key, None)
             oc_res.raise_for_status()
+            self.cache.set_api_version(api_key, "3.0")
             
             data = oc_res.json()
             
             # Veriyi işle (One Call formatı biraz farklıdır)
             current = data['current']
-            weather_info = {
-                'city': self.city, # OneCall şehir ismi dönmez, elimizdekini kullanırız
+            result = {
+                'city': city, # OneCall şehir ismi dönmez, elimizdekini kullanırız
                 'temperature': round(current['temp'], 1),
                 'feels_like': round(current['feels_like'], 1),
                 'humidity': current['humidity'],
@@ -157,19 +628,16 @@ class WeatherService(QObject):
                 'wind_speed': round(current['wind_speed'], 1),
                 'timestamp': datetime.now().isoformat()
             }
-            
-            self.last_weather_data = weather_info
-            self.weather_updated.emit(weather_info)
-            return weather_info
-            
+            return (result, HourlyForecast.from_onecall(data)) if forecast else result
+        
+        except WeatherError:
+            raise
         except Exception as e:
-            error_msg = f"Hava durumu alınamadı (OneCall): {str(e)}"
-            self.error_occurred.emit(error_msg)
-            return None
-
+            raise WeatherError(f"Hava durumu alınamadı (OneCall): {str(e)}")
+    
     def _process_weather_data(self, data):
         """Standard API verisini işle"""
-        weather_info = {
+        return {
             'city': data['name'],
             'temperature': round(data['main']['temp'], 1),
             'feels_like': round(data['main']['feels_like'], 1),
@@ -179,21 +647,21 @@ class WeatherService(QObject):
             'wind_speed': round(data['wind']['speed'], 1),
             'timestamp': datetime.now().isoformat()
         }
-        self.last_weather_data = weather_info
-        self.weather_updated.emit(weather_info)
-        return weather_info
     
-    def get_announcement_text(self) -> str:
+    def get_announcement_text(self, city: Optional[str] = None, country: Optional[str] = None) -> str:
         """
-        Telsiz duyurusu için metin oluştur
+        Telsiz duyurusu için metin oluştur (Önbellekten, istek yapmaz)
+        
+        Args:
+            city: Konum (Boşsa ana konum)
         
         Returns:
             Duyuru metni
         """
-        if not self.last_weather_data:
+        data = self.get_weather(city, country)
+        if not data:
             return "Hava durumu bilgisi mevcut değil"
         
-        data = self.last_weather_data
         text = (
             f"{data['city']} için hava durumu bilgisi. "
             f"Sıcaklık {data['temperature']} derece. "
@@ -202,7 +670,8 @@ class WeatherService(QObject):
             f"{data['description']}. "
             f"Rüzgar hızı saatte {data['wind_speed']} kilometre."
         )
-        return text
+        note = age_note(data)
+        return f"{text} {note}" if note else text
     
     def get_last_data(self) -> Optional[Dict]:
         """Son hava durumu verisini al"""
@@ -9,13 +9,7 @@ from PyQt6.QtGui import QIcon, QAction, QDesktopServices
 from datetime import datetime
 from config import settings
 from services.update_service import UpdateService
-from services.battery_service import BatteryService # EKLENDI
-from radio.connection import RadioConnection
-from radio.audio_manager import AudioManager
-from radio.vox_controller import VOXController
-from services.weather_service import WeatherService
-from services.earthquake_service import EarthquakeService
-from services.notification_manager import NotificationManager
+from services.station import Station
 from ui.styles import get_theme
 from ui.settings_dialog import SettingsDialog
 from ui.widgets.clock_widget import ClockWidget
@@ -36,19 +30,20 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(f"TB2ASJ - Telsiz Yönetim Sistemi v{self.APP_VERSION}")
         self.setMinimumSize(900, 700)
         
-        # İlk açılışta hava durumu anonsunu engellemek için bayrak
-        self._first_weather_check = True
-        
-        # Bileşenler
-        self.radio_connection = RadioConnection()
-        self.audio_manager = AudioManager()
-        self.vox_controller = VOXController(self.audio_manager, self.radio_connection)
+        # Bileşenler (Arayüzsüz modla ortak istasyon çekirdeği)
+        self.station = Station()
+        self.device_registry = self.station.device_registry
+        self.tx_governor = self.station.tx_governor
+        self.radio_connection = self.station.radio_connection
+        self.audio_manager = self.station.audio_manager
+        self.vox_controller = self.station.vox_controller
         # Servisler
-        self.weather_service = WeatherService()
-        self.earthquake_service = EarthquakeService()
-        self.notification_manager = NotificationManager(self.radio_connection, self.vox_controller)
+        self.weather_service = self.station.weather_service
+        self.earthquake_service = self.station.earthquake_service
+        self.notification_manager = self.station.notification_manager
+        self.battery_service = self.station.battery_service
+        self.clock_service = self.station.clock_service
         self.update_service = UpdateService(self.APP_VERSION)
-        self.battery_service = BatteryService() # EKLENDİ
         
         # System tray
         self.tray_icon = None
@@ -56,6 +51,7 @@ class MainWindow(QMainWindow):
         # UI'ı başlat
         self.init_ui()
         self.connect_signals()
+        self.station.start()
         self.load_settings()
         
         # Tema uygula
@@ -64,12 +60,6 @@ class MainWindow(QMainWindow):
         # Güncelleme kontrolü
         self.check_for_updates()
         
-        # Saat anons ayarını yükle
-        self.clock_widget.announce_enabled = settings.get('general.hourly_announce', False)
-        
-        # İlk hava durumu anonsunu engellemek için bayrak
-        self._first_weather_check = True
-        
         # System tray oluştur
         self.create_tray_icon()
     
@@ -129,9 +119,7 @@ class MainWindow(QMainWindow):
         # Üst Panel: Saat ve Hava Durumu (Yan yana)
         top_info_layout = QHBoxLayout()
         
-        self.clock_widget = ClockWidget()
-        # Saat başı anons sinyali
-        self.clock_widget.request_announcement.connect(self.announce_time)
+        self.clock_widget = ClockWidget(self.clock_service)
         
         top_info_layout.addWidget(self.clock_widget, 1) # Sol: Saat
         
@@ -207,6 +195,10 @@ class MainWindow(QMainWindow):
         self.radio_connection.connected.connect(self.on_radio_connected)
         self.radio_connection.disconnected.connect(self.on_radio_disconnected)
         self.radio_connection.error.connect(self.on_error)
+        self.radio_connection.tx_timeout.connect(self.on_tx_timeout)
+        
+        # İletim sayaçları (TOT / görev döngüsü)
+        self.tx_governor.stats_updated.connect(self.signal_meter.update_tx_stats)
         
         # Ses yönetimi
         self.audio_manager.level_changed.connect(self.signal_meter.update_audio_level)
@@ -229,9 +221,6 @@ class MainWindow(QMainWindow):
         # Deprem
         self.earthquake_service.earthquake_detected.connect(self.on_earthquake_detected)
         self.earthquake_service.error_occurred.connect(self.on_error)
-
-        # Batarya Sinyalleri
-        self.battery_service.warning_threshold_reached.connect(self.on_battery_warning)
     
     def on_ptt_pressed(self):
         """PTT tuşuna basıldı"""
@@ -248,60 +237,18 @@ class MainWindow(QMainWindow):
         self.vox_controller.manual_ptt(False)
 
     def load_settings(self):
-        """Ayarları yükle ve uygula"""
-        # Ses ayarları
-        self.audio_manager.set_input_device(settings.get('audio.input_device'))
-        self.audio_manager.set_output_device(settings.get('audio.output_device'))
-        self.audio_manager.set_mic_level(settings.get('audio.mic_level', 50))
-        self.audio_manager.set_speaker_level(settings.get('audio.speaker_level', 75))
-        self.audio_manager.set_vox_threshold(settings.get('audio.vox_threshold', 30))
-        
-        # Bildirim ayarları
-        voice_id = settings.get('notification.voice_id')
-        if voice_id:
-            self.notification_manager.set_voice(voice_id)
-        
-        test_msg = settings.get('notification.test_message')
-        if test_msg:
-            self.notification_manager.set_test_message(test_msg)
-
-        # Roger Beep Ayarı
-        self.notification_manager.roger_beep_enabled = settings.get('general.roger_beep', False)
-
-        # Batarya Ayarları
-        # (Servis zaten kendi içinde periyodik kontrol yapıyor, 
-        # biz sadece sesli uyarının açık olup olmadığını kontrol edeceğiz)
-
+        """Ayarları yükle ve uygula (Açılışta bir kez)"""
+        # Telsiz, ses ve servis ayarları
+        self.station.apply_settings()
+        
         # VOX widget ayarları
         self.vox_control.set_vox_enabled(settings.get('audio.vox_enabled', True))
         self.vox_control.set_threshold(settings.get('audio.vox_threshold', 30))
         
-        # Hava durumu servisi
-        api_key = settings.get('weather.api_key', '')
-        if api_key:
-            self.weather_service.set_api_key(api_key)
-            city = settings.get('weather.city', 'Istanbul')
-            country = settings.get('weather.country', 'TR')
-            self.weather_service.set_location(city, country)
-            
-            interval = settings.get('weather.update_interval', 3600)
-            self.weather_service.set_update_interval(interval)
-            
-            if settings.get('weather.auto_announce', True):
-                self.weather_service.start_auto_update()
-        
-        # Deprem servisi
-        # Deprem ayarlarını güncelle
-        self.earthquake_service.set_min_magnitude(float(settings.get('earthquake.min_magnitude', 4.0)))
-        enabled = settings.get('earthquake.enabled', True)
-        city_filter = settings.get('earthquake.city_filter', '')
-        self.earthquake_service.set_city_filter(city_filter)
-        self.earthquake_service.set_check_interval(int(settings.get('earthquake.interval', 60)))
-        
-        if enabled:
-             self.earthquake_service.start_monitoring()
-        else:
-             self.earthquake_service.stop_monitoring()
+        # Sonraki değişiklikler (Ayarlar penceresi, yeniden yükleme)
+        settings.subscribe('audio.vox_enabled', lambda value: self.vox_control.set_vox_enabled(bool(value)))
+        settings.subscribe('audio.vox_threshold', lambda value: self.vox_control.set_threshold(int(value)))
+        settings.subscribe('general.theme', lambda value: self.apply_theme())
     
     def apply_theme(self):
         """Tema uygula"""
@@ -356,57 +303,18 @@ class MainWindow(QMainWindow):
     
     def connect_radio(self):
         """Telsiz ile bağlan"""
-        port = settings.get('radio.port', '')
-        connection_type = settings.get('radio.connection_type', 'COM')
-        
-        # COM modu seçiliyse port kontrolü yap
-        if connection_type == 'COM' and not port:
-            ports = RadioConnection.get_available_ports()
-            if ports:
-                port = ports[0]
-            else:
-                 # Uyarı verme, sadece logla (kullanıcı AUX kullanıyor olabilir)
-                 print("COM Port bulunamadı, AUX modu deneniyor.")
-        
-        baudrate = settings.get('radio.baudrate', 9600)
-        databits = settings.get('radio.databits', 8)
-        parity = settings.get('radio.parity', 'N')
-        stopbits = settings.get('radio.stopbits', 1)
-        
-        # Bağlantıyı dene
-        success = self.radio_connection.connect(
-            port, baudrate, databits, parity, stopbits
-        )
-        
-        # AUX modunda hata olsa bile devam et
-        # Her durumda ses monitörünü başlat
-        if not self.audio_manager.start_monitoring():
-             QMessageBox.critical(self, "Hata", "Ses cihazı başlatılamadı!")
-        
-        # VOX'u etkinleştir (eğer ayarlardaysa)
-        if settings.get('audio.vox_enabled', True):
-            self.vox_controller.enable_vox()
+        # AUX modunda COM hatası olsa bile devam edilir
+        if not self.station.connect_radio():
+            QMessageBox.critical(self, "Hata", "Ses cihazı başlatılamadı!")
         
         # UI Güncelle
         self.on_radio_connected()
     
     def disconnect_radio(self):
         """Telsiz bağlantısını kes"""
-        try:
-            # 1. VOX devre dışı
-            self.vox_controller.disable_vox()
-            
-            # 2. Ses monitörünü durdur (Kritik)
-            self.audio_manager.stop_monitoring()
-            self.signal_meter.update_audio_level(0) # Metreyi sıfırla
-            
-            # 3. Bağlantıyı kapat
-            self.radio_connection.disconnect()
-            
-        except Exception as e:
-            print(f"Bağlantı kesilirken hata: {e}")
-        finally:
-            self.on_radio_disconnected()
+        self.station.disconnect_radio()
+        self.signal_meter.update_audio_level(0) # Metreyi sıfırla
+        self.on_radio_disconnected()
     
     def on_radio_connected(self):
         """Telsiz bağlandığında"""
@@ -456,28 +364,24 @@ class MainWindow(QMainWindow):
         self.signal_meter.update_tx_level(0)
         self.signal_meter.set_status("Dinleme (RX)", "connected")
     
+    def on_tx_timeout(self, reason: str):
+        """İletim zaman aşımı (TOT) ile kesildiğinde"""
+        self.signal_meter.update_tx_level(0)
+        self.signal_meter.set_status(f"İletim Kesildi ({reason})", "error")
+        if self.tray_icon:
+            self.tray_icon.showMessage(
+                "⚠️ TOT",
+                f"İletim {self.tx_governor.timeout} sn sınırını aştı ve kesildi.",
+                QSystemTrayIcon.MessageIcon.Warning,
+                5000
+            )
+    
     def on_weather_updated(self, data: dict):
-        """Hava durumu güncellendiğinde"""
-        # print(f"[DEBUG] on_weather_updated. First check: {getattr(self, '_first_weather_check', 'YOK')}")
+        """Hava durumu güncellendiğinde (Sesli anons Station'da)"""
         self.weather_widget.update_weather(data)
-        
-        # İlk açılışta sesli okumayı engelle
-        # Eğer flag henüz yoksa (init öncesi vs) True varsayalım ki konuşmasın
-        if getattr(self, '_first_weather_check', True):
-            print("[DEBUG] İlk açılış veya flag yok -> Hava durumu anonsu ATLANDI.")
-            self._first_weather_check = False
-            return
-
-        # Sesli oku (Sadece otomatik ayarı açıksa)
-        # Ayar anahtarı: 'weather_hourly' (SettingsDialog ile uyumlu)
-        should_announce = settings.get("weather_hourly", True)
-        
-        if should_announce:
-            self.notification_manager.send_weather_notification(data)
     
     def on_earthquake_detected(self, data: dict):
-        """Deprem tespit edildiğinde"""
-        self.notification_manager.send_earthquake_notification(data)
+        """Deprem tespit edildiğinde (Sesli anons Station'da)"""
         if self.tray_icon:
             self.tray_icon.showMessage(
                 "⚠️ DEPREM BİLDİRİMİ",
@@ -492,15 +396,13 @@ class MainWindow(QMainWindow):
     
     def send_test_notification(self):
         """Test bildirimi gönder"""
-        self.notification_manager.send_test_notification()
+        self.station.send_test_notification()
     
     def open_settings(self):
         """Ayarlar penceresini aç"""
-        dialog = SettingsDialog(self, self.notification_manager)
-        if dialog.exec():
-            # Ayarlar kaydedildi, yeniden yükle
-            self.load_settings()
-            self.apply_theme()
+        dialog = SettingsDialog(self, self.notification_manager, self.device_registry)
+        # Kaydedilen değişiklikler abonelikler üzerinden sadece ilgili bileşene uygulanır
+        dialog.exec()
     
     def show_about(self):
         """Hakkında penceresi"""
@@ -519,85 +421,16 @@ class MainWindow(QMainWindow):
     
     def read_last_earthquake(self):
         """Son depremi sesli oku"""
-        if self.earthquake_service.last_data:
-            from services.earthquake_service import EarthquakeService
-            # EarthquakeService sınıfına erişimimiz var ama _parse metoduna static değil
-            # self.earthquake_service üzerinden erişelim
-            eq = self.earthquake_service._parse_earthquake(self.earthquake_service.last_data[0])
-            text = self.earthquake_service.get_announcement_text(eq)
-            self.notification_manager.send_notification(text)
-        else:
-            self.notification_manager.send_notification("Henüz deprem verisi alınmadı.", use_radio=False)
+        self.station.read_last_earthquake()
 
     def read_current_time(self):
         """Saati sesli oku"""
-        from datetime import datetime
-        now = datetime.now()
-        # ClockWidget'daki yardımcı metodu kullan
-        text = self.clock_widget.get_natural_time_text(now.hour, now.minute)
-        self.notification_manager.send_notification(text)
-        
-        # Eğer bu bir saat başı bildirimi ise ve ayar açıksa,
-        # 1 dakika sonra hava durmunu oku
-        if now.minute == 0:
-            is_hourly_weather = self.settings.value("weather_hourly", False, type=bool)
-            if is_hourly_weather:
-                # 60 saniye (1 dakika) sonra hava durumunu oku
-                QTimer.singleShot(60000, self.read_weather)
+        self.station.read_current_time()
 
     def read_current_weather(self):
         """Hava durumunu sesli oku"""
-        # Manuel tetikle
-        self.weather_service.fetch_weather_manual()
-        # Bildirim on_weather_updated içinde otomatik yapılacak (eğer ayar açıksa)
-        # Ama ayar kapalıysa bile butona basınca okusun isteriz.
-        # Şimdilik on_weather_updated ayar kontrolü yapıyor.
-        # Biz manuel dinleyip gönderelim:
-        # Aslında en temizi, weather_service.fetch_weather_manual() çağırınca sinyal gelecek.
-        # Biz burada direkt elimizdeki son veriyi okutabiliriz veya servise istek atabiliriz.
-        # WeatherService son veriyi saklıyor mu? Evet self.last_data olsa iyi olurdu.
-        # Neyse, notification_manager.send_weather_notification direkt API çağrısı yapmıyor, parametre alıyor.
-        # Kullanıcı butona bastığında taze veri çekilsin istiyor muhtemelen.
-        # O zaman fetch_weather_manual()
-        pass 
-
-    def announce_time(self, text):
-        """Otomatik saat anonsu"""
-        self.notification_manager.send_notification(text)
-
-    def on_settings_closed(self, result):
-        """Ayarlar penceresi kapandığında"""
-        if result == QDialog.DialogCode.Accepted:
-            # Ayarları yeniden yükle/uygula
-            self.radio_connection.port = settings.get('radio.port')
-            self.audio_manager.mic_level = settings.get('audio.mic_level', 50)
-            self.audio_manager.speaker_level = settings.get('audio.speaker_level', 75)
-            
-            # Hava durumu ayarlarını güncelle
-            self.weather_service.set_api_key(settings.get('weather.api_key', ''))
-            self.weather_service.set_city(settings.get('weather.city', 'Istanbul'))
-            self.weather_service.auto_announce = settings.get('weather.auto_announce', True)
-            
-            # Deprem
-            self.earthquake_service.set_min_magnitude(float(settings.get('earthquake.min_magnitude', 4.0)))
-            self.earthquake_service.set_city_filter(settings.get('earthquake.city_filter', ''))
-            
-            # Saat Anonsu
-            self.clock_widget.announce_enabled = settings.get('general.hourly_announce', False)
-            
-            # VOX ayarlarını da güncellemek gerekebilir (zaten load_settings yapıyor mu? Hayır bu on_settings_closed)
-            # Aslında SettingsDialog'un kendisi `accept` demeden önce settings'e yazıyor.
-            # Bizim burada yapmamız gereken settings'den okuyup canlı nesneleri güncellemek.
-            # load_settings() metodumuz var, onu çağırmak daha mantıklı.
-            self.load_settings()
-
-    def on_battery_warning(self, message: str):
-        """Batarya seviyesi kritik olduğunda sesli uyarı yap"""
-        if settings.get('power.warning_enabled', True):
-            # Ayarlardaki mesajı kullan veya gelen mesajı (varsayılan) kullan
-            custom_msg = settings.get('power.warning_message', "")
-            display_msg = custom_msg if custom_msg else message
-            self.notification_manager.send_notification(display_msg)
+        # Taze veri çekilir, ayardan bağımsız okunur
+        self.station.read_current_weather()
 
     def check_for_updates(self):
         """Güncelleme kontrolünü başlat"""
@@ -640,7 +473,5 @@ class MainWindow(QMainWindow):
                     2000
                 )
         else:
-            self.disconnect_radio()
-            self.weather_service.stop_auto_update()
-            self.earthquake_service.stop_monitoring()
+            self.station.stop()
             event.accept()
@@ -1,27 +1,71 @@
 """
 Ayarlar penceresi
+
+Pencere açılırken ağ, ses motoru veya cihaz taraması beklenmez: Listeler
+önbellekten dolar, eksikler ve API testi arka planda yapılır. Pencere
+kapanınca ya da yeni istek gelince eski işlerin sonucu atılır.
 """
+import threading
+import time
+from typing import Dict, Tuple
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget,
                              QWidget, QLabel, QLineEdit, QComboBox, QSpinBox,
                              QCheckBox, QSlider, QPushButton, QGroupBox, 
                              QFormLayout, QTextEdit, QDoubleSpinBox)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from config import settings
-from radio.connection import RadioConnection
-from radio.audio_manager import AudioManager
+from radio.device_registry import DeviceRegistry
+from services.http_client import http_client
+
+
+API_TEST_TTL = 300  # Aynı anahtar/şehir test sonucu bu kadar saniye yeniden kullanılır
+
+# (API anahtarı, şehir) -> (zaman, metin, renk); pencereler arası ortak
+_api_test_cache: Dict[Tuple[str, str], Tuple[float, str, str]] = {}
 
 
 class SettingsDialog(QDialog):
     """Ayarlar penceresi"""
     
-    def __init__(self, parent=None, notification_manager=None):
+    # Worker thread -> GUI thread (İş numarası, metin, renk)
+    _api_test_finished = pyqtSignal(int, str, str)
+    
+    def __init__(self, parent=None, notification_manager=None, device_registry=None):
         super().__init__(parent)
         self.notification_manager = notification_manager
+        # Cihaz listeleri önbellekten gelir, dialog açılışı beklemez
+        self.device_registry = device_registry or DeviceRegistry(poll_interval=0)
+        if device_registry is None:
+            self.device_registry.start()
+        else:
+            self.device_registry.refresh()  # Arka planda; değişiklik sinyalle gelir
+        
+        # Arka plan işleri: Numarası güncel olmayan sonuç atılır (İptal)
+        self._api_test_id = 0
+        self._api_test_finished.connect(self._on_api_test_finished)
+        self.voice_map = {}
+        self._voices_ready = False
+        self._pending_voice = settings.get('notification.voice_id')
+        if self.notification_manager:
+            self.notification_manager.voices_loaded.connect(self._on_voices_loaded)
+        
         self.setWindowTitle("Ayarlar - TB2ASJ")
         self.setMinimumSize(600, 550)
         self.init_ui()
         self.load_settings()
     
+    def done(self, result):
+        """Pencere kapanıyor: Süren işlerin sonuçlarını bırak, sinyalleri ayır"""
+        self._api_test_id += 1
+        try:
+            self.device_registry.ports_changed.disconnect(self._populate_ports)
+            self.device_registry.audio_devices_changed.disconnect(self._populate_audio_devices)
+            if self.notification_manager:
+                self.notification_manager.voices_loaded.disconnect(self._on_voices_loaded)
+        except TypeError:
+            pass
+        super().done(result)
+    
     def init_ui(self):
         """UI'ı başlat"""
         layout = QVBoxLayout()
@@ -63,8 +107,8 @@ class SettingsDialog(QDialog):
         
         # COM port
         self.port_combo = QComboBox()
-        ports = RadioConnection.get_available_ports()
-        self.port_combo.addItems(["Otomatik"] + ports)
+        self._populate_ports(self.device_registry.get_ports())
+        self.device_registry.ports_changed.connect(self._populate_ports)
         layout.addRow("COM Port:", self.port_combo)
         
         # Baud rate
@@ -77,6 +121,29 @@ class SettingsDialog(QDialog):
         self.connection_type_combo.addItems(["COM Port", "AUX (Sadece Ses)"])
         layout.addRow("Bağlantı Tipi:", self.connection_type_combo)
         
+        # İletim sınırları
+        self.tx_timeout_spin = QSpinBox()
+        self.tx_timeout_spin.setRange(0, 900)
+        self.tx_timeout_spin.setValue(180)
+        self.tx_timeout_spin.setSuffix(" saniye")
+        self.tx_timeout_spin.setSpecialValueText("Kapalı")
+        self.tx_timeout_spin.setToolTip("Tek iletimin en uzun süresi (TOT). Dolunca PTT zorla bırakılır.")
+        layout.addRow("İletim Zaman Aşımı:", self.tx_timeout_spin)
+        
+        self.tx_lockout_spin = QSpinBox()
+        self.tx_lockout_spin.setRange(0, 600)
+        self.tx_lockout_spin.setValue(30)
+        self.tx_lockout_spin.setSuffix(" saniye")
+        layout.addRow("Soğuma Süresi:", self.tx_lockout_spin)
+        
+        self.tx_duty_spin = QSpinBox()
+        self.tx_duty_spin.setRange(0, 100)
+        self.tx_duty_spin.setValue(0)
+        self.tx_duty_spin.setPrefix("%")
+        self.tx_duty_spin.setSpecialValueText("Sınırsız")
+        self.tx_duty_spin.setToolTip("Son 10 dakikada vericinin açık kalabileceği en yüksek oran")
+        layout.addRow("Görev Döngüsü Sınırı:", self.tx_duty_spin)
+        
         widget.setLayout(layout)
         return widget
     
@@ -90,10 +157,6 @@ class SettingsDialog(QDialog):
         input_layout = QFormLayout()
         
         self.input_device_combo = QComboBox()
-        input_devices, _ = AudioManager.get_audio_devices()
-        self.input_device_combo.addItem("Varsayılan", None)
-        for device in input_devices:
-            self.input_device_combo.addItem(device['name'], device['id'])
         input_layout.addRow("Cihaz:", self.input_device_combo)
         
         self.mic_level_slider = QSlider(Qt.Orientation.Horizontal)
@@ -116,10 +179,6 @@ class SettingsDialog(QDialog):
         output_layout = QFormLayout()
         
         self.output_device_combo = QComboBox()
-        _, output_devices = AudioManager.get_audio_devices()
-        self.output_device_combo.addItem("Varsayılan", None)
-        for device in output_devices:
-            self.output_device_combo.addItem(device['name'], device['id'])
         output_layout.addRow("Cihaz:", self.output_device_combo)
         
         self.speaker_level_slider = QSlider(Qt.Orientation.Horizontal)
@@ -137,8 +196,75 @@ class SettingsDialog(QDialog):
         output_group.setLayout(output_layout)
         layout.addWidget(output_group)
         
+        # PTT sıralaması
+        ptt_group = QGroupBox("PTT Zamanlaması")
+        ptt_layout = QFormLayout()
+        
+        self.ptt_lead_spin = QSpinBox()
+        self.ptt_lead_spin.setRange(0, 2000)
+        self.ptt_lead_spin.setSingleStep(10)
+        self.ptt_lead_spin.setValue(150)
+        self.ptt_lead_spin.setSuffix(" ms")
+        self.ptt_lead_spin.setToolTip("PTT basıldıktan sonra sesin gönderilmeye başlayacağı süre")
+        ptt_layout.addRow("Ön Gecikme:", self.ptt_lead_spin)
+        
+        self.ptt_tail_spin = QSpinBox()
+        self.ptt_tail_spin.setRange(0, 2000)
+        self.ptt_tail_spin.setSingleStep(10)
+        self.ptt_tail_spin.setValue(300)
+        self.ptt_tail_spin.setSuffix(" ms")
+        self.ptt_tail_spin.setToolTip("Konuşma bittikten sonra PTT'nin açık kalacağı süre")
+        ptt_layout.addRow("Kuyruk Süresi:", self.ptt_tail_spin)
+        
+        ptt_group.setLayout(ptt_layout)
+        layout.addWidget(ptt_group)
+        
+        # Cihaz listeleri (Önbellekten doldur, değişince güncelle)
+        self._populate_audio_devices(*self.device_registry.get_audio_devices())
+        self.device_registry.audio_devices_changed.connect(self._populate_audio_devices)
+        
         widget.setLayout(layout)
         return widget
+    
+    def _populate_ports(self, ports: list):
+        """COM port listesini doldur (Seçimi koru)"""
+        current = self.port_combo.currentText()
+        self.port_combo.blockSignals(True)
+        self.port_combo.clear()
+        self.port_combo.addItems(["Otomatik"] + ports)
+        
+        # Kayıtlı port henüz listelenmemiş olabilir
+        selected = current if current and current != "Otomatik" else settings.get('radio.port', '')
+        if selected:
+            index = self.port_combo.findText(selected)
+            if index >= 0:
+                self.port_combo.setCurrentIndex(index)
+        self.port_combo.blockSignals(False)
+    
+    def _populate_audio_devices(self, input_devices: list, output_devices: list):
+        """Ses cihazı listelerini doldur (Seçimi koru)"""
+        for combo, devices, key in ((self.input_device_combo, input_devices, 'audio.input_device'),
+                                    (self.output_device_combo, output_devices, 'audio.output_device')):
+            current = combo.currentData() if combo.count() else settings.get(key)
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("Varsayılan", None)
+            for device in devices:
+                combo.addItem(f"{device['name']} ({device['hostapi']})", device['key'])
+            
+            # Eski ayarlarda indeks saklanmış olabilir
+            if isinstance(current, int):
+                kind = 'input' if combo is self.input_device_combo else 'output'
+                info = self.device_registry.find_device(current, kind)
+                current = info['key'] if info else None
+            
+            index = combo.findData(current) if current is not None else 0
+            if index < 0:
+                # Takılı olmayan cihaz seçimi kaydederken kaybolmasın
+                combo.addItem(f"{current} (bağlı değil)", current)
+                index = combo.count() - 1
+            combo.setCurrentIndex(index)
+            combo.blockSignals(False)
 
     def create_notification_tab(self) -> QWidget:
         """Bildirim ayarları sekmesi (Gelişmiş)"""
@@ -195,12 +321,12 @@ class SettingsDialog(QDialog):
         self.weather_api_key = QLineEdit()
         self.weather_api_key.setPlaceholderText("OpenWeatherMap API anahtarı")
         
-        test_api_btn = QPushButton("Test Et")
-        test_api_btn.setFixedWidth(80)
-        test_api_btn.clicked.connect(self._test_weather_api)
+        self.test_api_btn = QPushButton("Test Et")
+        self.test_api_btn.setFixedWidth(80)
+        self.test_api_btn.clicked.connect(self._test_weather_api)
         
         api_layout.addWidget(self.weather_api_key)
-        api_layout.addWidget(test_api_btn)
+        api_layout.addWidget(self.test_api_btn)
         
         weather_layout.addRow("API Anahtarı:", api_layout)
         
@@ -212,6 +338,12 @@ class SettingsDialog(QDialog):
         self.weather_city = QLineEdit("Istanbul") # Varsayılan şehir
         weather_layout.addRow("Şehir:", self.weather_city)
         
+        # Ek konumlar (Röle sahasındaki diğer şehirler)
+        self.weather_locations = QLineEdit()
+        self.weather_locations.setPlaceholderText("Örn: Ankara, Izmir, Berlin;DE")
+        self.weather_locations.setToolTip("Virgülle ayırın. Ülke kodu için 'Şehir;ÜLKE' yazın (Varsayılan: TR)")
+        weather_layout.addRow("Diğer Şehirler:", self.weather_locations)
+        
         self.weather_auto_announce = QCheckBox("Otomatik Duyuru (Her saat başı)")
         self.weather_auto_announce.setChecked(True)
         weather_layout.addRow("", self.weather_auto_announce)
@@ -220,6 +352,11 @@ class SettingsDialog(QDialog):
         self.weather_hourly.setToolTip("Saat başı duyurusundan 1 dakika sonra hava durumunu okur")
         weather_layout.addRow("", self.weather_hourly)
         
+        self.weather_forecast_enabled = QCheckBox("Fırtına, Kuvvetli Yağış ve Resmi Uyarıları Duyur")
+        self.weather_forecast_enabled.setToolTip(
+            "Saatlik tahmin ve uyarılar aynı sorguda alınır (One Call 3.0 aboneliği gerekir)")
+        weather_layout.addRow("", self.weather_forecast_enabled)
+        
         # Test Butonu
         test_weather_btn = QPushButton("🔊 Test Duyurusu")
         test_weather_btn.clicked.connect(self._test_weather_voice)
@@ -251,18 +388,47 @@ class SettingsDialog(QDialog):
         self.eq_city_filter.setPlaceholderText("Örn: Istanbul (Boş bırakırsanız tüm Türkiye)")
         
         self.eq_provider_combo = QComboBox()
-        self.eq_provider_combo.addItems(["Kandilli", "AFAD", "Tümü (Kandilli+AFAD)"])
+        self.eq_provider_combo.addItems(["Kandilli", "AFAD", "Tümü (Kandilli+AFAD)", "Kandilli + AFAD (Paralel)"])
         
         self.earthquake_interval = QSpinBox()
         self.earthquake_interval.setRange(10, 3600)
         self.earthquake_interval.setValue(60)
         self.earthquake_interval.setSuffix(" saniye")
         
+        self.eq_stream_enabled = QCheckBox("Anlık akışı kullan (EMSC, koparsa sorguya döner)")
+        self.eq_stream_enabled.setToolTip("Depremler yayınlandığı anda gelir; sorgu aralığını beklemez.")
+        
         earthquake_layout.addRow(self.earthquake_enabled)
         earthquake_layout.addRow("Veri Kaynağı:", self.eq_provider_combo)
         earthquake_layout.addRow("Minimum Büyüklük:", self.earthquake_min_mag)
         earthquake_layout.addRow("Bölge Filtresi (Opsiyonel):", self.eq_city_filter)
         earthquake_layout.addRow("Sorgulama Aralığı:", self.earthquake_interval)
+        earthquake_layout.addRow("", self.eq_stream_enabled)
+        
+        # Konuma göre uyarı (İstasyon çevresi)
+        self.eq_area_enabled = QCheckBox("İstasyon çevresine göre uyar (Bölge filtresinin yerine)")
+        self.eq_area_lat = QDoubleSpinBox()
+        self.eq_area_lat.setRange(-90.0, 90.0)
+        self.eq_area_lat.setDecimals(4)
+        self.eq_area_lon = QDoubleSpinBox()
+        self.eq_area_lon.setRange(-180.0, 180.0)
+        self.eq_area_lon.setDecimals(4)
+        self.eq_area_radius = QSpinBox()
+        self.eq_area_radius.setRange(0, 2000)
+        self.eq_area_radius.setSuffix(" km")
+        self.eq_area_slope = QDoubleSpinBox()
+        self.eq_area_slope.setRange(0.0, 3.0)
+        self.eq_area_slope.setSingleStep(0.1)
+        self.eq_area_slope.setToolTip("Her 100 km uzaklık için minimum büyüklüğe eklenir.")
+        
+        coords_layout = QHBoxLayout()
+        coords_layout.addWidget(self.eq_area_lat)
+        coords_layout.addWidget(self.eq_area_lon)
+        
+        earthquake_layout.addRow("", self.eq_area_enabled)
+        earthquake_layout.addRow("İstasyon (Enlem, Boylam):", coords_layout)
+        earthquake_layout.addRow("Uyarı Yarıçapı:", self.eq_area_radius)
+        earthquake_layout.addRow("Eşik Artışı (100 km başına):", self.eq_area_slope)
         
         # Test Butonu
         test_eq_btn = QPushButton("🔊 Test Uyarısı")
@@ -318,6 +484,26 @@ class SettingsDialog(QDialog):
         battery_group.setLayout(battery_layout)
         layout.addWidget(battery_group)
         
+        # --- Uzak Erişim (HTTP / WebSocket API) ---
+        api_group = QGroupBox("Uzak Erişim (API)")
+        api_layout = QFormLayout()
+        
+        self.api_enabled = QCheckBox("HTTP / WebSocket API'yi Aç")
+        
+        self.api_port = QSpinBox()
+        self.api_port.setRange(1024, 65535)
+        self.api_port.setValue(8765)
+        
+        self.api_token = QLineEdit()
+        self.api_token.setEchoMode(QLineEdit.EchoMode.Password)
+        self.api_token.setPlaceholderText("Boş bırakılırsa anahtar istenmez")
+        
+        api_layout.addRow("", self.api_enabled)
+        api_layout.addRow("Port:", self.api_port)
+        api_layout.addRow("Erişim Anahtarı:", self.api_token)
+        api_group.setLayout(api_layout)
+        layout.addWidget(api_group)
+        
         # --- Şablon Ayarı ---
         template_group = QGroupBox("Anons Şablonu")
         template_layout = QVBoxLayout()
@@ -360,19 +546,44 @@ class SettingsDialog(QDialog):
             self._refresh_voices()
 
     def _refresh_voices(self):
-        """Ses listesini yenile"""
+        """Ses listesini yenile (Önbellekte yoksa arka planda taranır)"""
+        if not self.notification_manager:
+            return
+        
+        provider = self.provider_combo.currentText() or None
+        voices = self.notification_manager.request_voices(provider)
+        if voices is None:
+            self._voices_ready = False
+            self.voice_combo.clear()
+            self.voice_combo.addItem("⏳ Sesler yükleniyor...")
+            self.voice_combo.setEnabled(False)
+            return
+        self._fill_voices(voices)
+    
+    def _on_voices_loaded(self, provider: str, voices: list):
+        """Arka plan taraması bitti (Başka sağlayıcıya geçildiyse sonuç atılır)"""
+        if provider == self.provider_combo.currentText() and not self._voices_ready:
+            self._fill_voices(voices)
+    
+    def _fill_voices(self, voices: list):
         self.voice_combo.clear()
         self.voice_map = {}
-        
-        if self.notification_manager:
-            voices = self.notification_manager.get_available_voices()
-            for i, voice in enumerate(voices):
-                display_name = f"{voice['name']}"
-                if 'lang' in voice:
-                    display_name += f" ({voice['lang']})"
-                
-                self.voice_combo.addItem(display_name)
-                self.voice_map[i] = voice['id']
+        for i, voice in enumerate(voices):
+            display_name = f"{voice['name']}"
+            if 'lang' in voice:
+                display_name += f" ({voice['lang']})"
+            
+            self.voice_combo.addItem(display_name)
+            self.voice_map[i] = voice['id']
+        self._select_pending_voice()
+        self.voice_combo.setEnabled(True)
+        self._voices_ready = True
+    
+    def _select_pending_voice(self):
+        for idx, vid in self.voice_map.items():
+            if vid == self._pending_voice:
+                self.voice_combo.setCurrentIndex(idx)
+                break
 
     def _test_voice_now(self):
         """Ayarlar menüsünde anlık ses testi"""
@@ -388,20 +599,46 @@ class SettingsDialog(QDialog):
             self.notification_manager.send_notification(msg, use_radio=False) # Sadece hoparlör
 
     def _test_weather_api(self):
-        """Hava durumu API anahtarını test et"""
+        """Hava durumu API anahtarını test et (Arka planda, pencere donmaz)"""
         api_key = self.weather_api_key.text().strip()
         city = self.weather_city.text().strip() or "Istanbul"
         
+        self._api_test_id += 1  # Süren test varsa sonucu atılır
         if not api_key:
-            self.weather_test_result.setText("❌ Lütfen API anahtarı girin.")
-            self.weather_test_result.setStyleSheet("color: red;")
+            self._show_api_result("❌ Lütfen API anahtarı girin.", "red")
             return
-
-        self.weather_test_result.setText("⏳ Test ediliyor...")
-        self.weather_test_result.setStyleSheet("color: orange;")
-        self.weather_test_result.repaint() # UI güncelle
         
-        import requests
+        cached = _api_test_cache.get((api_key, city))
+        if cached and time.monotonic() - cached[0] < API_TEST_TTL:
+            self._show_api_result(*cached[1:])
+            return
+
+        self._show_api_result("⏳ Test ediliyor...", "orange")
+        self.test_api_btn.setEnabled(False)
+        threading.Thread(target=self._api_test_worker,
+                         args=(self._api_test_id, api_key, city), daemon=True).start()
+    
+    def _show_api_result(self, text: str, color: str):
+        self.weather_test_result.setText(text)
+        self.weather_test_result.setStyleSheet(f"color: {color};")
+    
+    def _on_api_test_finished(self, job_id: int, text: str, color: str):
+        """GUI thread: Test sonucu (Yerini yeni test aldıysa gösterilmez)"""
+        if job_id != self._api_test_id:
+            return
+        self.test_api_btn.setEnabled(True)
+        self._show_api_result(text, color)
+    
+    def _api_test_worker(self, job_id: int, api_key: str, city: str):
+        """Worker thread: API isteği"""
+        text, color = self._run_api_test(api_key, city)
+        try:
+            self._api_test_finished.emit(job_id, text, color)
+        except RuntimeError:
+            pass  # Pencere silinmiş
+    
+    @staticmethod
+    def _run_api_test(api_key: str, city: str) -> Tuple[str, str]:
         try:
             url = "https://api.openweathermap.org/data/2.5/weather"
             params = {
@@ -410,27 +647,27 @@ class SettingsDialog(QDialog):
                 'units': 'metric',
                 'lang': 'tr'
             }
-            response = requests.get(url, params=params, timeout=5)
+            # Arayüz beklediği için yeniden deneme yok
+            response = http_client.get(url, params=params, timeout=5, retries=0)
             
             if response.status_code == 200:
                 data = response.json()
                 temp = data['main']['temp']
                 desc = data['weather'][0]['description']
-                self.weather_test_result.setText(f"✅ Başarılı! {city}: {temp}°C, {desc}")
-                self.weather_test_result.setStyleSheet("color: green;")
+                result = (f"✅ Başarılı! {city}: {temp}°C, {desc}", "green")
             elif response.status_code == 401:
-                self.weather_test_result.setText("❌ Hata (401): Geçersiz API Anahtarı")
-                self.weather_test_result.setStyleSheet("color: red;")
+                result = ("❌ Hata (401): Geçersiz API Anahtarı", "red")
             elif response.status_code == 404:
-                self.weather_test_result.setText(f"❌ Hata: Şehir bulunamadı ({city})")
-                self.weather_test_result.setStyleSheet("color: red;")
+                result = (f"❌ Hata: Şehir bulunamadı ({city})", "red")
             else:
-                self.weather_test_result.setText(f"❌ Hata kodu: {response.status_code}")
-                self.weather_test_result.setStyleSheet("color: red;")
+                # Geçici olabilir, önbelleğe alınmaz
+                return (f"❌ Hata kodu: {response.status_code}", "red")
                 
         except Exception as e:
-            self.weather_test_result.setText(f"❌ Bağlantı hatası: {str(e)[:50]}")
-            self.weather_test_result.setStyleSheet("color: red;")
+            return (f"❌ Bağlantı hatası: {str(e)[:50]}", "red")
+        
+        _api_test_cache[(api_key, city)] = (time.monotonic(),) + result
+        return result
 
     def _test_weather_voice(self):
         """Hava durumu test anonsu"""
@@ -474,9 +711,15 @@ class SettingsDialog(QDialog):
             if index >= 0:
                 self.port_combo.setCurrentIndex(index)
         
+        self.tx_timeout_spin.setValue(int(settings.get('tx.timeout', 180)))
+        self.tx_lockout_spin.setValue(int(settings.get('tx.lockout', 30)))
+        self.tx_duty_spin.setValue(int(settings.get('tx.max_duty_cycle', 0)))
+        
         # Ses
         self.mic_level_slider.setValue(settings.get('audio.mic_level', 50))
         self.speaker_level_slider.setValue(settings.get('audio.speaker_level', 75))
+        self.ptt_lead_spin.setValue(int(settings.get('audio.ptt_lead_ms', 150)))
+        self.ptt_tail_spin.setValue(int(settings.get('audio.ptt_tail_ms', 300)))
         
         # Bildirimler
         saved_provider = settings.get('notification.provider')
@@ -488,23 +731,36 @@ class SettingsDialog(QDialog):
                 # ama setCurrentIndex sinyal tetikler mi? Genellikle evet.
                 # Yine de manuel refresh yapalım
                 self._on_provider_changed(saved_provider)
-                
-        saved_voice = settings.get('notification.voice_id')
-        if saved_voice and hasattr(self, 'voice_map'):
-            for idx, vid in self.voice_map.items():
-                if vid == saved_voice:
-                    self.voice_combo.setCurrentIndex(idx)
-                    break
+        
+        # Kayıtlı ses liste gelince seçilir (Arka planda taranıyor olabilir)
+        self._pending_voice = settings.get('notification.voice_id')
+        self._select_pending_voice()
         
         saved_msg = settings.get('notification.test_message')
         if saved_msg:
             self.test_message_input.setText(saved_msg)
         
+        # Hava durumu
+        self.weather_api_key.setText(settings.get('weather.api_key', ''))
+        self.weather_city.setText(settings.get('weather.city', 'Istanbul'))
+        self.weather_locations.setText(", ".join(
+            item.replace(',', ';') for item in settings.get('weather.locations', []) or []))
+        self.weather_hourly.setChecked(settings.get('weather.hourly', False))
+        self.weather_forecast_enabled.setChecked(settings.get('weather.forecast.enabled', False))
+        
         # Deprem
         self.earthquake_enabled.setChecked(settings.get('earthquake.enabled', True))
         self.earthquake_min_mag.setValue(float(settings.get('earthquake.min_magnitude', 4.0)))
         self.eq_city_filter.setText(settings.get('earthquake.city_filter', ''))
         self.earthquake_interval.setValue(int(settings.get('earthquake.interval', 60)))
+        self.eq_stream_enabled.setChecked(settings.get('earthquake.stream_enabled', False))
+        
+        area = settings.get('earthquake.alert_area', {}) or {}
+        self.eq_area_enabled.setChecked(area.get('enabled', False))
+        self.eq_area_lat.setValue(float(area.get('lat', 41.01)))
+        self.eq_area_lon.setValue(float(area.get('lon', 28.97)))
+        self.eq_area_radius.setValue(int(area.get('radius_km', 200)))
+        self.eq_area_slope.setValue(float(area.get('magnitude_per_100km', 0.5)))
         
         provider = settings.get('earthquake.provider', "Kandilli")
         idx = self.eq_provider_combo.findText(provider)
@@ -518,28 +774,44 @@ class SettingsDialog(QDialog):
         self.battery_warning_enabled.setChecked(settings.get('power.warning_enabled', True))
         self.battery_warning_msg.setText(settings.get('power.warning_message', "Dikkat, batarya seviyesi kritik. Sistem kapanabilir."))
         
+        self.api_enabled.setChecked(settings.get('api.enabled', False))
+        self.api_port.setValue(int(settings.get('api.port', 8765)))
+        self.api_token.setText(settings.get('api.token', ''))
+        
         default_template = "Saat $saat. $sehir hava durumu: $havadurumu."
         self.announce_template_input.setText(settings.get('general.announce_template', default_template))
     
     def save_settings(self):
-        """Ayarları kaydet"""
+        """Ayarları kaydet (Tüm değişiklikler tek yazmada) ve pencereyi kapat"""
+        with settings.batch():
+            self._store_settings()
+        self.accept()
+    
+    def _store_settings(self):
+        """Form değerlerini ayarlara aktar"""
         # Telsiz
         if self.port_combo.currentText() != "Otomatik":
             settings.set('radio.port', self.port_combo.currentText())
         
+        settings.set('tx.timeout', self.tx_timeout_spin.value())
+        settings.set('tx.lockout', self.tx_lockout_spin.value())
+        settings.set('tx.max_duty_cycle', self.tx_duty_spin.value())
+        
         # Ses
         settings.set('audio.mic_level', self.mic_level_slider.value())
         settings.set('audio.speaker_level', self.speaker_level_slider.value())
         settings.set('audio.input_device', self.input_device_combo.currentData())
         settings.set('audio.output_device', self.output_device_combo.currentData())
+        settings.set('audio.ptt_lead_ms', self.ptt_lead_spin.value())
+        settings.set('audio.ptt_tail_ms', self.ptt_tail_spin.value())
         
         # Bildirimler
         settings.set('notification.provider', self.provider_combo.currentText())
         
-        idx = self.voice_combo.currentIndex()
-        if hasattr(self, 'voice_map'):
-             voice_id = self.voice_map.get(idx)
-             settings.set('notification.voice_id', voice_id)
+        # Liste henüz yüklenmediyse kayıtlı ses korunur
+        if self._voices_ready:
+            voice_id = self.voice_map.get(self.voice_combo.currentIndex())
+            settings.set('notification.voice_id', voice_id)
         
         msg = self.test_message_input.toPlainText()
         settings.set('notification.test_message', msg)
@@ -547,15 +819,29 @@ class SettingsDialog(QDialog):
         # Diğer
         settings.set('weather.api_key', self.weather_api_key.text())
         settings.set('weather.city', self.weather_city.text())
+        settings.set('weather.locations', [
+            item.strip().replace(';', ',') for item in self.weather_locations.text().split(',') if item.strip()])
         # weather_hourly burada kaydedilmeli ama önce UI elemanını eklemeliyim
         if hasattr(self, 'weather_hourly'):
             settings.set('weather.hourly', self.weather_hourly.isChecked())
+        settings.set('weather.forecast.enabled', self.weather_forecast_enabled.isChecked())
         
         settings.set('earthquake.enabled', self.earthquake_enabled.isChecked())
         settings.set('earthquake.min_magnitude', self.earthquake_min_mag.value())
         settings.set('earthquake.city_filter', self.eq_city_filter.text())
         settings.set('earthquake.provider', self.eq_provider_combo.currentText())
         settings.set('earthquake.interval', self.earthquake_interval.value())
+        settings.set('earthquake.stream_enabled', self.eq_stream_enabled.isChecked())
+        
+        area = dict(settings.get('earthquake.alert_area', {}) or {})  # Çokgen vb. korunur
+        area.update({
+            'enabled': self.eq_area_enabled.isChecked(),
+            'lat': self.eq_area_lat.value(),
+            'lon': self.eq_area_lon.value(),
+            'radius_km': self.eq_area_radius.value(),
+            'magnitude_per_100km': self.eq_area_slope.value(),
+        })
+        settings.set('earthquake.alert_area', area)
         
         settings.set('general.auto_start', self.auto_start.isChecked())
         settings.set('general.hourly_announce', self.hourly_announce.isChecked())
@@ -567,7 +853,10 @@ class SettingsDialog(QDialog):
         settings.set('power.warning_enabled', self.battery_warning_enabled.isChecked())
         settings.set('power.warning_message', self.battery_warning_msg.text())
         
-        self.accept()
+        # API
+        settings.set('api.enabled', self.api_enabled.isChecked())
+        settings.set('api.port', self.api_port.value())
+        settings.set('api.token', self.api_token.text())
 
     def reset_template(self):
         """Şablonu varsayılan haline getir"""
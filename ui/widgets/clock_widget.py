@@ -2,29 +2,25 @@
 Saat ve tarih widget'ı
 """
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt6.QtCore import QTimer, Qt, pyqtSignal
+from PyQt6.QtCore import Qt
 from datetime import datetime
+from services.clock_service import ClockService, get_natural_time_text
 
 
 class ClockWidget(QWidget):
     """Saat ve tarih gösterimi widget'ı"""
     
-    request_announcement = pyqtSignal(str) # Anons isteği (Metin)
-    
-    def __init__(self, parent=None):
+    def __init__(self, clock_service: ClockService, parent=None):
         super().__init__(parent)
-        self.announce_enabled = False # Saat başı anons
-        self.last_announced_hour = -1
+        self.clock_service = clock_service
         
         self.init_ui()
         
-        # Saat güncelleyici timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_time)
-        self.timer.start(1000)  # Her saniye
+        # Saat güncelleyici (Servisin saniyelik tiki)
+        self.clock_service.tick.connect(self.update_time)
         
         # İlk güncelleme
-        self.update_time()
+        self.update_time(datetime.now())
     
     def init_ui(self):
         """UI'ı başlat"""
@@ -55,10 +51,8 @@ class ClockWidget(QWidget):
         
         self.setLayout(layout)
     
-    def update_time(self):
-        """Saat ve tarihi güncelle ve anons kontrolü yap"""
-        now = datetime.now()
-        
+    def update_time(self, now: datetime):
+        """Saat ve tarihi güncelle"""
         # Türkçe gün isimleri
         days_tr = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar']
         months_tr = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
@@ -74,36 +68,6 @@ class ClockWidget(QWidget):
         date_str = f"{day_name}, {now.day} {month_name} {now.year}"
         self.date_label.setText(date_str)
 
-        # Anons Kontrolü
-        if self.announce_enabled:
-            # Saniyenin 0 olduğu anı yakala (veya yakını)
-            # Ve aynı saat/dakika içinde birden fazla anons yapma
-            current_minute_tag = f"{now.hour}:{now.minute}"
-            
-            if now.second == 0 and current_minute_tag != self.last_announced_hour:
-                if now.minute == 0 or now.minute == 30:
-                    text = self.get_natural_time_text(now.hour, now.minute)
-                    self.request_announcement.emit(text)
-                    self.last_announced_hour = current_minute_tag
-
     def get_natural_time_text(self, hour: int, minute: int) -> str:
         """Saati doğal dilde söyle (Örn: Onu yirmi geçiyor)"""
-        
-        # Saat'in 'i' hali (Accusative)
-        # 0->sıfırı, 1->biri, 2->ikiyi, 3->üçü, 4->dördü, 5->beşi, 6->altıyı...
-        hour_accusative = {
-            0: "sıfırı", 1: "biri", 2: "ikiyi", 3: "üçü", 4: "dördü", 5: "beşi",
-            6: "altıyı", 7: "yediyi", 8: "sekizi", 9: "dokuzu", 10: "onu",
-            11: "on biri", 12: "on ikiyi", 13: "on üçü", 14: "on dördü", 15: "on beşi",
-            16: "on altıyı", 17: "on yediyi", 18: "on sekizi", 19: "on dokuzu", 20: "yirmiyi",
-            21: "yirmi biri", 22: "yirmi ikiyi", 23: "yirmi üçü"
-        }
-        
-        if minute == 0:
-            return f"Saat {hour}."
-        elif minute == 30:
-            return f"Saat {hour} buçuk."
-        else:
-            # Örn: 20:24 -> Saat yirmiyi yirmi dört geçiyor.
-            h_text = hour_accusative.get(hour, str(hour))
-            return f"Saat {h_text} {minute} geçiyor."
+        return get_natural_time_text(hour, minute)
@@ -1,142 +1,279 @@
 """
 Deprem Listesi Widget'ı
 """
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QTableWidget, QTableWidgetItem, QPushButton, 
-                             QHeaderView, QAbstractItemView)
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QTableView, QPushButton,
+                             QHeaderView, QAbstractItemView, QComboBox)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
 from PyQt6.QtGui import QColor, QFont
 from datetime import datetime
+from typing import List, Dict
+import time
+
+# Görünüm aralıkları: (Etiket, saniye). None: API'nin son listesi
+HISTORY_RANGES = [
+    ("Son Liste", None),
+    ("Son 24 Saat", 86400),
+    ("Son 7 Gün", 7 * 86400),
+    ("Son 30 Gün", 30 * 86400),
+    ("Son 1 Yıl", 365 * 86400),
+]
+
+# Büyüklük renkleri (Bir kez oluşturulur): (Alt sınır, arka plan, yazı)
+MAGNITUDE_COLORS = [
+    (5.0, QColor("#e74c3c"), QColor(Qt.GlobalColor.white)),  # Kırmızı
+    (4.0, QColor("#e67e22"), QColor(Qt.GlobalColor.black)),  # Turuncu
+    (3.0, QColor("#f1c40f"), QColor(Qt.GlobalColor.black)),  # Sarı
+]
+
+CENTER = int(Qt.AlignmentFlag.AlignCenter)
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+
+class EarthquakeTableModel(QAbstractTableModel):
+    """
+    Deprem kayıtları tablosu (EarthquakeRecord listesi)
+
+    set_records() listeyi yeniden kurmaz: Eski ve yeni liste ID'lere göre
+    karşılaştırılır, sadece düşen satırlar silinir, yeni satırlar eklenir
+    ve değişen satırlar güncellenir. Metinler data() çağrıldıkça üretilir.
+    """
+
+    HEADERS = ["Saat", "Büyüklük", "Konumu", "Derinlik"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._records: List = []
+        self._text: Dict[str, tuple] = {}     # ID -> biçimlenmiş hücreler (İlk gösterimde)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._records)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def record(self, row: int):
+        return self._records[row]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        eq = self._records[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = self._text.get(eq.id)
+            if text is None:
+                text = self._text[eq.id] = _format_row(eq)
+            return text[column]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return None if column == 2 else CENTER
+        if column == 1 and role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole):
+            for limit, background, foreground in MAGNITUDE_COLORS:
+                if eq.magnitude >= limit:
+                    return background if role == Qt.ItemDataRole.BackgroundRole else foreground
+            return None
+        if role == SORT_ROLE:
+            # Sıralama ham değerle (Metinle değil)
+            return (eq.timestamp if eq.has_time else 0.0, eq.magnitude, eq.location,
+                    _depth_value(eq.depth))[column]
+        return None
+
+    def set_records(self, records: List) -> None:
+        """Listeyi farkları uygulayarak güncelle (Aynı listede hiçbir şey yapılmaz)"""
+        old = self._records
+        if len(old) == len(records) and all(_same_record(a, b) for a, b in zip(old, records)):
+            return
+
+        new_rows = {eq.id: row for row, eq in enumerate(records)}
+        if len(new_rows) != len(records):
+            # Aynı ID iki kez: Fark çıkarılamaz
+            self._reset(records)
+            return
+
+        # 1. Yeni listede olmayan satırları sil (Alttan üste, ardışık bloklar halinde)
+        gone = [row for row, eq in enumerate(old) if eq.id not in new_rows]
+        for first, last in reversed(_runs(gone)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for eq in self._records[first:last + 1]:
+                self._text.pop(eq.id, None)
+            del self._records[first:last + 1]
+            self.endRemoveRows()
+
+        # Kalanlar yeni listede aynı sırada değilse (Nadir) baştan kur
+        kept = [new_rows[eq.id] for eq in self._records]
+        if any(a > b for a, b in zip(kept, kept[1:])):
+            self._reset(records)
+            return
+
+        # 2. Yeni satırları yerlerine ekle (Genelde en üste)
+        kept_ids = {eq.id for eq in self._records}
+        added = [row for row, eq in enumerate(records) if eq.id not in kept_ids]
+        for first, last in _runs(added):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._records[first:first] = records[first:last + 1]
+            self.endInsertRows()
+
+        # 3. Aynı depremin güncellenen kaydı (Büyüklük, kurumlar)
+        changed = [row for row, eq in enumerate(self._records) if not _same_record(eq, records[row])]
+        self._records = list(records)
+        for row in changed:
+            self._text.pop(records[row].id, None)
+        for first, last in _runs(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.HEADERS) - 1))
+
+    def _reset(self, records: List) -> None:
+        self.beginResetModel()
+        self._records = list(records)
+        self._text = {}
+        self.endResetModel()
+
+
+def _same_record(a, b) -> bool:
+    """Kayıtlar aynı mı? (Bilinmeyen zaman NaN'dır ve NaN kendine eşit değildir)"""
+    if a is b or a == b:
+        return True
+    return (not a.has_time and not b.has_time
+            and a._replace(timestamp=0.0) == b._replace(timestamp=0.0))
+
+
+def _format_row(eq) -> tuple:
+    """Satırın görünen metinleri"""
+    if eq.has_time:
+        time_val = datetime.fromtimestamp(eq.timestamp).strftime("%d.%m %H:%M")
+    else:
+        # Tarih okunamadıysa olduğu gibi göster
+        time_val = str(eq.date).strip() or "--:--"
+    return (time_val, f"{eq.magnitude:.1f}", str(eq.location), f"{eq.depth} km")
+
+
+def _depth_value(depth) -> float:
+    try:
+        return float(depth)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _runs(rows: List[int]) -> List[tuple]:
+    """Sıralı satır numaralarını ardışık (ilk, son) bloklara ayır"""
+    runs = []
+    for row in rows:
+        if runs and runs[-1][1] == row - 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
+
 
 class EarthquakeWidget(QWidget):
     """Son depremleri gösteren panel"""
-    
+
     def __init__(self, earthquake_service):
         super().__init__()
         self.service = earthquake_service
         self.init_ui()
-        
+
         # Servis bağlantıları
-        self.service.data_updated.connect(self.update_list)
+        self.service.records_updated.connect(self._on_records_updated)
+        self.service.history_loaded.connect(self.update_list)
         self.service.error_occurred.connect(self.show_error)
-        
+
     def init_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 10, 10, 10)
-        
+
         # Başlık ve Butonlar
         top_bar = QHBoxLayout()
-        
+
         title_label = QLabel("🌍 Son Depremler")
         title_label.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
         top_bar.addWidget(title_label)
-        
+
         top_bar.addStretch()
-        
+
+        # Geçmiş aralığı (Kayıt tutuluyorsa)
+        self.range_combo = QComboBox()
+        for label, seconds in HISTORY_RANGES:
+            self.range_combo.addItem(label, seconds)
+        self.range_combo.setEnabled(self.service.history is not None)
+        self.range_combo.currentIndexChanged.connect(self.refresh_view)
+        top_bar.addWidget(self.range_combo)
+
         self.refresh_btn = QPushButton("🔄 Yenile")
         self.refresh_btn.clicked.connect(self.service.check_earthquakes)
         top_bar.addWidget(self.refresh_btn)
-        
+
         layout.addLayout(top_bar)
-        
-        # Tablo
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Saat", "Büyüklük", "Konumu", "Derinlik"])
-        
+
+        # Tablo (Model + sıralama için proxy)
+        self.model = EarthquakeTableModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SORT_ROLE)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+
         # Tablo ayarları
         header = self.table.horizontalHeader()
-        
+
         # Saat sütunu: Sabit genişlik (Tarih ve Saat için)
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
         self.table.setColumnWidth(0, 110) # 60 -> 110 (Tarih için yer aç)
-        
+
         # Büyüklük: İçeriğe göre
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        
+
         # Konum: Kalan alanı kapla
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        
+
         # Derinlik: İçeriğe göre
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
-        
+
         self.table.verticalHeader().setVisible(False)
+        # Sabit satır yüksekliği: Uzun geçmişte kaydırma her satırı ölçmez
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.table.setAlternatingRowColors(True)
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.DescendingOrder)
+
         layout.addWidget(self.table)
-        
+
         # Bilgi Satırı
         self.status_label = QLabel("Veri bekleniyor...")
         self.status_label.setStyleSheet("color: gray; font-size: 11px;")
         layout.addWidget(self.status_label)
 
+    def _on_records_updated(self, records: list):
+        """Yeni API listesi: Geçmiş görünümündeyse sorgu yenilenir"""
+        if self.range_combo.currentData() is None:
+            self.update_list(records)
+        else:
+            self.refresh_view()
+
+    def refresh_view(self):
+        """Seçili aralığı göster"""
+        seconds = self.range_combo.currentData()
+        if seconds is None:
+            matcher = self.service.location_matcher
+            self.update_list([eq for eq in self.service.last_data if matcher.matches(eq.location)][:100])
+        else:
+            self.status_label.setText("Geçmiş yükleniyor...")
+            self.service.load_history(start=time.time() - seconds, limit=2000)
+
     def update_list(self, earthquakes: list):
-        """Listeyi güncelle"""
-        print(f"[DEBUG] WIDGET UPDATE RECEIVED: {len(earthquakes)} items")
+        """Listeyi güncelle (EarthquakeRecord listesi, yeniden eskiye)"""
         try:
-            self.table.setSortingEnabled(False)
-            self.table.setRowCount(0)
-            self.table.setRowCount(len(earthquakes))
-            
+            self.model.set_records(earthquakes)
             self.status_label.setText(f"Son Güncelleme: {len(earthquakes)} deprem listelendi.")
-            
-            for row, eq in enumerate(earthquakes):
-                # Tarih/Saat parse et ve formatla
-                date_str = str(eq.get('date', '')).strip()
-                
-                try:
-                    # Kandilli formatı genelde: "2024.02.05 20:30:45"
-                    # Biz bunu "05.02 20:30" yapmak istiyoruz
-                    if '-' in date_str: # YYYY-MM-DD
-                         dt_obj = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-                    else: # YYYY.MM.DD
-                         dt_obj = datetime.strptime(date_str, "%Y.%m.%d %H:%M:%S")
-                         
-                    time_val = dt_obj.strftime("%d.%m %H:%M")
-                except Exception as e:
-                    # Format uymazsa, direkt stringi göster (varsa)
-                    # Yoksa "--" göster
-                    # print(f"[DEBUG] Date parse error: {e} for {date_str}")
-                    time_val = date_str if date_str else "--:--"
-                
-                # Renklendirme (Büyüklüğe göre)
-                mag = float(eq.get('magnitude', 0.0))
-                color = None
-                if mag >= 5.0:
-                    color = QColor("#e74c3c") # Kırmızı
-                elif mag >= 4.0:
-                    color = QColor("#e67e22") # Turuncu
-                elif mag >= 3.0:
-                    color = QColor("#f1c40f") # Sarı
-                
-                # Hücreleri oluştur
-                # 0: Saat
-                item_time = QTableWidgetItem(time_val)
-                item_time.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table.setItem(row, 0, item_time)
-                
-                # 1: Büyüklük
-                item_mag = QTableWidgetItem(f"{mag:.1f}")
-                item_mag.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                if color:
-                    item_mag.setBackground(color)
-                    item_mag.setForeground(Qt.GlobalColor.black if mag < 5.0 else Qt.GlobalColor.white)
-                self.table.setItem(row, 1, item_mag)
-                
-                # 2: Konum
-                item_loc = QTableWidgetItem(str(eq.get('location', '')))
-                self.table.setItem(row, 2, item_loc)
-                
-                # 3: Derinlik
-                depth = eq.get('depth', 0)
-                item_depth = QTableWidgetItem(f"{depth} km")
-                item_depth.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table.setItem(row, 3, item_depth)
-                
-            self.table.setSortingEnabled(True)
-            
+            self.status_label.setStyleSheet("color: gray; font-size: 11px;")
         except Exception as e:
             print(f"[HATA] Widget update error: {e}")
             import traceback
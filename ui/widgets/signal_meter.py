@@ -63,6 +63,11 @@ class SignalMeterWidget(QWidget):
         audio_layout.addWidget(self.audio_bar)
         layout.addLayout(audio_layout)
         
+        # İletim sayaçları (TOT / görev döngüsü)
+        self.tx_stats_label = QLabel("")
+        self.tx_stats_label.setStyleSheet("color: #888; font-size: 9pt;")
+        layout.addWidget(self.tx_stats_label)
+        
         # Durum
         self.status_label = QLabel("● Bağlantı Bekleniyor")
         self.status_label.setStyleSheet("color: #888;")
@@ -84,6 +89,21 @@ class SignalMeterWidget(QWidget):
         """Ses seviyesini güncelle (0-100)"""
         self.audio_bar.setValue(int(max(0, min(100, level))))
     
+    def update_tx_stats(self, stats: dict):
+        """İletim süresi, görev döngüsü ve TOT kilidini göster"""
+        if stats.get('keyed'):
+            text = f"TX: {stats['current_tx_time']:.0f}/{stats['timeout']} sn"
+        else:
+            text = f"Son TX: {stats['last_tx_time']:.0f} sn"
+        text += f" | Görev: %{stats['duty_cycle']:.1f} | TOT: {stats['timeout_count']}"
+        
+        if stats.get('locked'):
+            text += f" | Kilitli: {stats['lockout_remaining']:.0f} sn"
+            self.tx_stats_label.setStyleSheet("color: #e63946; font-size: 9pt;")
+        else:
+            self.tx_stats_label.setStyleSheet("color: #888; font-size: 9pt;")
+        self.tx_stats_label.setText(text)
+    
     def set_status(self, status: str, status_type: str = "info"):
         """
         Durum mesajını ayarla
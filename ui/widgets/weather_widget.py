@@ -3,6 +3,7 @@ Hava durumu kartı widget'ı
 """
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
 from PyQt6.QtCore import Qt
+from datetime import datetime
 
 
 class WeatherWidget(QWidget):
@@ -56,4 +57,11 @@ class WeatherWidget(QWidget):
         self.desc_label.setText(data.get('description', '--').capitalize())
         
         # Tooltip olarak detay ekle
-        self.setToolTip(f"Nem: %{data.get('humidity', '--')} | Rüzgar: {data.get('wind_speed', '--')} km/s")
+        tooltip = f"Nem: %{data.get('humidity', '--')} | Rüzgar: {data.get('wind_speed', '--')} km/s"
+        if data.get('fetched_at'):
+            tooltip += f"\nAlındığı an: {datetime.fromtimestamp(data['fetched_at']).strftime('%d.%m %H:%M')}"
+        self.setToolTip(tooltip)
+        
+        # Eski veri (Bağlantı yok veya henüz yenilenmedi): Soluk göster
+        self.temp_label.setEnabled(not data.get('stale'))
+        self.desc_label.setEnabled(not data.get('stale'))